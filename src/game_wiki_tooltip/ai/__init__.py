@@ -16,6 +16,14 @@ __all__ = [
     'gemini_embedding',
     'gemini_summarizer',
     'intent_aware_reranker',
+    'ttl_cache',
+    'query_normalizer',
+    'local_intent_classifier',
+    'gemini_client_registry',
+    'context_packer',
+    'answer_pack',
+    'chunk_store',
+    'index_bundle',
     # Note: 'intent' module is deprecated, functionality moved to unified_query_processor
 ]
 
@@ -0,0 +1,332 @@
+"""
+Answer Pack Module
+==================
+
+Features:
+1. Offline answers for a game's most common questions, stored next to the vectors
+   (answer_pack.json) with the chunk IDs each answer was generated from
+2. Query-time matching by exact canonical key (normalize_query) or by cosine
+   similarity of the query embedding
+3. Per-entry invalidation: an answer is dropped at load time when any of its
+   source chunks changed or disappeared from metadata.json
+4. Hit/miss statistics
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .query_normalizer import normalize_query
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+ANSWER_PACK_FILENAME = "answer_pack.json"
+ANSWER_PACK_VERSION = 1
+
+
+def chunk_fingerprint(chunk: Dict[str, Any]) -> str:
+    """Content hash of a knowledge chunk, changes whenever any field of the chunk changes"""
+    payload = json.dumps(chunk, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _unit_vector(values: List[float]) -> Optional[List[float]]:
+    norm = math.sqrt(sum(value * value for value in values))
+    if not norm:
+        return None
+    return [value / norm for value in values]
+
+
+@dataclass
+class PackedAnswer:
+    """One prepared answer"""
+    question: str
+    key: str  # normalize_query(question)
+    language: str
+    model: str
+    answer: List[str]  # Stream chunks, replayed in order
+    sources: List[Dict[str, str]]  # [{"chunk_id", "fingerprint"}] of the chunks the answer was generated from
+    embedding: Optional[List[float]] = None  # Unit-length embedding of the retrieval query
+    created_at: float = field(default_factory=time.time)
+
+
+class AnswerPack:
+    """Prepared answers of one game, matched by canonical key or embedding similarity"""
+
+    def __init__(self, entries: List[PackedAnswer], similarity_threshold: float = 0.92):
+        """
+        Initialize the pack
+
+        Args:
+            entries: Valid prepared answers
+            similarity_threshold: Minimum cosine similarity for an embedding match
+        """
+        self.similarity_threshold = similarity_threshold
+        self.entries = entries
+        self._by_key: Dict[Tuple[str, str], PackedAnswer] = {
+            (entry.key, entry.language): entry for entry in entries
+        }
+        self._embedded = [entry for entry in entries if entry.embedding]
+        self._matrix = (
+            np.asarray([entry.embedding for entry in self._embedded], dtype=np.float32)
+            if NUMPY_AVAILABLE and self._embedded else None
+        )
+        self.stats = {
+            "entries": len(entries),
+            "stale_entries": 0,
+            "lookups": 0,
+            "exact_hits": 0,
+            "embedding_hits": 0,
+            "misses": 0
+        }
+
+    @classmethod
+    def load(cls, index_dir: Path, chunks: List[Dict[str, Any]],
+             similarity_threshold: float = 0.92) -> Optional["AnswerPack"]:
+        """
+        Load the answer pack of a vector index, dropping entries whose source chunks changed
+
+        Args:
+            index_dir: Vector index directory (contains metadata.json)
+            chunks: Loaded metadata chunks
+            similarity_threshold: Minimum cosine similarity for an embedding match
+
+        Returns:
+            AnswerPack, or None when the index has no (valid) pack
+        """
+        pack_path = Path(index_dir) / ANSWER_PACK_FILENAME
+        if not pack_path.exists():
+            return None
+        try:
+            with open(pack_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Failed to load answer pack {pack_path}: {e}")
+            return None
+        if data.get("version") != ANSWER_PACK_VERSION:
+            logger.info(f"Answer pack version mismatch, ignoring: {pack_path}")
+            return None
+
+        fingerprints = {
+            chunk.get("chunk_id"): chunk_fingerprint(chunk)
+            for chunk in chunks or [] if chunk.get("chunk_id") is not None
+        }
+        entries = []
+        stale = 0
+        for raw in data.get("entries", []):
+            try:
+                entry = PackedAnswer(**raw)
+            except TypeError as e:
+                logger.debug(f"Skipping unreadable answer pack entry: {e}")
+                stale += 1
+                continue
+            if entry.sources and all(
+                fingerprints.get(source.get("chunk_id")) == source.get("fingerprint")
+                for source in entry.sources
+            ):
+                entries.append(entry)
+            else:
+                stale += 1
+
+        if stale:
+            logger.info(f"Answer pack: {stale} entries invalidated by changed chunks")
+        if not entries:
+            return None
+        pack = cls(entries, similarity_threshold=similarity_threshold)
+        pack.stats["stale_entries"] = stale
+        logger.info(f"Answer pack loaded: {pack_path} ({len(entries)} answers)")
+        return pack
+
+    def save(self, index_dir: Path, game_name: Optional[str] = None) -> Path:
+        """Write the pack next to the vectors (compact JSON, atomic replace)"""
+        pack_path = Path(index_dir) / ANSWER_PACK_FILENAME
+        data = {
+            "version": ANSWER_PACK_VERSION,
+            "game": game_name,
+            "created_at": time.time(),
+            "entries": [asdict(entry) for entry in self.entries]
+        }
+        tmp_path = pack_path.with_suffix(pack_path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, pack_path)
+        return pack_path
+
+    def match_key(self, query: str, language: str) -> Optional[PackedAnswer]:
+        """Exact canonical-key match only (no embedding needed)"""
+        return self._by_key.get((normalize_query(query), language))
+
+    @property
+    def has_embeddings(self) -> bool:
+        return bool(self._embedded)
+
+    def match(self, queries: List[str], language: str,
+              embedding: Optional[List[float]] = None) -> Optional[Tuple[PackedAnswer, str, float]]:
+        """
+        Find a prepared answer for a query
+
+        Args:
+            queries: Query variants tried for an exact key match (e.g. original and rewritten query)
+            language: Response language, answers in other languages never match
+            embedding: Query embedding for the similarity match, None to match keys only
+
+        Returns:
+            (answer, match type "exact"/"embedding", similarity), or None
+        """
+        self.stats["lookups"] += 1
+        for query in queries:
+            if not query:
+                continue
+            entry = self.match_key(query, language)
+            if entry:
+                self.stats["exact_hits"] += 1
+                return entry, "exact", 1.0
+
+        if embedding is not None and self._embedded:
+            best_entry, best_score = self._nearest(embedding, language)
+            if best_entry and best_score >= self.similarity_threshold:
+                self.stats["embedding_hits"] += 1
+                return best_entry, "embedding", best_score
+
+        self.stats["misses"] += 1
+        return None
+
+    def _nearest(self, embedding: List[float], language: str) -> Tuple[Optional[PackedAnswer], float]:
+        query_vector = _unit_vector([float(value) for value in embedding])
+        if query_vector is None:
+            return None, 0.0
+        if self._matrix is not None:
+            scores = (self._matrix @ np.asarray(query_vector, dtype=np.float32)).tolist()
+        else:
+            scores = [sum(a * b for a, b in zip(entry.embedding, query_vector)) for entry in self._embedded]
+
+        best_entry, best_score = None, 0.0
+        for entry, score in zip(self._embedded, scores):
+            if entry.language == language and score > best_score:
+                best_entry, best_score = entry, score
+        return best_entry, best_score
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get answer pack statistics"""
+        lookups = self.stats["lookups"]
+        hits = self.stats["exact_hits"] + self.stats["embedding_hits"]
+        return {
+            **self.stats,
+            "hit_rate": hits / lookups if lookups else 0.0
+        }
+
+
+def load_questions(path: Path, top: Optional[int] = None) -> List[str]:
+    """
+    Load the questions to prepare answers for
+
+    Accepts a text file (one question per line), a JSON list (strings or {"query"} objects),
+    or a JSONL query log ({"query"} per line). Duplicates (after normalization) are merged
+    and questions are ordered by how often they occur, so top keeps the most common ones.
+    """
+    path = Path(path)
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    stripped = text.lstrip()
+    if path.suffix == ".json" or stripped.startswith("["):
+        items = json.loads(text)
+    elif path.suffix == ".jsonl":
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        items = [line.strip() for line in text.splitlines() if line.strip() and not line.startswith("#")]
+
+    counts: Dict[str, int] = {}
+    first_seen: Dict[str, str] = {}
+    for item in items:
+        question = item.get("query") if isinstance(item, dict) else item
+        if not question:
+            continue
+        key = normalize_query(question)
+        counts[key] = counts.get(key, 0) + 1
+        first_seen.setdefault(key, question)
+
+    ranked = sorted(counts, key=lambda key: counts[key], reverse=True)
+    if top:
+        ranked = ranked[:top]
+    return [first_seen[key] for key in ranked]
+
+
+async def build_answer_pack(rag_engine, questions: List[str], llm_config=None,
+                            similarity_threshold: float = 0.92) -> AnswerPack:
+    """
+    Run the full pipeline (unified query processing, hybrid retrieval, reranking,
+    summarization) for each question and collect the answers into a pack
+
+    Args:
+        rag_engine: Initialized EnhancedRagQuery of the game (summarization enabled)
+        questions: Questions to prepare
+        llm_config: LLM settings for unified query processing
+        similarity_threshold: Stored with the pack for query-time matching
+
+    Returns:
+        AnswerPack with one entry per successfully answered question
+    """
+    from .unified_query_processor import process_query_unified_async
+
+    chunks_by_id = {chunk.get("chunk_id"): chunk for chunk in rag_engine.metadata or []}
+    entries = []
+    for number, question in enumerate(questions, 1):
+        print(f"📝 [{number}/{len(questions)}] {question}")
+        unified_result = await process_query_unified_async(question, llm_config=llm_config)
+        if unified_result.intent != "guide":
+            print(f"   ⏭️ Skipped: intent is {unified_result.intent}")
+            continue
+
+        retrieval_query = unified_result.rewritten_query or unified_result.translated_query or question
+        answer = [chunk async for chunk in rag_engine.query_stream(
+            question=retrieval_query,
+            original_query=question,
+            unified_query_result=unified_result,
+            use_answer_pack=False
+        )]
+        info = rag_engine.last_answer_info
+        if not answer or not info or not info.get("succeeded"):
+            print("   ❌ Skipped: no complete answer")
+            continue
+
+        sources = [
+            {"chunk_id": chunk_id, "fingerprint": chunk_fingerprint(chunks_by_id[chunk_id])}
+            for chunk_id in info["chunk_ids"] if chunk_id in chunks_by_id
+        ]
+        if len(sources) != len(info["chunk_ids"]):
+            print("   ❌ Skipped: source chunks not found in metadata")
+            continue
+
+        embedding = None
+        if rag_engine.google_api_key:
+            try:
+                embedding = _unit_vector([float(value) for value in rag_engine._embed_query(retrieval_query)])
+            except Exception as e:
+                logger.warning(f"Embedding failed, entry will only match by key: {e}")
+
+        entries.append(PackedAnswer(
+            question=question,
+            key=normalize_query(question),
+            language=info["language"],
+            model=info["model"],
+            answer=answer,
+            sources=sources,
+            embedding=embedding
+        ))
+        print(f"   ✅ {sum(len(chunk) for chunk in answer)} characters from {len(sources)} chunks")
+
+    return AnswerPack(entries, similarity_threshold=similarity_threshold)
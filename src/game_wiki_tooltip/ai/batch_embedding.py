@@ -323,6 +323,13 @@ class BatchEmbeddingProcessor:
         with open(metadata_path, 'w', encoding='utf-8') as f:
             json.dump(all_metadatas, f, ensure_ascii=False, indent=2)
         
+        # Precompute intent relevance features (chunks × intents) for reranking
+        try:
+            from .intent_aware_reranker import save_intent_features
+            save_intent_features(index_path, all_metadatas)
+        except Exception as e:
+            logger.warning(f"Failed to build intent features, reranker will compute them at load time: {e}", exc_info=True)
+        
         # Build enhanced BM25 index
         logger.info("Building enhanced BM25 index...")
         try:
@@ -368,6 +375,16 @@ class BatchEmbeddingProcessor:
         with open(config_path, 'w', encoding='utf-8') as f:
             json.dump(config, f, ensure_ascii=False, indent=2)
         
+        # Single-file memory-mapped bundle for fast cold start (falls back to the files above when missing)
+        try:
+            from .index_bundle import write_index_bundle
+            write_index_bundle(index_path, config)
+        except Exception as e:
+            logger.warning(f"Failed to build index bundle, the index files will be loaded individually: {e}")
+            # The previous bundle describes the old index, never serve it after a rebuild
+            from .index_bundle import remove_index_bundle
+            remove_index_bundle(index_path)
+        
         logger.info(f"FAISS index built, saved to: {index_path}")
         return str(config_path)
     
@@ -428,12 +445,13 @@ class BatchEmbeddingProcessor:
             logger.error(f"Metadata file not found: {metadata_path}")
             raise FileNotFoundError(f"Metadata file not found: {metadata_path}")
         
-        with open(metadata_path, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
+        from .chunk_store import load_chunk_store
+        chunk_store = load_chunk_store(index_path)
         
         return {
             "index_path": str(index_path),
-            "metadata": metadata,
+            "metadata": chunk_store.rows,
+            "chunk_store": chunk_store,
             "config": config
         }
 
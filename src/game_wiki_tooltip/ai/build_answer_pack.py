@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Answer Pack Building Tool
+=========================
+
+Command-line tool that prepares offline answers for a game's most common questions.
+Each question runs through the full pipeline (unified query processing, hybrid
+retrieval, reranking, Gemini summary); answers are stored with their source chunk
+IDs in answer_pack.json next to the game's vectors. Run it again after rebuilding
+the vector index: answers whose source chunks changed are ignored at load time.
+
+Usage:
+    python build_answer_pack.py --game helldiver2 --questions data/faq/helldiver2.txt
+    python build_answer_pack.py --game dst --questions query_log.jsonl --top 50
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+
+# Add project root directory to Python path
+project_root = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(project_root))
+
+from src.game_wiki_tooltip.ai.answer_pack import build_answer_pack, load_questions
+from src.game_wiki_tooltip.ai.rag_config import LLMSettings, get_default_config
+from src.game_wiki_tooltip.ai.rag_query import EnhancedRagQuery
+
+
+def setup_logging(verbose: bool = False):
+    """Set up logging configuration"""
+    level = logging.DEBUG if verbose else logging.INFO
+    logging.basicConfig(
+        level=level,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+
+
+async def build_for_game(game_name: str, questions_path: str, top: int = None,
+                         output_dir: str = None) -> bool:
+    """
+    Build the answer pack of a single game
+
+    Args:
+        game_name: Game name (vector store name without the _vectors suffix)
+        questions_path: FAQ file or query log
+        top: Only prepare the N most common questions
+        output_dir: Directory to write answer_pack.json to (defaults to the game's vector index directory)
+
+    Returns:
+        Success or failure
+    """
+    api_key = os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY")
+    if not api_key:
+        print("Error: GOOGLE_API_KEY or GEMINI_API_KEY environment variable is required")
+        return False
+
+    questions = load_questions(Path(questions_path), top=top)
+    if not questions:
+        print(f"No questions found in {questions_path}")
+        return False
+    print(f"Preparing {len(questions)} answers for {game_name}")
+
+    rag_config = get_default_config()
+    rag_config.summarization.api_key = api_key
+    engine = EnhancedRagQuery(
+        enable_hybrid_search=True,
+        enable_summarization=True,
+        enable_intent_reranking=True,
+        google_api_key=api_key,
+        rag_config=rag_config
+    )
+    await engine.initialize(game_name)
+
+    llm_config = LLMSettings(model='gemini-2.5-flash-lite', api_key=api_key)
+    pack = await build_answer_pack(engine, questions, llm_config=llm_config,
+                                   similarity_threshold=engine.answer_pack_similarity)
+    if not pack.entries:
+        print("✗ No answers prepared")
+        return False
+
+    index_dir = Path(output_dir) if output_dir else Path(engine.vector_store_path).parent / Path(engine.config["index_path"]).name
+    pack_path = pack.save(index_dir, game_name=game_name)
+    print(f"✓ Answer pack written: {pack_path} ({len(pack.entries)}/{len(questions)} questions)")
+    return True
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description="Prepare offline answers for a game's most common questions",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # FAQ file, one question per line
+  python build_answer_pack.py --game helldiver2 --questions data/faq/helldiver2.txt
+
+  # Query log (JSONL with a "query" field), 50 most common questions
+  python build_answer_pack.py --game dst --questions query_log.jsonl --top 50
+        """
+    )
+
+    parser.add_argument(
+        "--game",
+        type=str,
+        required=True,
+        help="Game name (e.g. helldiver2)"
+    )
+
+    parser.add_argument(
+        "--questions",
+        type=str,
+        required=True,
+        help="FAQ file (.txt, one question per line), JSON list or JSONL query log"
+    )
+
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=None,
+        help="Only prepare the N most common questions"
+    )
+
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        default=None,
+        help="Output directory (default: the game's vector index directory)"
+    )
+
+    parser.add_argument(
+        "--verbose", "-v",
+        action="store_true",
+        help="Verbose output"
+    )
+
+    args = parser.parse_args()
+
+    setup_logging(args.verbose)
+
+    success = asyncio.run(build_for_game(args.game, args.questions, args.top, args.output_dir))
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
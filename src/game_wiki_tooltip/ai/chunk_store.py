@@ -0,0 +1,212 @@
+"""
+Chunk Store Module
+==================
+
+Features:
+1. One in-memory copy of a game's knowledge chunks (metadata.json), addressed by row ID
+   (the FAISS vector ID and the BM25 document index are both the metadata row)
+2. Process-wide registry: the vector store loader, EnhancedRagQuery and the BM25 indexer
+   all reference the same store instead of each holding their own chunk dicts
+3. Stores are released once no engine references them (weak registry), and a rebuilt
+   metadata.json is loaded fresh
+4. BlobChunkStore: rows kept as a row-addressed JSON blob (index bundle) and decoded on
+   first access, so loading does not parse every chunk
+"""
+
+import json
+import logging
+import threading
+import weakref
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+METADATA_FILENAME = "metadata.json"
+
+
+class ChunkStore:
+    """Knowledge chunks of one vector index, addressed by row ID"""
+
+    def __init__(self, chunks: List[Dict[str, Any]], path: Optional[Path] = None):
+        """
+        Initialize the store
+
+        Args:
+            chunks: Chunk dicts in metadata.json order (row ID = list index)
+            path: metadata.json the chunks were loaded from
+        """
+        self._rows = chunks
+        self.path = path
+        self._row_by_chunk_id: Optional[Dict[str, int]] = None
+
+    @property
+    def rows(self) -> List[Dict[str, Any]]:
+        """All chunks as a list (row ID = list index)"""
+        return self._rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, row_id: int) -> Dict[str, Any]:
+        return self._rows[row_id]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self._rows)
+
+    def get(self, row_id: int) -> Optional[Dict[str, Any]]:
+        """Chunk at row_id, None when out of range"""
+        if 0 <= row_id < len(self):
+            return self[row_id]
+        return None
+
+    def row_of(self, chunk_id: str) -> Optional[int]:
+        """Row ID of a chunk_id, first row when the ID repeats (index built on first use)"""
+        if self._row_by_chunk_id is None:
+            self._row_by_chunk_id = {}
+            for row, chunk in enumerate(self):
+                if chunk.get("chunk_id") is not None:
+                    self._row_by_chunk_id.setdefault(chunk["chunk_id"], row)
+        return self._row_by_chunk_id.get(chunk_id)
+
+
+class BlobChunkStore(ChunkStore):
+    """Chunk store over a row-addressed JSON blob, each row decoded on first access"""
+
+    def __init__(self, offsets: Sequence[int], blob: Any, path: Optional[Path] = None):
+        """
+        Initialize the store
+
+        Args:
+            offsets: Row boundaries in blob (len = rows + 1), row i is blob[offsets[i]:offsets[i + 1]]
+            blob: Buffer of concatenated compact JSON objects (e.g. a memoryview of a mapped file)
+            path: File the blob belongs to
+        """
+        super().__init__([None] * (len(offsets) - 1), path=path)
+        self._offsets = offsets
+        self._blob = blob
+        self._decoded = 0
+        self._decode_lock = threading.Lock()
+
+    @property
+    def rows(self) -> List[Dict[str, Any]]:
+        """All chunks as a list, decoding the rows not accessed yet"""
+        if self._decoded < len(self._rows):
+            for row_id in range(len(self._rows)):
+                self[row_id]
+        return self._rows
+
+    def __getitem__(self, row_id: int) -> Dict[str, Any]:
+        chunk = self._rows[row_id]
+        if chunk is None:
+            row_id = range(len(self._rows))[row_id]
+            start, end = int(self._offsets[row_id]), int(self._offsets[row_id + 1])
+            decoded = json.loads(bytes(self._blob[start:end]).decode("utf-8"))
+            with self._decode_lock:
+                chunk = self._rows[row_id]
+                if chunk is None:
+                    self._rows[row_id] = chunk = decoded
+                    self._decoded += 1
+        return chunk
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for row_id in range(len(self._rows)):
+            yield self[row_id]
+
+
+def encode_chunk_blob(chunks: Sequence[Dict[str, Any]]) -> Tuple[List[int], bytes]:
+    """Encode chunks as (row offsets, blob) for BlobChunkStore"""
+    offsets = [0]
+    parts = []
+    for chunk in chunks:
+        data = json.dumps(chunk, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        parts.append(data)
+        offsets.append(offsets[-1] + len(data))
+    return offsets, b"".join(parts)
+
+
+_stores: "weakref.WeakValueDictionary[Tuple[str, int, int], ChunkStore]" = weakref.WeakValueDictionary()
+_stores_lock = threading.Lock()
+
+
+def load_chunk_store(index_dir: Path) -> ChunkStore:
+    """
+    Get the chunk store of a vector index, loading metadata.json only if no live store exists
+
+    The registry key includes the file's size and modification time, so a rebuilt index
+    gets a new store while engines still using the old one keep it.
+
+    Args:
+        index_dir: Vector index directory (contains metadata.json)
+
+    Returns:
+        Shared ChunkStore
+
+    Raises:
+        FileNotFoundError: When metadata.json does not exist
+    """
+    metadata_path = (Path(index_dir) / METADATA_FILENAME).resolve()
+    stat = metadata_path.stat()
+    key = (str(metadata_path), stat.st_size, stat.st_mtime_ns)
+
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is not None:
+            return store
+        with open(metadata_path, "r", encoding="utf-8") as f:
+            store = ChunkStore(json.load(f), path=metadata_path)
+        _stores[key] = store
+
+    logger.info(f"Chunk store loaded: {metadata_path} ({len(store)} chunks)")
+    return store
+
+
+def get_chunk_store_stats() -> Dict[str, Any]:
+    """Live chunk stores (one per loaded game index)"""
+    with _stores_lock:
+        return {
+            "stores": len(_stores),
+            "chunks": {key[0]: len(store) for key, store in _stores.items()}
+        }
+
+
+if __name__ == "__main__":
+    # Per-game heap of the chunk copies, before (metadata.json + pickled BM25 documents)
+    # and after (one shared store): python -m ...chunk_store <index_dir>
+    import gc
+    import pickle
+    import sys
+    import tracemalloc
+
+    if len(sys.argv) < 2:
+        print("Usage: chunk_store.py <index_dir>")
+        sys.exit(1)
+    index_dir = Path(sys.argv[1])
+    bm25_path = next(index_dir.glob("*.pkl"))
+
+    def measure(load) -> int:
+        gc.collect()
+        tracemalloc.start()
+        _ = load()  # Keep the loaded data alive while measuring
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return size
+
+    def load_before():
+        with open(index_dir / METADATA_FILENAME, "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        with open(bm25_path, "rb") as f:
+            bm25_data = pickle.load(f)
+        return metadata, bm25_data
+
+    def load_after():
+        store = load_chunk_store(index_dir)
+        with open(bm25_path, "rb") as f:
+            bm25_data = pickle.load(f)
+        bm25_data["documents"] = store
+        return store, bm25_data
+
+    before = measure(load_before)
+    after = measure(load_after)
+    print(f"{index_dir.name}: before {before / 1e6:.2f} MB, after {after / 1e6:.2f} MB "
+          f"({(before - after) / before:.0%} less)")
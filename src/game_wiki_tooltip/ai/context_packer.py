@@ -0,0 +1,313 @@
+"""
+Context Packer Module
+=====================
+
+Features:
+1. Packs retrieved knowledge chunks into an explicit prompt token budget
+2. Compact JSON serialization (no indentation, minimal separators)
+3. Fields ranked by relevance to the detected query intent; fields that do not fit are left out
+4. Summaries truncated to a fixed length, lowest-score chunks dropped first
+5. Packed/raw token reporting per query
+6. Optional plain-text rendering, with tokens estimated on the rendered text instead of JSON
+"""
+
+import json
+import logging
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Compact JSON: no whitespace after separators
+COMPACT_SEPARATORS = (",", ":")
+
+# Fields never sent to the LLM (internal IDs, and video fields that are rendered separately)
+EXCLUDED_FIELDS = {
+    "chunk_id", "_internal_id", "_vector_id", "_index_id",
+    "video_url", "video_title"
+}
+
+# Fields every packed chunk starts with (default, see ContextPacker core_fields)
+CORE_FIELDS = ("topic", "title", "type", "score")
+
+# Blank line between rendered items
+RENDERED_SEPARATOR = "\n\n"
+
+# Field that is truncated to summary_max_chars
+SUMMARY_FIELD = "summary"
+
+# Optional fields in order of relevance per intent (values of intent_aware_reranker.QueryIntent)
+INTENT_FIELD_PRIORITY: Dict[str, List[str]] = {
+    "build": ["build", "build_details", "structured_data", "data", "keywords"],
+    "recommendation": ["structured_data", "build", "build_details", "data", "keywords"],
+    "strategy": ["structured_data", "data", "build", "keywords"],
+    "comparison": ["structured_data", "data", "keywords", "build"],
+    "unlock": ["data", "structured_data", "keywords"],
+    "location": ["data", "structured_data", "keywords"],
+    "explanation": ["data", "structured_data", "keywords"],
+}
+DEFAULT_FIELD_PRIORITY = ["structured_data", "data", "build", "build_details", "keywords"]
+
+# Fields ranked after everything else
+LOW_PRIORITY_FIELDS = ["timestamp", "source", "url"]
+
+_CJK_RE = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯＀-￯]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of text without calling the tokenizer API
+
+    CJK characters count as one token each, everything else as four characters per token.
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def compact_dumps(value: Any) -> str:
+    """Serialize value as compact JSON"""
+    return json.dumps(value, ensure_ascii=False, separators=COMPACT_SEPARATORS)
+
+
+def truncate_text(text: str, max_chars: int) -> str:
+    """Cut text to max_chars, preferring a sentence or word boundary"""
+    if max_chars <= 0 or len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    boundary = max(cut.rfind(mark) for mark in (". ", "。", "！", "？", "! ", "? "))
+    if boundary >= max_chars // 2:
+        return cut[:boundary + 1].rstrip()
+    space = cut.rfind(" ")
+    if space >= max_chars // 2:
+        cut = cut[:space]
+    return cut.rstrip() + "…"
+
+
+@dataclass
+class PackedContext:
+    """Result of packing chunks into a token budget"""
+    text: str
+    items: List[Dict[str, Any]]
+    tokens: int
+    raw_tokens: int
+    budget: int
+    dropped: List[str] = field(default_factory=list)
+    omitted_fields: List[str] = field(default_factory=list)
+    truncated_summaries: int = 0
+
+    def to_stats(self) -> Dict[str, Any]:
+        return {
+            "packed_tokens": self.tokens,
+            "raw_tokens": self.raw_tokens,
+            "budget": self.budget,
+            "chunks": len(self.items),
+            "dropped": self.dropped,
+            "omitted_fields": self.omitted_fields,
+            "truncated_summaries": self.truncated_summaries
+        }
+
+
+class ContextPacker:
+    """Fits retrieved chunks into a token budget for the answer prompt"""
+
+    def __init__(self, token_budget: int = 2000, summary_max_chars: int = 600,
+                 core_fields: Tuple[str, ...] = CORE_FIELDS):
+        """
+        Initialize the packer
+
+        Args:
+            token_budget: Maximum estimated tokens of the packed context
+            summary_max_chars: Summaries longer than this are truncated
+            core_fields: Fields every packed chunk starts with, never dropped individually
+        """
+        self.token_budget = token_budget
+        self.summary_max_chars = summary_max_chars
+        self.core_fields = tuple(core_fields)
+        self.stats = {
+            "packs": 0,
+            "packed_tokens": 0,
+            "raw_tokens": 0,
+            "dropped_chunks": 0,
+            "omitted_fields": 0
+        }
+
+    def pack(self, chunks: List[Dict[str, Any]], intent: Optional[str] = None,
+             render: Optional[Callable[[Dict[str, Any]], str]] = None) -> PackedContext:
+        """
+        Pack chunks into the token budget
+
+        Chunks keep their input order. Each chunk first gets its core fields and
+        truncated summary; while that does not fit, the lowest-score chunk is dropped
+        (one chunk is always kept). Remaining budget is then spent on optional fields in
+        intent order, highest-score chunks first. Dict fields that do not fit whole are
+        added key by key.
+
+        Without render the context is compact JSON. With render every item is rendered
+        to text, the token estimates are taken on that text, and text is the rendered
+        items joined by blank lines.
+
+        Args:
+            chunks: Chunks in rank order, optionally carrying a "score" field
+            intent: Detected query intent (QueryIntent value), None for the default ranking
+            render: Optional item -> text renderer used for the prompt instead of JSON
+
+        Returns:
+            PackedContext
+        """
+        if render:
+            raw_tokens = estimate_tokens(RENDERED_SEPARATOR.join(render(chunk) for chunk in chunks))
+        else:
+            raw_tokens = estimate_tokens(json.dumps(chunks, ensure_ascii=False, indent=2, default=str))
+
+        def item_tokens(item: Dict[str, Any]) -> int:
+            return estimate_tokens(render(item) if render else compact_dumps(item))
+
+        bases: List[Dict[str, Any]] = []
+        truncated = 0
+        for chunk in chunks:
+            base, was_truncated = self._base_item(chunk)
+            bases.append(base)
+            truncated += was_truncated
+
+        # Rank by score (higher first); unscored chunks keep their rank order
+        def score_of(index: int) -> float:
+            score = chunks[index].get("score")
+            return float(score) if isinstance(score, (int, float)) else -float(index)
+        by_score = sorted(range(len(chunks)), key=score_of, reverse=True)
+
+        kept = set(range(len(chunks)))
+        dropped: List[str] = []
+        # JSON: "[]" plus one comma per item; rendered: one separator per item
+        used = (0 if render else 1) + sum(item_tokens(bases[i]) for i in kept) + max(len(kept) - 1, 0)
+        for index in reversed(by_score):
+            if used <= self.token_budget or len(kept) <= 1:
+                break
+            kept.discard(index)
+            used -= item_tokens(bases[index]) + 1
+            dropped.append(self._label(chunks[index], index))
+
+        omitted: List[str] = []
+        for index in by_score:
+            if index not in kept:
+                continue
+            for name in self._ranked_fields(chunks[index], intent):
+                value = chunks[index][name]
+                if render:
+                    cost = item_tokens({**bases[index], name: value}) - item_tokens(bases[index])
+                else:
+                    cost = estimate_tokens(compact_dumps({name: value})) - 1
+                if used + cost <= self.token_budget:
+                    bases[index][name] = value
+                    used += cost
+                    continue
+                if isinstance(value, dict) and not render:
+                    partial, cost = self._fit_dict(name, value, self.token_budget - used)
+                    if partial:
+                        bases[index][name] = partial
+                        used += cost
+                        omitted.append(f"{self._label(chunks[index], index)}.{name} (partial)")
+                        continue
+                omitted.append(f"{self._label(chunks[index], index)}.{name}")
+
+        items = [bases[i] for i in range(len(chunks)) if i in kept]
+        text = RENDERED_SEPARATOR.join(render(item) for item in items) if render else compact_dumps(items)
+        packed = PackedContext(
+            text=text,
+            items=items,
+            tokens=estimate_tokens(text),
+            raw_tokens=raw_tokens,
+            budget=self.token_budget,
+            dropped=dropped,
+            omitted_fields=omitted,
+            truncated_summaries=truncated
+        )
+
+        self.stats["packs"] += 1
+        self.stats["packed_tokens"] += packed.tokens
+        self.stats["raw_tokens"] += raw_tokens
+        self.stats["dropped_chunks"] += len(dropped)
+        self.stats["omitted_fields"] += len(omitted)
+        return packed
+
+    def _base_item(self, chunk: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """Core fields plus the truncated summary"""
+        base: Dict[str, Any] = {}
+        for name in self.core_fields:
+            if name in chunk and chunk[name] is not None:
+                value = chunk[name]
+                base[name] = round(float(value), 3) if name == "score" and isinstance(value, (int, float)) else value
+        truncated = False
+        summary = chunk.get(SUMMARY_FIELD)
+        if isinstance(summary, str) and summary:
+            short = truncate_text(summary, self.summary_max_chars)
+            truncated = short != summary
+            base[SUMMARY_FIELD] = short
+        return base, truncated
+
+    def _ranked_fields(self, chunk: Dict[str, Any], intent: Optional[str]) -> List[str]:
+        """Optional fields of chunk, most relevant to the intent first"""
+        priority = INTENT_FIELD_PRIORITY.get(intent or "", DEFAULT_FIELD_PRIORITY)
+        skip = EXCLUDED_FIELDS | set(self.core_fields) | {SUMMARY_FIELD}
+        present = [name for name in chunk if name not in skip and chunk[name] not in (None, "", [], {})]
+        rank = {name: position for position, name in enumerate(priority)}
+        low = {name: position for position, name in enumerate(LOW_PRIORITY_FIELDS)}
+        # Intent fields first, then unlisted fields in chunk order, low-priority fields last
+        return sorted(
+            present,
+            key=lambda name: (
+                0 if name in rank else (2 if name in low else 1),
+                rank.get(name, low.get(name, 0))
+            )
+        )
+
+    @staticmethod
+    def _fit_dict(name: str, value: Dict[str, Any], remaining: int) -> Tuple[Dict[str, Any], int]:
+        """Take as many keys of a dict field as fit in the remaining budget"""
+        # Key, braces and the separating comma
+        used = estimate_tokens(compact_dumps({name: {}}))
+        partial: Dict[str, Any] = {}
+        for key, item in value.items():
+            cost = estimate_tokens(compact_dumps({key: item}))
+            if used + cost <= remaining:
+                partial[key] = item
+                used += cost
+        return partial, used
+
+    @staticmethod
+    def _label(chunk: Dict[str, Any], index: int) -> str:
+        return str(chunk.get("topic") or chunk.get("title") or f"chunk {index + 1}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cumulative packing statistics"""
+        packs = self.stats["packs"]
+        return {
+            **self.stats,
+            "token_budget": self.token_budget,
+            "avg_packed_tokens": self.stats["packed_tokens"] / packs if packs else 0.0,
+            "compression_ratio": (self.stats["packed_tokens"] / self.stats["raw_tokens"]
+                                  if self.stats["raw_tokens"] else 0.0)
+        }
+
+
+if __name__ == "__main__":
+    # Packed vs raw token size on a real metadata file: python -m ...context_packer <metadata.json> [budget]
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: context_packer.py <metadata.json> [token_budget]")
+        sys.exit(1)
+
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        metadata = json.load(f)
+    budget = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    for intent in [None, "build", "strategy"]:
+        packer = ContextPacker(token_budget=budget)
+        for start in range(0, min(len(metadata), 30), 3):
+            sample = [dict(chunk, score=1.0 - i * 0.1) for i, chunk in enumerate(metadata[start:start + 3])]
+            packer.pack(sample, intent=intent)
+        print(f"intent={intent}: {packer.get_stats()}")
@@ -12,6 +12,7 @@ Features:
 import jieba
 import pickle
 import re
+import time
 import logging
 from typing import List, Dict, Any, Optional, Set
 from pathlib import Path
@@ -35,6 +36,15 @@ class BM25UnavailableError(Exception):
     """BM25 functionality unavailable error"""
     pass
 
+
+def warm_up_tokenizer() -> None:
+    """Load the jieba dictionary now instead of on the first Chinese query (jieba loads it lazily)"""
+    if jieba.dt.initialized:
+        return
+    start = time.time()
+    jieba.initialize()
+    logger.info(f"jieba dictionary loaded in {time.time() - start:.2f}s")
+
 class EnhancedBM25Indexer:
     """Simplified BM25 indexer, focused on efficient retrieval, query optimization by LLM"""
     
@@ -52,6 +62,8 @@ class EnhancedBM25Indexer:
         self.game_name = game_name
         self.bm25 = None
         self.documents = []
+        self._corpus_tokens = []
+        self._corpus_tokens_loader = None  # Decodes corpus_tokens on first access (index bundle)
         
         if not BM25_AVAILABLE:
             error_msg = t("bm25_package_unavailable", error=BM25_IMPORT_ERROR)
@@ -65,6 +77,19 @@ class EnhancedBM25Indexer:
         self.stop_words = self._load_stop_words(stop_words)
         logger.info(f"BM25 indexer initialized successfully - game: {game_name}")
 
+    @property
+    def corpus_tokens(self) -> List[List[str]]:
+        """Tokenized documents (only needed to rebuild the index or derive the vocabulary)"""
+        if self._corpus_tokens_loader is not None:
+            self._corpus_tokens = self._corpus_tokens_loader()
+            self._corpus_tokens_loader = None
+        return self._corpus_tokens
+
+    @corpus_tokens.setter
+    def corpus_tokens(self, value: List[List[str]]) -> None:
+        self._corpus_tokens = value
+        self._corpus_tokens_loader = None
+
     def _load_stop_words(self, stop_words: Optional[List[str]] = None) -> Set[str]:
         """Load stop words, but keep important tactical terms"""
         default_stop_words = {
@@ -379,6 +404,7 @@ class EnhancedBM25Indexer:
                         "chunk": chunk,
                         "score": float(score),
                         "rank": i + 1,
+                        "row_id": int(idx),  # Documents are indexed in metadata.json order
                         "match_info": match_info
                     }
                     results.append(result)
@@ -470,7 +496,7 @@ class EnhancedBM25Indexer:
             
             # Save additional data (documents and stop words)
             additional_data = {
-                'documents': self.documents,
+                'documents': list(self.documents),
                 'stop_words': list(self.stop_words),
                 'corpus_tokens': getattr(self, 'corpus_tokens', [])
             }
@@ -485,10 +511,27 @@ class EnhancedBM25Indexer:
             logger.error(error_msg)
             raise BM25UnavailableError(error_msg)
     
-    def load_index(self, path: str) -> None:
+    @staticmethod
+    def _rows_match(chunk_store, documents: List[Dict[str, Any]]) -> bool:
+        """Cheap identity check: same row count and same chunk_id at the first and last rows"""
+        if len(chunk_store) != len(documents):
+            return False
+        if not documents:
+            return True
+        return all(
+            chunk_store[row].get("chunk_id") == documents[row].get("chunk_id")
+            for row in (0, len(documents) - 1)
+        )
+    
+    def load_index(self, path: str, chunk_store=None) -> None:
         """
         Load simplified BM25 index
         
+        Args:
+            path: Index pickle path
+            chunk_store: Shared ChunkStore of the same vector index; when its rows line up with
+                the pickled documents, the store is used and the pickled copy is dropped
+        
         Raises:
             BM25UnavailableError: When BM25 functionality is unavailable
         """
@@ -503,6 +546,16 @@ class EnhancedBM25Indexer:
                 data = pickle.load(f)
                 
             self.documents = data['documents']
+            if chunk_store is not None:
+                if self._rows_match(chunk_store, self.documents):
+                    # Same rows (documents are indexed in metadata.json order), keep one copy
+                    self.documents = chunk_store
+                else:
+                    logger.warning(
+                        f"BM25 documents ({len(self.documents)}) do not match chunk store "
+                        f"({len(chunk_store)}), keeping the pickled documents"
+                    )
+            del data['documents']
             self.stop_words = set(data.get('stop_words', []))
             self.corpus_tokens = data.get('corpus_tokens', [])
             
@@ -528,6 +581,51 @@ class EnhancedBM25Indexer:
             logger.error(error_msg)
             raise BM25UnavailableError(error_msg)
     
+    def load_from_bundle(self, bundle, chunk_store) -> None:
+        """
+        Load the BM25 index from a memory-mapped index bundle (see index_bundle)
+        
+        The CSC score arrays stay zero-copy views of the mapping; documents come from the
+        bundle's chunk store and corpus tokens are decoded on first access.
+        
+        Raises:
+            BM25UnavailableError: When BM25 functionality is unavailable or the bundle has no BM25 sections
+        """
+        if not BM25_AVAILABLE:
+            error_msg = t("bm25_package_unavailable", error=BM25_IMPORT_ERROR)
+            logger.error(error_msg)
+            raise BM25UnavailableError(error_msg)
+        
+        try:
+            # Same steps as bm25s.BM25.load, with the arrays taken from the bundle
+            params = dict(bundle.json("bm25.params"))
+            original_version = params.pop("version", None)
+            num_docs = params.pop("num_docs", None)
+            bm25 = bm25s.BM25(**params)
+            bm25.vocab_dict = bundle.json("bm25.vocab")
+            bm25._original_version = original_version
+            bm25.unique_token_ids_set = set(bm25.vocab_dict.values())
+            bm25.scores = {
+                "data": bundle.array("bm25.data"),
+                "indices": bundle.array("bm25.indices"),
+                "indptr": bundle.array("bm25.indptr"),
+                "num_docs": num_docs,
+            }
+            bm25.nonoccurrence_array = (
+                bundle.array("bm25.nonoccurrence") if bundle.has("bm25.nonoccurrence") else None
+            )
+            
+            self.bm25 = bm25
+            self.documents = chunk_store
+            self.stop_words = set(bundle.json("bm25.stop_words"))
+            self._corpus_tokens_loader = lambda: bundle.json("bm25.corpus_tokens")
+            logger.info(f"Simplified BM25 index loaded from bundle: {bundle.path}")
+            
+        except Exception as e:
+            error_msg = t("bm25_load_failed", error=str(e))
+            logger.error(error_msg)
+            raise BM25UnavailableError(error_msg)
+    
     def get_stats(self) -> Dict[str, Any]:
         """
         Get enhanced index statistics
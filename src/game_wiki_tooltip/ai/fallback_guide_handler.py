@@ -7,11 +7,14 @@ this module uses Google Search grounding to provide answers with proper citation
 """
 
 import os
+import time
 import logging
 import asyncio
 from typing import Optional, AsyncGenerator
 from dataclasses import dataclass
 
+from src.game_wiki_tooltip.core.cancellation import await_cancellable, is_cancel_requested
+
 logger = logging.getLogger(__name__)
 
 
@@ -38,16 +41,22 @@ class FallbackGuideHandler:
         query: str,
         game_context: Optional[str] = None,
         language: str = "auto",
-        original_query: Optional[str] = None
+        original_query: Optional[str] = None,
+        stop_flag=None
     ) -> AsyncGenerator[str, None]:
         """
         Generate guide response with Google Search grounding
         
+        Text deltas are forwarded as they arrive; grounding citations are only
+        complete on the final chunk, so they are appended after the stream ends.
+        
         Args:
             query: User query (processed/translated)
             game_context: Game name or context
             language: Response language (auto/zh/en)
             original_query: Original user query for better context
+            stop_flag: Optional CancellationToken or callable; the request and every chunk read are
+                cancelled as soon as it fires
             
         Yields:
             Streaming response chunks with warnings and citations
@@ -60,11 +69,12 @@ class FallbackGuideHandler:
             logger.debug(f"Original query: {original_query}")
             
             # Import here to avoid startup delays
-            from google import genai
             from google.genai import types
             
-            # Configure the client
-            client = genai.Client(api_key=self.config.api_key)
+            from .gemini_client_registry import get_gemini_aio_client
+            
+            # Async client of the running loop: reuses its pooled connection across requests on that loop
+            aio = get_gemini_aio_client(self.config.api_key)
             
             # Define the grounding tool
             grounding_tool = types.Tool(
@@ -93,26 +103,62 @@ class FallbackGuideHandler:
             logger.debug(f"System instruction length: {len(system_instruction)} chars")
             logger.debug(f"User prompt length: {len(user_prompt)} chars")
             
-            # Generate complete response using standard API
-            response = client.models.generate_content(
-                model=self.config.model_name,
-                contents=user_prompt,
-                config=config
-            )
+            # Stream the response with the async API so the event loop is not blocked
+            start_time = time.perf_counter()
+            try:
+                # Waiting for the first response can take seconds, a stop must not wait for it
+                stream = await await_cancellable(
+                    aio.models.generate_content_stream(
+                        model=self.config.model_name,
+                        contents=user_prompt,
+                        config=config
+                    ),
+                    stop_flag
+                )
+            except asyncio.CancelledError:
+                if not is_cancel_requested(stop_flag):
+                    raise
+                logger.info("🛑 Fallback guide stopped before the stream started")
+                return
             
-            logger.debug(f"Received complete response from Gemini")
+            # Grounding metadata arrives with the last chunks, keep the latest one carrying it
+            grounded_chunk = None
+            text_length = 0
+            try:
+                while True:
+                    try:
+                        chunk = await await_cancellable(stream.__anext__(), stop_flag)
+                    except StopAsyncIteration:
+                        break
+                    except asyncio.CancelledError:
+                        if not is_cancel_requested(stop_flag):
+                            raise
+                        logger.info("🛑 Fallback guide stream stopped")
+                        return
+                    if self._has_grounding_metadata(chunk):
+                        grounded_chunk = chunk
+                    if chunk.text:
+                        if text_length == 0:
+                            logger.info(f"Fallback guide first token after {time.perf_counter() - start_time:.3f}s")
+                        text_length += len(chunk.text)
+                        yield chunk.text
+            finally:
+                aclose = getattr(stream, "aclose", None)
+                if aclose:
+                    try:
+                        await aclose()
+                    except Exception as e:
+                        logger.debug(f"Closing fallback stream failed: {e}")
             
-            # Get main response text
-            main_text = response.text if response.text else ""
-            logger.debug(f"Main response length: {len(main_text)} characters")
+            logger.debug(f"Fallback stream completed: {text_length} characters in {time.perf_counter() - start_time:.3f}s")
             
-            # Yield the main content
-            if main_text:
-                yield main_text
+            if grounded_chunk is None:
+                logger.debug("No grounding metadata in stream")
+                return
             
             # Try to extract and append real citations from grounding metadata
             try:
-                citations_text = self._extract_grounding_citations(response, language)
+                citations_text = self._extract_grounding_citations(grounded_chunk, language)
                 if citations_text:
                     logger.debug("Found grounding citations, appending to output")
                     yield citations_text
@@ -228,6 +274,11 @@ Answer in the same language as the user's query, focusing on methodology and ope
         chinese_chars = sum(1 for char in text if '\u4e00' <= char <= '\u9fff')
         return chinese_chars > len(text) * 0.3
     
+    @staticmethod
+    def _has_grounding_metadata(response) -> bool:
+        candidates = getattr(response, 'candidates', None)
+        return bool(candidates and getattr(candidates[0], 'grounding_metadata', None))
+    
     def _extract_grounding_citations(self, response, language: str) -> Optional[str]:
         """Extract real citations from Google Search grounding metadata"""
         try:
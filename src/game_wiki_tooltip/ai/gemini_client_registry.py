@@ -0,0 +1,199 @@
+"""
+Gemini Client Registry Module
+=============================
+
+Features:
+1. One process-wide genai.Client per (api_key, base_url), shared by the summarizer,
+   fallback guide handler, embedding client and unified query processor
+2. Each client keeps its HTTP connection pool alive, so only the first request
+   pays the TLS handshake and connection setup
+3. Async API client for the shared query loop (kept per event loop, since an async
+   connection pool is bound to the loop it was opened on)
+4. Background warm-up of one connection per pool (sync and the query loop's async pool)
+   once settings are loaded
+5. Client reuse and warm-up metrics
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cheap request used to open the first pooled connection
+WARMUP_MODEL = "gemini-2.5-flash-lite"
+
+_clients: Dict[Tuple[str, Optional[str]], Any] = {}
+# Per event loop: {(api_key, base_url): genai.Client}, released together with the loop
+_aio_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, Optional[str]], Any]]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+_stats = {
+    "created": 0,
+    "reused": 0,
+    "warmups": 0,
+    "warmup_failures": 0,
+    "last_warmup_seconds": None
+}
+
+
+def _build_client(api_key: str, base_url: Optional[str]):
+    # Imported lazily so importing this module does not load the SDK at startup
+    from google import genai
+    from google.genai import types
+
+    if base_url:
+        return genai.Client(api_key=api_key, http_options=types.HttpOptions(base_url=base_url))
+    return genai.Client(api_key=api_key)
+
+
+def get_gemini_client(api_key: str, base_url: Optional[str] = None):
+    """
+    Get the shared Gemini client for an API key and endpoint
+
+    The API key is passed explicitly, never through os.environ, so clients for
+    different keys can coexist.
+
+    Args:
+        api_key: Gemini API key
+        base_url: Optional API endpoint override
+
+    Returns:
+        genai.Client
+    """
+    if not api_key:
+        raise ValueError("Gemini API key is required")
+
+    key = (api_key, base_url or None)
+    with _lock:
+        client = _clients.get(key)
+        if client is not None:
+            _stats["reused"] += 1
+            return client
+
+        client = _build_client(api_key, base_url)
+        _clients[key] = client
+        _stats["created"] += 1
+    logger.info(f"Created shared Gemini client ({len(_clients)} in registry)")
+    return client
+
+
+def get_gemini_aio_client(api_key: str, base_url: Optional[str] = None):
+    """
+    Get the Gemini async API for the running event loop
+
+    The async HTTP pool of a genai.Client belongs to the loop it was first used on.
+    Queries all run on one long-lived loop (RAGIntegration.async_worker), so in the app
+    this is a single client whose warm connections every query reuses. A client is kept
+    per loop so that a call from any other loop (a script, asyncio.run in a tool) gets
+    a pool of its own instead of one bound to a different loop; it is dropped with its loop.
+
+    Args:
+        api_key: Gemini API key
+        base_url: Optional API endpoint override
+
+    Returns:
+        genai.Client.aio of the client bound to the running loop
+    """
+    if not api_key:
+        raise ValueError("Gemini API key is required")
+
+    loop = asyncio.get_running_loop()
+    key = (api_key, base_url or None)
+    with _lock:
+        loop_clients = _aio_clients.setdefault(loop, {})
+        client = loop_clients.get(key)
+        if client is not None:
+            _stats["reused"] += 1
+            return client.aio
+
+        client = _build_client(api_key, base_url)
+        loop_clients[key] = client
+        _stats["created"] += 1
+    logger.debug("Created async Gemini client for the running event loop")
+    return client.aio
+
+
+def warm_up_gemini_client(api_key: str, base_url: Optional[str] = None, model: str = WARMUP_MODEL) -> threading.Thread:
+    """
+    Open the first pooled connection of the shared client in a background thread
+
+    Args:
+        api_key: Gemini API key
+        base_url: Optional API endpoint override
+        model: Model whose metadata is fetched (a request that costs no tokens)
+
+    Returns:
+        The started daemon thread
+    """
+    def warm_up():
+        start_time = time.perf_counter()
+        try:
+            client = get_gemini_client(api_key, base_url)
+            client.models.get(model=model)
+            _record_warmup("sync", time.perf_counter() - start_time)
+        except Exception as e:
+            _record_warmup_failure("sync", e)
+
+    thread = threading.Thread(target=warm_up, name="GeminiWarmup", daemon=True)
+    thread.start()
+    return thread
+
+
+async def warm_up_gemini_aio_client(api_key: str, base_url: Optional[str] = None, model: str = WARMUP_MODEL) -> bool:
+    """
+    Open the first pooled connection of the async client bound to the running loop
+
+    Must run on the loop that later serves the queries (the summarizer, fallback
+    handler and unified query processor use the async API there).
+
+    Args:
+        api_key: Gemini API key
+        base_url: Optional API endpoint override
+        model: Model whose metadata is fetched (a request that costs no tokens)
+
+    Returns:
+        Whether the warm-up request succeeded
+    """
+    start_time = time.perf_counter()
+    try:
+        await get_gemini_aio_client(api_key, base_url).models.get(model=model)
+        _record_warmup("async", time.perf_counter() - start_time)
+        return True
+    except Exception as e:
+        _record_warmup_failure("async", e)
+        return False
+
+
+def _record_warmup(pool: str, elapsed: float) -> None:
+    with _lock:
+        _stats["warmups"] += 1
+        _stats["last_warmup_seconds"] = elapsed
+    logger.info(f"Gemini {pool} connection warmed up in {elapsed:.3f}s")
+
+
+def _record_warmup_failure(pool: str, error: Exception) -> None:
+    with _lock:
+        _stats["warmup_failures"] += 1
+    logger.warning(f"Gemini {pool} connection warm-up failed: {error}")
+
+
+def get_client_registry_stats() -> Dict[str, Any]:
+    """Get client reuse statistics"""
+    with _lock:
+        acquisitions = _stats["created"] + _stats["reused"]
+        return {
+            **_stats,
+            "clients": len(_clients),
+            "acquisitions": acquisitions,
+            "reuse_rate": _stats["reused"] / acquisitions if acquisitions else 0.0
+        }
+
+
+def clear_client_registry() -> None:
+    """Drop all shared clients (e.g. after the API key changes)"""
+    with _lock:
+        _clients.clear()
+        _aio_clients.clear()
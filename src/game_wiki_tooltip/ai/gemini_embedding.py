@@ -10,12 +10,16 @@ Features:
 """
 
 import os
+import hashlib
+import json
 from typing import List, Dict, Any, Optional
-from google import genai
 from google.genai import types
 import numpy as np
 import logging
 
+from src.game_wiki_tooltip.core.single_flight import get_single_flight
+from .gemini_client_registry import get_gemini_client
+
 logger = logging.getLogger(__name__)
 
 
@@ -41,9 +45,11 @@ class GeminiEmbeddingClient:
         self.model = model
         self.output_dim = output_dim
         
-        # Initialize Gemini client
-        os.environ["GOOGLE_API_KEY"] = self.api_key
-        self.client = genai.Client()
+        # Shared Gemini client, the API key is passed explicitly instead of through os.environ
+        self.client = get_gemini_client(self.api_key)
+        
+        # Identical concurrent embedding requests (e.g. the context path next to the main path) share one call
+        self.single_flight = get_single_flight("gemini_embedding")
         
         logger.info(f"Initialized Gemini embedding client with model: {model}, output_dim: {output_dim}")
     
@@ -61,6 +67,14 @@ class GeminiEmbeddingClient:
         Returns:
             List of embedding vectors
         """
+        # Dedupe key: everything that determines the vectors (the API key does not)
+        key = hashlib.sha1(
+            json.dumps([self.model, task_type, self.output_dim, texts], ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+        return self.single_flight.do(key, lambda: self._embed_batch_uncoalesced(texts, task_type))
+    
+    def _embed_batch_uncoalesced(self, texts: List[str], task_type: str) -> List[List[float]]:
+        """Call the Gemini embedding API"""
         try:
             # Prepare config with task type and output dimensions
             config = types.EmbedContentConfig(
@@ -131,4 +145,12 @@ class GeminiEmbeddingClient:
         Returns:
             List of embedding vectors
         """
-        return self.embed_batch(queries, task_type="QUESTION_ANSWERING")
\ No newline at end of file
+        return self.embed_batch(queries, task_type="QUESTION_ANSWERING")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get embedding request statistics"""
+        return {
+            "model": self.model,
+            "output_dim": self.output_dim,
+            "single_flight": self.single_flight.get_stats()
+        }
\ No newline at end of file
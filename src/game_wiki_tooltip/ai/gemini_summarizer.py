@@ -2,10 +2,10 @@
 Gemini Flash 2.5 Lite Summarizer for RAG-retrieved knowledge chunks
 """
 import os
-import json
+import time
+import asyncio
 import logging
 from typing import List, Dict, Optional, Any, AsyncGenerator
-from google import genai
 from google.genai import types
 from dataclasses import dataclass
 from pathlib import Path
@@ -13,9 +13,17 @@ from pathlib import Path
 # Import i18n for internationalization
 from src.game_wiki_tooltip.core.i18n import t
 from .rag_config import RAGConfig, SummarizationConfig
+from .gemini_client_registry import get_gemini_aio_client
+from .context_packer import ContextPacker
+from src.game_wiki_tooltip.core.cancellation import await_cancellable, is_cancel_requested
 
 logger = logging.getLogger(__name__)
 
+# Returned by _await_or_stop when the stop flag fired before the awaitable finished
+_STOPPED = object()
+# Returned by _next_stream_chunk when the stream is exhausted
+_STREAM_END = object()
+
 
 class GeminiSummarizer:
     """Summarizes multiple knowledge chunks using Gemini Flash 2.5 Lite"""
@@ -41,6 +49,24 @@ class GeminiSummarizer:
         # API key will be used when creating the client instance
         # Model will be configured per request using the client API
         
+        # Fits retrieved chunks into the prompt token budget
+        self.context_packer = ContextPacker(
+            token_budget=getattr(self.config, "context_token_budget", 2000),
+            summary_max_chars=getattr(self.config, "context_summary_max_chars", 600)
+        )
+        self.last_context_stats: Dict[str, Any] = {}
+        
+        # Timing of the most recent stream and cumulative stream statistics
+        self.last_stream_metrics: Dict[str, Any] = {}
+        self.stream_stats = {
+            "streams": 0,
+            "stopped": 0,
+            "ttft_samples": 0,
+            "total_ttft": 0.0,
+            "max_ttft": 0.0,
+            "max_inter_chunk_gap": 0.0
+        }
+        
         logger.info(f"Initialized GeminiSummarizer with model: {self.config.model_name}")
     
     async def summarize_chunks_stream(
@@ -48,21 +74,36 @@ class GeminiSummarizer:
         chunks: List[Dict[str, Any]],
         query: str,
         original_query: Optional[str] = None,
-        context: Optional[str] = None
+        context: Optional[str] = None,
+        stop_flag=None,
+        intent: Optional[str] = None,
+        outcome: Optional[Dict[str, Any]] = None
     ) -> AsyncGenerator[str, None]:
         """
-        Streaming summary generation, using real Gemini streaming API
+        Streaming summary generation, using the async Gemini streaming API
+        
+        The request and every chunk read are awaited on the event loop, so the loop
+        is never blocked by network I/O. The next chunk is only requested after the
+        consumer resumes this generator, so a slow consumer throttles the read instead
+        of chunks piling up in memory.
         
         Args:
             chunks: Retrieved knowledge chunks
             query: Processed query
             original_query: Original query
             context: Game context
+            stop_flag: Optional callable (or object with is_set()), checked at every await;
+                       when it fires the stream is closed and generation stops
+            intent: Detected query intent, decides which chunk fields get the token budget
+            outcome: Optional dict owned by the caller; "succeeded" is set to True only when this
+                     stream finished normally (not stopped, no error message yielded)
             
         Yields:
             Streaming fragments of summary content
         """
         print(f"🌊 [STREAM-DEBUG] Start streaming summary generation")
+        if outcome is not None:
+            outcome["succeeded"] = False
         print(f"   - Knowledge chunk count: {len(chunks)}")
         print(f"   - Query: {query}")
         if original_query and original_query != query:
@@ -83,27 +124,22 @@ class GeminiSummarizer:
         try:
             print(f"🚀 [STREAM-DEBUG] Calling Gemini streaming API")
             
-            # Use LLM config response language if available, otherwise detect from query
-            if self.llm_config and hasattr(self.llm_config, 'response_language') and self.llm_config.response_language != "auto":
-                language = self.llm_config.response_language
-                logger.info(f"🌐 Using LLM config response language for AI reply: {language}")
-            else:
-                language = self._detect_language(query) if self.config.language == "auto" else self.config.language
-                logger.info(f"🌐 Using detected/fallback language for AI reply: {language}")
+            language = self.resolve_response_language(query)
+            logger.info(f"🌐 Using response language for AI reply: {language}")
             
             # Build system instruction
             system_instruction = self._build_system_instruction(language)
             
             # Build prompt
-            prompt = self._build_summarization_prompt(chunks, query, original_query, context)
+            prompt = self._build_summarization_prompt(chunks, query, original_query, context, intent=intent)
             
             # For collecting complete response text to extract video sources
             complete_response = ""
             
             # Use new Client API for streaming calls
             try:
-                # Configure the client
-                client = genai.Client(api_key=self.config.api_key)
+                # Async client of the running loop: reuses its pooled connection across requests on that loop
+                aio = get_gemini_aio_client(self.config.api_key)
                 
                 # Configure Google Search tool if enabled
                 tools = []
@@ -122,22 +158,45 @@ class GeminiSummarizer:
                     thinking_config=types.ThinkingConfig(thinking_budget=self.config.thinking_budget)
                 )
                 
-                # Stream content generation
-                response = client.models.generate_content_stream(
-                    model=self.config.model_name,
-                    contents=[prompt],
-                    config=config
+                # Stream content generation (async API, the request itself is awaited too)
+                metrics = self._start_stream_metrics()
+                response = await self._await_or_stop(
+                    aio.models.generate_content_stream(
+                        model=self.config.model_name,
+                        contents=[prompt],
+                        config=config
+                    ),
+                    stop_flag
                 )
+                if response is _STOPPED:
+                    self._finish_stream_metrics(metrics, stopped=True)
+                    return
             
                 logger.debug("Started receiving streaming response")
                 
                 # Real-time streaming content output
-                for chunk in response:
-                    if chunk.text:
-                        logger.debug(f"Received streaming chunk: {len(chunk.text)} characters")
-                        complete_response += chunk.text
-                        yield chunk.text
+                try:
+                    while True:
+                        chunk = await self._await_or_stop(self._next_stream_chunk(response), stop_flag)
+                        if chunk is _STOPPED:
+                            self._finish_stream_metrics(metrics, stopped=True)
+                            return
+                        if chunk is _STREAM_END:
+                            break
+                        if chunk.text:
+                            logger.debug(f"Received streaming chunk: {len(chunk.text)} characters")
+                            self._record_stream_chunk(metrics, chunk.text)
+                            complete_response += chunk.text
+                            yield chunk.text
+                            # Consumer may have requested a stop while handling the chunk
+                            if is_cancel_requested(stop_flag):
+                                self._finish_stream_metrics(metrics, stopped=True)
+                                return
+                finally:
+                    # Release the HTTP stream when stopped or when the consumer closes us early
+                    await self._close_stream(response)
                     
+                self._finish_stream_metrics(metrics)
                 logger.debug("Streaming response completed")
                 
                 # After streaming output completes, add video source information
@@ -150,6 +209,8 @@ class GeminiSummarizer:
                     yield separator + video_sources_text
                 else:
                     logger.debug("No video sources found")
+                if outcome is not None:
+                    outcome["succeeded"] = True
                         
             except Exception as e:
                 logger.error(f"Streaming API call failed: {e}")
@@ -170,6 +231,102 @@ class GeminiSummarizer:
             yield f"An error occurred during content generation: {str(e)}\n\n"
             return
     
+    def resolve_response_language(self, query: str) -> str:
+        """Language of the reply: LLM config response language if set, otherwise detected from the query"""
+        if self.llm_config and hasattr(self.llm_config, 'response_language') and self.llm_config.response_language != "auto":
+            return self.llm_config.response_language
+        return self._detect_language(query) if self.config.language == "auto" else self.config.language
+    
+    async def _await_or_stop(self, awaitable, stop_flag=None):
+        """Await awaitable, returning _STOPPED (and cancelling it) as soon as stop_flag fires"""
+        if not stop_flag:
+            return await awaitable
+        try:
+            return await await_cancellable(awaitable, stop_flag)
+        except asyncio.CancelledError:
+            if not is_cancel_requested(stop_flag):
+                raise
+            logger.info("🛑 Stop requested, cancelling Gemini stream")
+            return _STOPPED
+    
+    @staticmethod
+    async def _next_stream_chunk(stream):
+        """Read the next chunk of an async stream, _STREAM_END when exhausted"""
+        try:
+            return await stream.__anext__()
+        except StopAsyncIteration:
+            return _STREAM_END
+    
+    @staticmethod
+    async def _close_stream(stream) -> None:
+        aclose = getattr(stream, "aclose", None)
+        if aclose is None:
+            return
+        try:
+            await aclose()
+        except Exception as e:
+            logger.debug(f"Closing Gemini stream failed: {e}")
+    
+    def _start_stream_metrics(self) -> Dict[str, Any]:
+        now = time.perf_counter()
+        return {
+            "started_at": now,
+            "last_chunk_at": None,
+            "ttft": None,
+            "gaps": [],
+            "chunks": 0,
+            "characters": 0
+        }
+    
+    def _record_stream_chunk(self, metrics: Dict[str, Any], text: str) -> None:
+        now = time.perf_counter()
+        if metrics["last_chunk_at"] is None:
+            metrics["ttft"] = now - metrics["started_at"]
+            print(f"⏱️ [STREAM-DEBUG] First token after {metrics['ttft']:.3f}s")
+        else:
+            metrics["gaps"].append(now - metrics["last_chunk_at"])
+        metrics["last_chunk_at"] = now
+        metrics["chunks"] += 1
+        metrics["characters"] += len(text)
+    
+    def _finish_stream_metrics(self, metrics: Dict[str, Any], stopped: bool = False) -> None:
+        """Summarize TTFT and inter-chunk gaps of one stream into last_stream_metrics and stream_stats"""
+        gaps = metrics["gaps"]
+        summary = {
+            "ttft": metrics["ttft"],
+            "total_time": time.perf_counter() - metrics["started_at"],
+            "chunks": metrics["chunks"],
+            "characters": metrics["characters"],
+            "avg_inter_chunk_gap": sum(gaps) / len(gaps) if gaps else 0.0,
+            "max_inter_chunk_gap": max(gaps) if gaps else 0.0,
+            "stopped": stopped
+        }
+        self.last_stream_metrics = summary
+        
+        stats = self.stream_stats
+        stats["streams"] += 1
+        if stopped:
+            stats["stopped"] += 1
+        if summary["ttft"] is not None:
+            stats["ttft_samples"] += 1
+            stats["total_ttft"] += summary["ttft"]
+            stats["max_ttft"] = max(stats["max_ttft"], summary["ttft"])
+        stats["max_inter_chunk_gap"] = max(stats["max_inter_chunk_gap"], summary["max_inter_chunk_gap"])
+        
+        ttft_text = f"{summary['ttft']:.3f}s" if summary["ttft"] is not None else "n/a"
+        print(f"⏱️ [STREAM-DEBUG] Stream {'stopped' if stopped else 'finished'}: TTFT {ttft_text}, "
+              f"{summary['chunks']} chunks in {summary['total_time']:.3f}s, "
+              f"gap avg {summary['avg_inter_chunk_gap']:.3f}s / max {summary['max_inter_chunk_gap']:.3f}s")
+    
+    def get_stream_stats(self) -> Dict[str, Any]:
+        """Get cumulative streaming latency statistics"""
+        stats = self.stream_stats
+        return {
+            **stats,
+            "avg_ttft": stats["total_ttft"] / stats["ttft_samples"] if stats["ttft_samples"] else 0.0,
+            "last_stream": self.last_stream_metrics
+        }
+    
     def _build_system_instruction(self, language: str = "auto") -> str:
         """Build system instruction for Gemini"""
         # Use LLM config response language if available
@@ -261,15 +418,16 @@ Format requirements:
         chunks: List[Dict[str, Any]], 
         query: str,
         original_query: Optional[str] = None,
-        context: Optional[str] = None
+        context: Optional[str] = None,
+        intent: Optional[str] = None
     ) -> str:
         """Build the simplified prompt for Gemini summarization (guidelines moved to system instruction)"""
         
         # Detect language from query or use config
         language = self._detect_language(query) if self.config.language == "auto" else self.config.language
         
-        # Format chunks as raw JSON for the prompt
-        chunks_json = self._format_chunks_as_json(chunks)
+        # Pack chunks as compact JSON within the context token budget
+        chunks_json = self._format_chunks_as_json(chunks, intent=intent)
         
         # Build language-specific prompt
         if language == "zh":
@@ -305,35 +463,23 @@ Please answer the user's question based on the above knowledge chunks."""
         
         return prompt
     
-    def _format_chunks_as_json(self, chunks: List[Dict[str, Any]]) -> str:
-        """Format chunks as clean JSON for the prompt - now preserving all original fields"""
-        formatted_chunks = []
-        
-        for i, chunk in enumerate(chunks, 1):
-            # Create a copy to avoid modifying original
-            chunk_copy = chunk.copy()
-            
-            # Remove chunk_id to prevent LLM from adding references like [unique_id_002]
-            chunk_copy.pop('chunk_id', None)
-            
-            # Remove other internal fields that are not useful for LLM
-            internal_fields_to_remove = ['_internal_id', '_vector_id', '_index_id', 
-                                       'video_url', 'video_title']  # Also remove video fields as they're handled separately
-            for field in internal_fields_to_remove:
-                chunk_copy.pop(field, None)
-            
-            # Ensure score is included if it exists
-            if 'score' in chunk and 'relevance_score' not in chunk_copy:
-                chunk_copy['relevance_score'] = chunk.get('score', 0)
-            
-            formatted_chunks.append(chunk_copy)
-        
+    def _format_chunks_as_json(self, chunks: List[Dict[str, Any]], intent: Optional[str] = None) -> str:
+        """Format chunks as compact JSON for the prompt, packed into the context token budget"""
         try:
-            return json.dumps(formatted_chunks, ensure_ascii=False, indent=2)
+            packed = self.context_packer.pack(chunks, intent=intent)
         except Exception as e:
-            # Fallback to string representation if JSON serialization fails
-            logger.warning(f"Failed to serialize chunks as JSON: {e}")
-            return str(formatted_chunks)
+            # Fallback to string representation if packing fails
+            logger.warning(f"Failed to pack chunks as JSON: {e}")
+            return str(chunks)
+        
+        self.last_context_stats = packed.to_stats()
+        print(f"📦 [CONTEXT-DEBUG] Packed {len(packed.items)}/{len(chunks)} chunks into "
+              f"{packed.tokens} tokens (budget {packed.budget}, unpacked {packed.raw_tokens}, intent {intent or 'general'})")
+        if packed.dropped:
+            print(f"   - Dropped chunks: {packed.dropped}")
+        if packed.omitted_fields:
+            print(f"   - Omitted fields: {packed.omitted_fields}")
+        return packed.text
 
     def _convert_timestamp_to_seconds(self, timestamp: str) -> int:
         """Convert MM:SS or HH:MM:SS format to seconds"""
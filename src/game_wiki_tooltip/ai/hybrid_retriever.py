@@ -8,16 +8,22 @@ Features:
 3. Provides a unified search interface
 4. Supports unified query processing (translation + rewrite + intent analysis)
 5. Performance optimization: complete multiple tasks in one LLM call
+6. Fused-result cache keyed by processed queries and index version
+7. Speculative retrieval on the raw query while LLM query rewriting is in flight
 """
 
 import logging
-from typing import List, Dict, Any, Optional
+import os
+import time
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 from .enhanced_bm25_indexer import EnhancedBM25Indexer, BM25UnavailableError
 from .unified_query_processor import process_query_unified
 from .rag_config import LLMSettings
 from src.game_wiki_tooltip.core.i18n import t
 from .rag_config import RAGConfig
+from .ttl_cache import TTLCache
+from .query_normalizer import normalize_query
 
 logger = logging.getLogger(__name__)
 
@@ -50,6 +56,45 @@ class VectorRetrieverAdapter:
         else:
             return self.rag_query._search_qdrant(query, top_k)
 
+    def get_index_signature(self) -> Tuple:
+        """
+        Get a signature identifying the currently loaded vector index
+
+        Returns:
+            Tuple of game name and (path, mtime, size) of the vector store files
+        """
+        paths = [self.rag_query.vector_store_path]
+        if self.rag_query.config and self.rag_query.config.get("vector_store_type") == "faiss":
+            paths.append(self.rag_query._resolve_faiss_index_file())
+        return (getattr(self.rag_query, "game_name", None),) + tuple(_file_signature(p) for p in paths)
+
+    def has_cached_embedding(self, query: str) -> bool:
+        """Whether vector search for this query can run without an embedding API call"""
+        checker = getattr(self.rag_query, "has_cached_query_embedding", None)
+        return bool(checker and checker(query))
+
+
+def _result_overlap(results_a: List[Dict], results_b: List[Dict]) -> float:
+    """Fraction of the smaller result list that also appears in the other (by row ID, else chunk ID)"""
+    def keys(results):
+        return {r.get("row_id", r.get("chunk", {}).get("chunk_id")) for r in results}
+    
+    if not results_a or not results_b:
+        return 0.0
+    keys_a, keys_b = keys(results_a), keys(results_b)
+    return len(keys_a & keys_b) / min(len(keys_a), len(keys_b))
+
+
+def _file_signature(path) -> Tuple:
+    """Return (path, mtime, size) for a file, or (path, None, None) if it cannot be read"""
+    if not path:
+        return (None, None, None)
+    try:
+        stat = os.stat(path)
+        return (str(path), stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return (str(path), None, None)
+
 
 class HybridSearchRetriever:
     """Hybrid Search Retriever"""
@@ -64,7 +109,9 @@ class HybridSearchRetriever:
                  llm_config: Optional[LLMSettings] = None,
                  enable_unified_processing: bool = True,
                  enable_query_rewrite: bool = True,
-                 rag_config: Optional[RAGConfig] = None):
+                 rag_config: Optional[RAGConfig] = None,
+                 chunk_store=None,
+                 index_bundle=None):
         """
         Initialize the hybrid search retriever
         
@@ -79,6 +126,9 @@ class HybridSearchRetriever:
             enable_unified_processing: Whether to enable unified query processing (recommended)
             enable_query_rewrite: Whether to enable query rewrite (only effective when unified processing is disabled)
             rag_config: RAG configuration with centralized LLM settings
+            chunk_store: Shared ChunkStore of the index, BM25 results reference its chunks
+            index_bundle: Memory-mapped IndexBundle of the index, the BM25 index is loaded
+                from it instead of bm25_index_path
         """
         self.vector_retriever = vector_retriever
         self.fusion_method = fusion_method
@@ -100,16 +150,22 @@ class HybridSearchRetriever:
         # Initialize enhanced BM25 indexer
         self.bm25_indexer = None
         bm25_path = Path(bm25_index_path)
+        self.bm25_index_path = str(bm25_path)
         
-        if not bm25_path.exists():
+        use_bundle = index_bundle is not None and index_bundle.has("bm25.data")
+        if not use_bundle and not bm25_path.exists():
             error_msg = f"BM25 index file does not exist: {bm25_index_path}"
             logger.error(error_msg)
             raise FileNotFoundError(error_msg)
         
         try:
             self.bm25_indexer = EnhancedBM25Indexer()
-            self.bm25_indexer.load_index(str(bm25_path))
-            logger.info(f"Enhanced BM25 index loaded successfully: {bm25_index_path}")
+            if use_bundle:
+                self.bm25_indexer.load_from_bundle(index_bundle, chunk_store)
+                logger.info(f"Enhanced BM25 index loaded from bundle: {index_bundle.path}")
+            else:
+                self.bm25_indexer.load_index(str(bm25_path), chunk_store=chunk_store)
+                logger.info(f"Enhanced BM25 index loaded successfully: {bm25_index_path}")
         except BM25UnavailableError as e:
             # Re-raise BM25 specific error, keep error message intact
             logger.error(f"Hybrid search initialization failed: {e}")
@@ -139,6 +195,21 @@ class HybridSearchRetriever:
             "total_queries": 0,
             "translated_queries": 0
         }
+        
+        # Fused-result cache: the same processed query against the same index always fuses to the same top-k
+        if rag_config:
+            self.enable_result_cache = rag_config.enable_cache
+            cache_ttl = rag_config.cache_ttl
+            cache_size = rag_config.hybrid_search.result_cache_size
+        else:
+            self.enable_result_cache = True
+            cache_ttl = 3600
+            cache_size = 128
+        self.result_cache = TTLCache(max_size=cache_size, ttl=cache_ttl)
+        self._cached_index_version = None
+        
+        # Speculative retrieval: minimum BM25 top-k overlap to keep the raw query's vector results
+        self.speculative_min_overlap = rag_config.hybrid_search.speculative_min_overlap if rag_config else 0.6
     
     def search(self, query: str, top_k: int = 5) -> Dict[str, Any]:
         """
@@ -245,63 +316,15 @@ class HybridSearchRetriever:
         
         # Perform hybrid search
         try:
-            # Vector search - always return 10 results
-            print(f"🔍 [HYBRID-DEBUG] Starting vector search: query='{final_query}', top_k={vector_search_count}")
-            vector_results = self.vector_retriever.search(final_query, vector_search_count)
-            print(f"📊 [HYBRID-DEBUG] Number of vector search results: {len(vector_results)}")
-            
-            if vector_results:
-                print(f"   📋 [HYBRID-DEBUG] Top 3 vector search results:")
-                for i, result in enumerate(vector_results[:3]):
-                    chunk = result.get("chunk", {})
-                    print(f"      {i+1}. Topic: {chunk.get('topic', 'Unknown')}")
-                    print(f"         Score: {result.get('score', 0):.4f}")
-                    print(f"         Summary: {chunk.get('summary', '')[:80]}...")
-            
-            # BM25 search - always return 10 results, use LLM-optimized query
-            bm25_results = []
-            if self.bm25_indexer:
-                # Use LLM-optimized BM25 query
-                bm25_query = query_metadata.get("bm25_optimized_query", final_query)
-                print(f"🔍 [HYBRID-DEBUG] Starting BM25 search:")
-                print(f"   - Original query: '{query}'")
-                print(f"   - Semantic query: '{final_query}'")
-                print(f"   - BM25 optimized: '{bm25_query}'")
-                print(f"   - Number of results: {bm25_search_count}")
-                
-                bm25_results = self.bm25_indexer.search(bm25_query, bm25_search_count)
-                print(f"📊 [HYBRID-DEBUG] Number of BM25 search results: {len(bm25_results)}")
-                
-                if bm25_results:
-                    print(f"   📋 [HYBRID-DEBUG] Top 3 BM25 search results:")
-                    for i, result in enumerate(bm25_results[:3]):
-                        chunk = result.get("chunk", {})
-                        print(f"      {i+1}. Topic: {chunk.get('topic', 'Unknown')}")
-                        print(f"         Score: {result.get('score', 0):.4f}")
-                        print(f"         Summary: {chunk.get('summary', '')[:80]}...")
-                        if "match_info" in result:
-                            print(f"         Match info: {result['match_info'].get('relevance_reason', 'N/A')}")
-            else:
-                print(f"⚠️ [HYBRID-DEBUG] BM25 indexer not initialized, skipping BM25 search")
-            
-            # Score fusion - always return 5 results
-            print(f"🔄 [HYBRID-DEBUG] Starting score fusion: method={self.fusion_method}")
-            print(f"   - Vector weight: {self.vector_weight}")
-            print(f"   - BM25 weight: {self.bm25_weight}")
-            print(f"   - RRF_K: {self.rrf_k}")
-            print(f"   - Final number of results: {final_result_count}")
-            
-            final_results = self._fuse_results(vector_results, bm25_results, final_result_count)
-            
-            print(f"✅ [HYBRID-DEBUG] Score fusion complete, final number of results: {len(final_results)}")
-            if final_results:
-                print(f"   📋 [HYBRID-DEBUG] Top 5 fused results:")
-                for i, result in enumerate(final_results):
-                    chunk = result.get("chunk", {})
-                    print(f"      {i+1}. Topic: {chunk.get('topic', 'Unknown')}")
-                    print(f"         Fusion score: {result.get('fusion_score', 0):.4f}")
-                    print(f"         Vector score: {result.get('vector_score', 0):.4f}")
-                    print(f"         BM25 score: {result.get('bm25_score', 0):.4f}")
+            bm25_query = query_metadata.get("bm25_optimized_query", final_query)
+            final_results, vector_count, bm25_count, cache_hit = self.retrieve_fused(
+                final_query,
+                bm25_query,
+                vector_search_count=vector_search_count,
+                bm25_search_count=bm25_search_count,
+                final_result_count=final_result_count,
+                original_query=query
+            )
             
             # Build return result
             return {
@@ -309,9 +332,10 @@ class HybridSearchRetriever:
                 "query": query_metadata,
                 "metadata": {
                     "fusion_method": self.fusion_method,
-                    "vector_results_count": len(vector_results),
-                    "bm25_results_count": len(bm25_results),
+                    "vector_results_count": vector_count,
+                    "bm25_results_count": bm25_count,
                     "final_results_count": len(final_results),
+                    "result_cache_hit": cache_hit,
                     "vector_search_count": vector_search_count,
                     "bm25_search_count": bm25_search_count,
                     "target_final_count": final_result_count,
@@ -334,6 +358,261 @@ class HybridSearchRetriever:
                 }
             }
     
+    def retrieve_fused(self,
+                       semantic_query: str,
+                       bm25_query: Optional[str] = None,
+                       vector_search_count: int = 10,
+                       bm25_search_count: int = 10,
+                       final_result_count: int = 5,
+                       original_query: Optional[str] = None,
+                       speculative: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict], int, int, bool]:
+        """
+        Run vector + BM25 retrieval for already-processed queries and fuse the results
+        
+        Fused results are cached by (game, index version, semantic query, BM25 query, depth config),
+        so repeated queries skip embedding, FAISS and BM25 entirely.
+        
+        Args:
+            semantic_query: Query used for vector search (rewritten query)
+            bm25_query: Query used for BM25 search (LLM-optimized), defaults to semantic_query
+            vector_search_count: Number of vector results to fuse
+            bm25_search_count: Number of BM25 results to fuse
+            final_result_count: Number of fused results to return
+            original_query: Original user query (debug output only)
+            speculative: Result of speculate() on the raw query; legs it already covers are reused
+                instead of re-run, and the reuse decision is recorded in it
+            
+        Returns:
+            Tuple of (fused results, vector result count, BM25 result count, cache hit)
+        """
+        bm25_query = bm25_query or semantic_query
+        cache_key = None
+        
+        if self.enable_result_cache:
+            index_version = self._get_index_version()
+            cache_key = (
+                index_version,
+                semantic_query,
+                bm25_query,
+                vector_search_count,
+                bm25_search_count,
+                final_result_count,
+                self.fusion_method,
+                self.rrf_k
+            )
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                cached_results, vector_count, bm25_count = cached
+                print(f"⚡ [HYBRID-DEBUG] Fused result cache hit: semantic='{semantic_query}', bm25='{bm25_query}'")
+                if speculative is not None:
+                    speculative.update({"reused_legs": [], "rerun_legs": [], "bm25_overlap": None})
+                # Hand out copies so reranking cannot modify the cached entries
+                return [result.copy() for result in cached_results], vector_count, bm25_count, True
+        
+        if speculative is not None:
+            vector_results, bm25_results = self._resolve_speculative_legs(
+                speculative, semantic_query, bm25_query, vector_search_count, bm25_search_count, original_query
+            )
+        else:
+            vector_results = self._run_vector_leg(semantic_query, vector_search_count)
+            bm25_results = self._run_bm25_leg(bm25_query, bm25_search_count, semantic_query, original_query)
+        
+        # Score fusion
+        print(f"🔄 [HYBRID-DEBUG] Starting score fusion: method={self.fusion_method}")
+        print(f"   - Vector weight: {self.vector_weight}")
+        print(f"   - BM25 weight: {self.bm25_weight}")
+        print(f"   - RRF_K: {self.rrf_k}")
+        print(f"   - Final number of results: {final_result_count}")
+        
+        final_results = self._fuse_results(vector_results, bm25_results, final_result_count)
+        
+        print(f"✅ [HYBRID-DEBUG] Score fusion complete, final number of results: {len(final_results)}")
+        if final_results:
+            print(f"   📋 [HYBRID-DEBUG] Top 5 fused results:")
+            for i, result in enumerate(final_results):
+                chunk = result.get("chunk", {})
+                print(f"      {i+1}. Topic: {chunk.get('topic', 'Unknown')}")
+                print(f"         Fusion score: {result.get('fusion_score', 0):.4f}")
+                print(f"         Vector score: {result.get('vector_score', 0):.4f}")
+                print(f"         BM25 score: {result.get('bm25_score', 0):.4f}")
+        
+        # Only cache complete results: a failed vector search (empty or overload notice) must be retried
+        if cache_key is not None and final_results and vector_results and not any(r.get("error") for r in vector_results):
+            self.result_cache.set(
+                cache_key,
+                ([result.copy() for result in final_results], len(vector_results), len(bm25_results))
+            )
+        
+        return final_results, len(vector_results), len(bm25_results), False
+    
+    def _run_vector_leg(self, semantic_query: str, vector_search_count: int) -> List[Dict]:
+        """Run the vector search leg"""
+        print(f"🔍 [HYBRID-DEBUG] Starting vector search: query='{semantic_query}', top_k={vector_search_count}")
+        vector_results = self.vector_retriever.search(semantic_query, vector_search_count)
+        print(f"📊 [HYBRID-DEBUG] Number of vector search results: {len(vector_results)}")
+        
+        if vector_results:
+            print(f"   📋 [HYBRID-DEBUG] Top 3 vector search results:")
+            for i, result in enumerate(vector_results[:3]):
+                chunk = result.get("chunk", {})
+                print(f"      {i+1}. Topic: {chunk.get('topic', 'Unknown')}")
+                print(f"         Score: {result.get('score', 0):.4f}")
+                print(f"         Summary: {chunk.get('summary', '')[:80]}...")
+        return vector_results
+    
+    def _run_bm25_leg(self, bm25_query: str, bm25_search_count: int,
+                      semantic_query: Optional[str] = None, original_query: Optional[str] = None) -> List[Dict]:
+        """Run the BM25 search leg, use LLM-optimized query"""
+        if not self.bm25_indexer:
+            print(f"⚠️ [HYBRID-DEBUG] BM25 indexer not initialized, skipping BM25 search")
+            return []
+        
+        print(f"🔍 [HYBRID-DEBUG] Starting BM25 search:")
+        print(f"   - Original query: '{original_query or semantic_query or bm25_query}'")
+        print(f"   - Semantic query: '{semantic_query or bm25_query}'")
+        print(f"   - BM25 optimized: '{bm25_query}'")
+        print(f"   - Number of results: {bm25_search_count}")
+        
+        bm25_results = self.bm25_indexer.search(bm25_query, bm25_search_count)
+        print(f"📊 [HYBRID-DEBUG] Number of BM25 search results: {len(bm25_results)}")
+        
+        if bm25_results:
+            print(f"   📋 [HYBRID-DEBUG] Top 3 BM25 search results:")
+            for i, result in enumerate(bm25_results[:3]):
+                chunk = result.get("chunk", {})
+                print(f"      {i+1}. Topic: {chunk.get('topic', 'Unknown')}")
+                print(f"         Score: {result.get('score', 0):.4f}")
+                print(f"         Summary: {chunk.get('summary', '')[:80]}...")
+                if "match_info" in result:
+                    print(f"         Match info: {result['match_info'].get('relevance_reason', 'N/A')}")
+        return bm25_results
+    
+    def speculate(self,
+                  raw_query: str,
+                  vector_search_count: int = 10,
+                  bm25_search_count: int = 10) -> Dict[str, Any]:
+        """
+        Speculatively retrieve on the raw user query while LLM query rewriting is in flight
+        
+        BM25 always runs (it is local and cheap). The vector leg only runs when the raw query's
+        embedding is already cached, so speculation never spends an embedding API call.
+        
+        Args:
+            raw_query: Query exactly as the user typed it
+            vector_search_count: Number of vector results (must match the later retrieve_fused call)
+            bm25_search_count: Number of BM25 results (must match the later retrieve_fused call)
+            
+        Returns:
+            Speculation dict to pass to retrieve_fused(speculative=...)
+        """
+        start_time = time.perf_counter()
+        speculation = {
+            "query": raw_query,
+            "index_version": self._get_index_version(),
+            "vector_search_count": vector_search_count,
+            "bm25_search_count": bm25_search_count,
+            "vector_results": None,
+            "bm25_results": None
+        }
+        
+        print(f"🔮 [HYBRID-DEBUG] Speculative retrieval on raw query: '{raw_query}'")
+        speculation["bm25_results"] = self._run_bm25_leg(raw_query, bm25_search_count)
+        
+        has_cached_embedding = getattr(self.vector_retriever, "has_cached_embedding", None)
+        if has_cached_embedding and has_cached_embedding(raw_query):
+            vector_results = self._run_vector_leg(raw_query, vector_search_count)
+            if vector_results and not any(r.get("error") for r in vector_results):
+                speculation["vector_results"] = vector_results
+        
+        speculation["elapsed"] = time.perf_counter() - start_time
+        print(f"🔮 [HYBRID-DEBUG] Speculative retrieval done in {speculation['elapsed']:.3f}s "
+              f"(vector leg: {speculation['vector_results'] is not None})")
+        return speculation
+    
+    def _resolve_speculative_legs(self,
+                                  speculative: Dict[str, Any],
+                                  semantic_query: str,
+                                  bm25_query: str,
+                                  vector_search_count: int,
+                                  bm25_search_count: int,
+                                  original_query: Optional[str]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Reuse speculative legs that cover the processed queries, re-run only the missing ones
+        
+        - BM25 leg: reused when the optimized BM25 query normalizes to the raw query, otherwise re-run
+        - Vector leg: reused when the rewritten query normalizes to the raw query, or when the
+          rewritten BM25 top-k overlaps the speculative BM25 top-k enough (the rewrite did not move
+          retrieval), otherwise re-run
+        """
+        reused_legs = []
+        rerun_legs = []
+        overlap = None
+        raw_normalized = normalize_query(speculative.get("query", ""))
+        
+        usable = (
+            speculative.get("index_version") == self._get_index_version()
+            and speculative.get("vector_search_count") == vector_search_count
+            and speculative.get("bm25_search_count") == bm25_search_count
+        )
+        spec_bm25 = speculative.get("bm25_results") if usable else None
+        spec_vector = speculative.get("vector_results") if usable else None
+        
+        if spec_bm25 is not None and normalize_query(bm25_query) == raw_normalized:
+            bm25_results = [result.copy() for result in spec_bm25]
+            reused_legs.append("bm25")
+        else:
+            bm25_results = self._run_bm25_leg(bm25_query, bm25_search_count, semantic_query, original_query)
+            rerun_legs.append("bm25")
+            if spec_bm25 is not None:
+                overlap = _result_overlap(spec_bm25, bm25_results)
+        
+        reuse_vector = spec_vector is not None and (
+            normalize_query(semantic_query) == raw_normalized
+            or (overlap is not None and overlap >= self.speculative_min_overlap)
+        )
+        if reuse_vector:
+            vector_results = [result.copy() for result in spec_vector]
+            reused_legs.append("vector")
+        else:
+            vector_results = self._run_vector_leg(semantic_query, vector_search_count)
+            rerun_legs.append("vector")
+        
+        speculative.update({"reused_legs": reused_legs, "rerun_legs": rerun_legs, "bm25_overlap": overlap})
+        print(f"🔮 [HYBRID-DEBUG] Speculation reused legs: {reused_legs or 'none'}, re-ran: {rerun_legs or 'none'}"
+              + (f", BM25 overlap: {overlap:.2f}" if overlap is not None else ""))
+        return vector_results, bm25_results
+    
+    def _get_index_version(self) -> Tuple:
+        """
+        Get the version of the loaded indexes, clearing the result cache when it changes
+        
+        The version is derived from the vector store and BM25 index files, so rebuilding
+        the vectorstore on disk invalidates all cached results.
+        """
+        vector_signature = ()
+        if hasattr(self.vector_retriever, "get_index_signature"):
+            try:
+                vector_signature = self.vector_retriever.get_index_signature()
+            except Exception as e:
+                logger.debug(f"Failed to get vector index signature: {e}")
+        
+        index_version = (vector_signature, _file_signature(self.bm25_index_path))
+        if index_version != self._cached_index_version:
+            if self._cached_index_version is not None:
+                logger.info("Index version changed, invalidating fused result cache")
+                self.result_cache.clear()
+            self._cached_index_version = index_version
+        return index_version
+    
+    def get_index_version(self) -> Tuple:
+        """Version of the loaded indexes, changes whenever the index files are rebuilt"""
+        return self._get_index_version()
+    
+    def invalidate_result_cache(self):
+        """Clear cached fused results (call after the indexes are rebuilt or reloaded)"""
+        self.result_cache.clear()
+        self._cached_index_version = None
+    
     def _fuse_results(self, vector_results: List[Dict], bm25_results: List[Dict], top_k: int) -> List[Dict]:
         """
         Fuse the results of vector search and BM25 search
@@ -448,11 +727,13 @@ class HybridSearchRetriever:
         if self.enable_unified_processing:
             return {
                 "method": "unified_processing",
-                "stats": self.unified_processing_stats.copy()
+                "stats": self.unified_processing_stats.copy(),
+                "result_cache": self.result_cache.get_stats()
             }
         else:
             return {
                 "method": "separate_processing",
                 "translation_stats": self.query_translation_stats.copy(),
-                "rewrite_stats": self.query_rewrite_stats.copy()
+                "rewrite_stats": self.query_rewrite_stats.copy(),
+                "result_cache": self.result_cache.get_stats()
             }
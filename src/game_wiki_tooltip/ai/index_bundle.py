@@ -0,0 +1,474 @@
+"""
+Index Bundle Module
+===================
+
+Features:
+1. One file per game index (index.bundle) holding everything retrieval loads: vector
+   config, vectors, BM25 CSC postings, vocab and parameters, stop words, corpus tokens,
+   chunk documents and intent features
+2. Fixed header, JSON section table and 64-byte aligned sections; the file is
+   memory-mapped at load, arrays are zero-copy views and documents are decoded per row
+   on first access, so nothing is parsed or copied per chunk at load
+3. CRC32 per section, checked once per bundle file: the build (from its in-memory
+   payloads) or the first verifying open records the file's size and modification time
+   in index.bundle.verified, later opens of the unchanged file skip the linear CRC pass
+4. Built from the regular index artifacts by the build tools; a bundle whose source
+   files changed (size or modification time) since it was built is ignored, and a
+   rebuild that fails to write the bundle removes the old one
+
+Layout:
+    header   magic (8s) | version (u32) | table length (u32) | table CRC32 (u32)
+    table    compact JSON {"sections": [{name, kind, offset, length, crc32, dtype, shape}],
+                          "sources": {file name: {size, mtime_ns}}, ...}
+    sections aligned to SECTION_ALIGNMENT, offsets relative to the first section
+"""
+
+import json
+import logging
+import mmap
+import os
+import pickle
+import struct
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .chunk_store import BlobChunkStore, METADATA_FILENAME, encode_chunk_blob
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FILENAME = "index.bundle"
+BUNDLE_MAGIC = b"GWIXBNDL"
+BUNDLE_VERSION = 2
+SECTION_ALIGNMENT = 64
+
+VERIFIED_SUFFIX = ".verified"
+
+_HEADER = struct.Struct("<8sIII")  # magic, version, table length, table CRC32
+
+# bm25s save_dir file names (bm25s.BM25.save defaults)
+_BM25S_ARRAYS = {
+    "bm25.data": "data.csc.index.npy",
+    "bm25.indices": "indices.csc.index.npy",
+    "bm25.indptr": "indptr.csc.index.npy",
+    "bm25.nonoccurrence": "nonoccurrence_array.index.npy",
+}
+_BM25S_PARAMS = "params.index.json"
+_BM25S_VOCAB = "vocab.index.json"
+
+
+class IndexBundleError(Exception):
+    """Index bundle missing, corrupt or incompatible"""
+    pass
+
+
+def _align(offset: int) -> int:
+    return (offset + SECTION_ALIGNMENT - 1) // SECTION_ALIGNMENT * SECTION_ALIGNMENT
+
+
+def _json_bytes(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class IndexBundle:
+    """Memory-mapped index bundle of one game"""
+
+    def __init__(self, path: Path, file, mapping: mmap.mmap, table: Dict[str, Any], data_start: int):
+        self.path = path
+        self._file = file
+        self._mmap = mapping
+        self.table = table
+        self._data_start = data_start
+        self._sections = {section["name"]: section for section in table["sections"]}
+        self._arrays: Dict[str, Any] = {}
+
+    @classmethod
+    def open(cls, path: Path, verify: bool = True) -> "IndexBundle":
+        """
+        Map a bundle file
+
+        Args:
+            path: Bundle file
+            verify: Check the CRC32 of every section unless this file (same size and
+                modification time) was verified before; corruption is then reported here,
+                where callers fall back to the index files, instead of surfacing halfway
+                through loading
+
+        Raises:
+            IndexBundleError: When the file is not a valid bundle
+        """
+        path = Path(path)
+        file = open(path, "rb")
+        try:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            file.close()
+            raise
+        try:
+            if len(mapping) < _HEADER.size:
+                raise IndexBundleError(f"Bundle too small: {path}")
+            magic, version, table_length, table_crc = _HEADER.unpack_from(mapping, 0)
+            if magic != BUNDLE_MAGIC:
+                raise IndexBundleError(f"Not an index bundle: {path}")
+            if version != BUNDLE_VERSION:
+                raise IndexBundleError(f"Unsupported bundle version {version}: {path}")
+            table_bytes = mapping[_HEADER.size:_HEADER.size + table_length]
+            if zlib.crc32(table_bytes) != table_crc:
+                raise IndexBundleError(f"Bundle section table checksum mismatch: {path}")
+            bundle = cls(path, file, mapping, json.loads(table_bytes), _align(_HEADER.size + table_length))
+            if verify:
+                stat = os.fstat(file.fileno())
+                stamp = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+                if _read_verified_stamp(path) != stamp:
+                    bundle.verify()
+                    _write_verified_stamp(path, stamp)
+            return bundle
+        except Exception:
+            mapping.close()
+            file.close()
+            raise
+
+    def verify(self) -> None:
+        """Check every section against its CRC32"""
+        view = memoryview(self._mmap)
+        try:
+            for name, section in self._sections.items():
+                start = self._data_start + section["offset"]
+                end = start + section["length"]
+                if end > len(self._mmap):
+                    raise IndexBundleError(f"Bundle section '{name}' is truncated: {self.path}")
+                if zlib.crc32(view[start:end]) != section["crc32"]:
+                    raise IndexBundleError(f"Bundle section '{name}' checksum mismatch: {self.path}")
+        finally:
+            view.release()
+
+    def has(self, name: str) -> bool:
+        return name in self._sections
+
+    def buffer(self, name: str) -> memoryview:
+        """Zero-copy view of a section"""
+        section = self._section(name)
+        start = self._data_start + section["offset"]
+        return memoryview(self._mmap)[start:start + section["length"]]
+
+    def json(self, name: str) -> Any:
+        """Decode a JSON section"""
+        section = self._section(name)
+        start = self._data_start + section["offset"]
+        return json.loads(self._mmap[start:start + section["length"]])
+
+    def array(self, name: str):
+        """Read-only numpy view of an array section"""
+        if name not in self._arrays:
+            section = self._section(name)
+            shape = tuple(section["shape"])
+            count = 1
+            for dim in shape:
+                count *= dim
+            self._arrays[name] = np.frombuffer(
+                self._mmap, dtype=np.dtype(section["dtype"]), count=count,
+                offset=self._data_start + section["offset"]
+            ).reshape(shape)
+        return self._arrays[name]
+
+    def chunk_store(self) -> BlobChunkStore:
+        """Chunk documents, decoded per row on first access"""
+        return BlobChunkStore(self.array("documents.offsets"), self.buffer("documents.blob"), path=self.path)
+
+    def intent_features(self) -> Optional[Tuple[Any, str]]:
+        """(matrix, signature) for IntentAwareReranker.attach_intent_features, None when not bundled"""
+        if not self.has("intent_features"):
+            return None
+        return self.array("intent_features"), self.json("intent_features.meta")["signature"]
+
+    def is_stale(self, index_dir: Path) -> bool:
+        """
+        Whether a source file next to the bundle changed since the bundle was built
+
+        Size and modification time (ns) must both match. Copying the index files
+        (e.g. a fresh checkout) resets their modification times, so the bundle then
+        counts as stale and the individual files are loaded until it is rebuilt.
+        """
+        for name, recorded in self.table.get("sources", {}).items():
+            source = Path(index_dir) / name
+            if source.exists() and _source_stamp(source) != recorded:
+                return True
+        return False
+
+    def _section(self, name: str) -> Dict[str, Any]:
+        try:
+            return self._sections[name]
+        except KeyError:
+            raise IndexBundleError(f"Bundle has no section '{name}': {self.path}") from None
+
+    def close(self) -> None:
+        """Unmap the file (left to GC while array views are still referenced)"""
+        self._arrays.clear()
+        try:
+            self._mmap.close()
+        except BufferError:
+            return
+        self._file.close()
+
+
+def _source_stamp(path: Path) -> Dict[str, int]:
+    """Size and modification time recorded for a source file"""
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _verified_stamp_path(bundle_path: Path) -> Path:
+    return bundle_path.with_suffix(bundle_path.suffix + VERIFIED_SUFFIX)
+
+
+def _read_verified_stamp(bundle_path: Path) -> Optional[Dict[str, int]]:
+    """Size and modification time of the bundle file when its CRCs were last checked"""
+    try:
+        with open(_verified_stamp_path(bundle_path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_verified_stamp(bundle_path: Path, stamp: Dict[str, int]) -> None:
+    """Record a verified bundle file; without the record the next open verifies again"""
+    try:
+        with open(_verified_stamp_path(bundle_path), "w", encoding="utf-8") as f:
+            json.dump(stamp, f)
+    except OSError as e:
+        logger.debug(f"Failed to record verified index bundle {bundle_path}: {e}")
+
+
+def remove_index_bundle(index_dir: Path) -> bool:
+    """
+    Delete the bundle of an index directory (after a rebuild whose bundle could not be written)
+
+    Returns:
+        Whether a bundle was removed
+    """
+    bundle_path = Path(index_dir) / BUNDLE_FILENAME
+    removed = False
+    for path in (bundle_path, bundle_path.with_suffix(bundle_path.suffix + ".tmp"), _verified_stamp_path(bundle_path)):
+        try:
+            path.unlink()
+            removed = removed or path == bundle_path
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            logger.warning(f"Failed to remove index bundle {path}: {e}")
+    if removed:
+        logger.info(f"Removed outdated index bundle: {bundle_path}")
+    return removed
+
+
+def open_index_bundle(index_dir: Path, verify: bool = True) -> Optional[IndexBundle]:
+    """
+    Open the bundle of a vector index directory
+
+    Returns:
+        IndexBundle, or None when there is no usable bundle (missing, corrupt, stale,
+        or numpy unavailable); callers then load the individual index files
+    """
+    bundle_path = Path(index_dir) / BUNDLE_FILENAME
+    if not NUMPY_AVAILABLE or not bundle_path.exists():
+        return None
+    try:
+        bundle = IndexBundle.open(bundle_path, verify=verify)
+    except (IndexBundleError, OSError, ValueError, struct.error) as e:
+        logger.warning(f"Ignoring index bundle {bundle_path}: {e}")
+        return None
+    if bundle.is_stale(index_dir):
+        logger.warning(f"Index bundle is older than the index files, ignoring: {bundle_path}")
+        bundle.close()
+        return None
+    return bundle
+
+
+def _bm25_sections(index_dir: Path, config: Dict[str, Any]) -> Tuple[List[Tuple[str, Any]], Dict[str, Dict[str, int]]]:
+    """BM25 sections (bm25s save_dir and the indexer pickle) and their source file stamps"""
+    pickle_path = index_dir / Path(config.get("bm25_index_path") or "enhanced_bm25_index.pkl").name
+    bm25s_dir = pickle_path.parent / f"{pickle_path.stem}_bm25s"
+    if not pickle_path.exists() or not bm25s_dir.exists():
+        raise IndexBundleError(f"BM25 index not found: {pickle_path}")
+
+    with open(pickle_path, "rb") as f:
+        data = pickle.load(f)
+    with open(bm25s_dir / _BM25S_PARAMS, "r", encoding="utf-8") as f:
+        params = json.load(f)
+    with open(bm25s_dir / _BM25S_VOCAB, "r", encoding="utf-8") as f:
+        vocab = json.load(f)
+
+    sections: List[Tuple[str, Any]] = [
+        ("bm25.params", params),
+        ("bm25.vocab", vocab),
+        ("bm25.stop_words", sorted(data.get("stop_words", []))),
+        ("bm25.corpus_tokens", data.get("corpus_tokens", [])),
+    ]
+    for name, filename in _BM25S_ARRAYS.items():
+        array_path = bm25s_dir / filename
+        if array_path.exists():
+            sections.append((name, np.load(array_path, allow_pickle=False)))
+    sources = {pickle_path.name: _source_stamp(pickle_path)}
+    return sections, sources
+
+
+def _vector_sections(index_dir: Path) -> Tuple[List[Tuple[str, Any]], Dict[str, Dict[str, int]]]:
+    """Vectors reconstructed from index.faiss"""
+    import faiss
+
+    faiss_path = index_dir / "index.faiss"
+    index = faiss.read_index(str(faiss_path))
+    vectors = np.ascontiguousarray(index.reconstruct_n(0, index.ntotal), dtype=np.float32)
+    metric = "ip" if index.metric_type == faiss.METRIC_INNER_PRODUCT else "l2"
+    return [("vectors", vectors), ("vectors.meta", {"metric": metric, "dim": int(index.d)})], \
+        {faiss_path.name: _source_stamp(faiss_path)}
+
+
+def _intent_feature_sections(index_dir: Path, chunks: List[Dict[str, Any]]) -> List[Tuple[str, Any]]:
+    """Intent features from the feature file, computed when missing or stale"""
+    from .intent_aware_reranker import IntentAwareReranker
+
+    reranker = IntentAwareReranker()
+    if not reranker.attach_intent_features(index_dir, chunks):
+        return []
+    matrix = np.ascontiguousarray(reranker._intent_features, dtype=np.float32)
+    return [("intent_features", matrix), ("intent_features.meta", {"signature": reranker.intent_feature_signature()})]
+
+
+def write_index_bundle(index_dir: Path, config: Dict[str, Any], output_path: Optional[Path] = None) -> Path:
+    """
+    Build the bundle of a vector index from its individual files
+
+    Args:
+        index_dir: Vector index directory (metadata.json, index.faiss, BM25 index)
+        config: Vector store config (contents of <collection>_config.json)
+        output_path: Bundle file (defaults to index_dir/index.bundle)
+
+    Returns:
+        Path of the written bundle
+
+    Raises:
+        IndexBundleError: When an index file is missing
+        ImportError: When numpy or faiss is unavailable
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("numpy is required to build index bundles")
+    index_dir = Path(index_dir)
+    metadata_path = index_dir / METADATA_FILENAME
+    if not metadata_path.exists():
+        raise IndexBundleError(f"Metadata file not found: {metadata_path}")
+    with open(metadata_path, "r", encoding="utf-8") as f:
+        chunks = json.load(f)
+
+    offsets, blob = encode_chunk_blob(chunks)
+    sections: List[Tuple[str, Any]] = [
+        ("config", config),
+        ("documents.offsets", np.asarray(offsets, dtype=np.uint64)),
+        ("documents.blob", blob),
+    ]
+    sources = {METADATA_FILENAME: _source_stamp(metadata_path)}
+    if config.get("vector_store_type", "faiss") == "faiss":
+        vector_sections, vector_sources = _vector_sections(index_dir)
+        sections += vector_sections
+        sources.update(vector_sources)
+    bm25_sections, bm25_sources = _bm25_sections(index_dir, config)
+    sections += bm25_sections
+    sources.update(bm25_sources)
+    sections += _intent_feature_sections(index_dir, chunks)
+
+    # Section payloads and table entries (offsets relative to the first section)
+    payloads: List[Tuple[int, bytes]] = []
+    entries = []
+    offset = 0
+    for name, value in sections:
+        entry: Dict[str, Any] = {"name": name}
+        if isinstance(value, bytes):
+            entry["kind"], payload = "bytes", value
+        elif NUMPY_AVAILABLE and isinstance(value, np.ndarray):
+            value = np.ascontiguousarray(value)
+            entry.update(kind="array", dtype=value.dtype.str, shape=list(value.shape))
+            payload = value.tobytes()
+        else:
+            entry["kind"], payload = "json", _json_bytes(value)
+        offset = _align(offset)
+        entry.update(offset=offset, length=len(payload), crc32=zlib.crc32(payload))
+        entries.append(entry)
+        payloads.append((offset, payload))
+        offset += len(payload)
+
+    table = _json_bytes({
+        "sections": entries,
+        "sources": sources,
+        "chunk_count": len(chunks),
+        "created_at": time.time()
+    })
+    data_start = _align(_HEADER.size + len(table))
+
+    bundle_path = Path(output_path) if output_path else index_dir / BUNDLE_FILENAME
+    tmp_path = bundle_path.with_suffix(bundle_path.suffix + ".tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, len(table), zlib.crc32(table)))
+            f.write(table)
+            for section_offset, payload in payloads:
+                f.seek(data_start + section_offset)
+                f.write(payload)
+        os.replace(tmp_path, bundle_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    # Section CRCs were computed from the payloads just written, no need to re-read them at open
+    _write_verified_stamp(bundle_path, _source_stamp(bundle_path))
+    logger.info(f"Index bundle written: {bundle_path} ({len(entries)} sections, {bundle_path.stat().st_size} bytes)")
+    return bundle_path
+
+
+if __name__ == "__main__":
+    # Build a bundle for an existing index and compare cold-load times:
+    #   python -m src.game_wiki_tooltip.ai.index_bundle build|bench <index_dir>
+    import sys
+
+    if len(sys.argv) < 3 or sys.argv[1] not in ("build", "bench"):
+        print("Usage: index_bundle.py build|bench <index_dir>")
+        sys.exit(1)
+    index_dir = Path(sys.argv[2])
+    config_path = index_dir.parent / f"{index_dir.name}_config.json"
+    with open(config_path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    if sys.argv[1] == "build":
+        print(f"Bundle written: {write_index_bundle(index_dir, config)}")
+        sys.exit(0)
+
+    import faiss
+    from .enhanced_bm25_indexer import EnhancedBM25Indexer
+
+    def load_files():
+        with open(index_dir / METADATA_FILENAME, "r", encoding="utf-8") as f:
+            chunks = json.load(f)
+        indexer = EnhancedBM25Indexer(game_name=config.get("game_name", ""))
+        indexer.load_index(str(index_dir / Path(config["bm25_index_path"]).name))
+        return chunks, indexer, faiss.read_index(str(index_dir / "index.faiss"))
+
+    def load_bundle():
+        bundle = IndexBundle.open(index_dir / BUNDLE_FILENAME, verify=True)
+        chunks = bundle.chunk_store()
+        indexer = EnhancedBM25Indexer(game_name=config.get("game_name", ""))
+        indexer.load_from_bundle(bundle, chunks)
+        return chunks, indexer, bundle.array("vectors")
+
+    for label, load in (("files", load_files), ("bundle", load_bundle)):
+        timings = []
+        for _ in range(5):
+            start = time.perf_counter()
+            load()
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{index_dir.name} {label}: best {min(timings):.2f} ms, median {sorted(timings)[2]:.2f} ms")
@@ -0,0 +1,392 @@
+"""
+Local Intent Classifier Module
+==============================
+
+Features:
+1. Fast-path wiki/guide classification without an LLM call for easy queries
+   (one-word item lookups, explicit "what is" / "how to" questions)
+2. Combines IntentAwareReranker patterns, the simple keyword detection and a
+   per-game term dictionary built from the BM25 vocabulary and chunk keywords
+3. Counters for skipped LLM calls and live agreement with the LLM on deferred queries
+4. Calibration harness measuring coverage/agreement against LLM labels on a replay set
+"""
+
+import json
+import logging
+import re
+import sys
+import time
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+
+from .intent_aware_reranker import IntentAwareReranker, QueryIntent
+from .query_normalizer import normalize_query
+from .unified_query_processor import UnifiedQueryResult
+
+logger = logging.getLogger(__name__)
+
+# Keywords from the unified prompt's classification rules (kept in sync with _create_unified_prompt)
+WIKI_KEYWORDS = [
+    "what is", "info", "stats", "damage", "wiki",
+    "是什么", "信息", "数据", "属性", "介绍"
+]
+GUIDE_KEYWORDS = [
+    "how", "best", "recommend", "next", "after", "should", "build", "guide", "strategy", "tips",
+    "setup", "loadout", "combo", "synergy", "meta", "tier", "rotation", "counter", "optimal",
+    "efficient", "playstyle", "progression", "priority", "comparison", "vs", "choice", "unlock",
+    "怎么", "如何", "推荐", "下一个", "选择", "配置", "攻略", "策略", "搭配", "组合", "连击",
+    "克制", "最优", "高效", "玩法", "进阶", "优先级", "比较", "解锁", "协同"
+]
+
+# Reranker intents that signal each unified intent
+GUIDE_PATTERN_INTENTS = {
+    QueryIntent.RECOMMENDATION, QueryIntent.STRATEGY, QueryIntent.COMPARISON,
+    QueryIntent.BUILD, QueryIntent.UNLOCK
+}
+WIKI_PATTERN_INTENTS = {QueryIntent.EXPLANATION, QueryIntent.LOCATION}
+
+# A vocabulary term is "rare" (name-like) when it occurs in at most this fraction of documents
+RARE_TERM_DF = 0.05
+
+_LATIN_WORD_RE = re.compile(r"[a-z0-9]+")
+_CJK_RUN_RE = re.compile(r"[一-龥]+")
+
+
+@dataclass
+class LocalIntentDecision:
+    """Local classification outcome"""
+    intent: str  # wiki / guide / unknown
+    confidence: float
+    reason: str
+    detected_language: str
+
+
+class GameTermDictionary:
+    """Per-game terms: BM25 vocabulary with document frequencies plus chunk keyword/topic phrases"""
+
+    def __init__(self, phrases: Set[str], term_df: Dict[str, int], doc_count: int):
+        self.phrases = phrases
+        self.term_df = term_df
+        self.doc_count = max(1, doc_count)
+
+    @classmethod
+    def from_index(cls, bm25_indexer=None, chunks: Optional[List[Dict[str, Any]]] = None) -> "GameTermDictionary":
+        """
+        Build the dictionary from a loaded BM25 index and the chunk metadata
+
+        Args:
+            bm25_indexer: EnhancedBM25Indexer (its corpus_tokens give the vocabulary)
+            chunks: Chunk metadata (keywords and topics give multi-word phrases)
+        """
+        term_df = Counter()
+        corpus_tokens = getattr(bm25_indexer, "corpus_tokens", None) or []
+        for tokens in corpus_tokens:
+            term_df.update(set(tokens))
+
+        phrases = set()
+        for chunk in chunks or getattr(bm25_indexer, "documents", None) or []:
+            for keyword in chunk.get("keywords", []) or []:
+                if isinstance(keyword, str) and keyword.strip():
+                    phrases.add(normalize_query(keyword))
+            topic = chunk.get("topic")
+            if isinstance(topic, str) and topic.strip():
+                phrases.add(normalize_query(topic))
+        phrases.discard("")
+
+        return cls(phrases, dict(term_df), len(corpus_tokens))
+
+    def is_rare(self, term: str) -> bool:
+        df = self.term_df.get(term, 0)
+        return 0 < df <= max(1, self.doc_count * RARE_TERM_DF)
+
+    def __len__(self) -> int:
+        return len(self.phrases) + len(self.term_df)
+
+
+class LocalIntentClassifier:
+    """Rule-based intent classifier that answers confidently classified queries without the LLM"""
+
+    def __init__(self, confidence_threshold: float = 0.85, allow_guide_fast_path: bool = False,
+                 reranker: Optional[IntentAwareReranker] = None):
+        """
+        Initialize the classifier
+
+        Args:
+            confidence_threshold: Minimum confidence to skip the LLM call
+            allow_guide_fast_path: Also skip the LLM for guide queries (loses the LLM rewrite and
+                BM25 optimization used by retrieval, so off by default; wiki search uses the raw query)
+            reranker: Reranker whose intent patterns are reused (a new one is created if omitted)
+        """
+        self.confidence_threshold = confidence_threshold
+        self.allow_guide_fast_path = allow_guide_fast_path
+        self.reranker = reranker or IntentAwareReranker()
+        self.game_terms: Dict[str, GameTermDictionary] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            "classified": 0,
+            "skipped_llm_calls": 0,
+            "fast_path_wiki": 0,
+            "fast_path_guide": 0,
+            "deferred": 0,
+            "shadow_checked": 0,
+            "shadow_agreed": 0
+        }
+
+    def set_game_terms(self, game_name: str, dictionary: GameTermDictionary) -> None:
+        """Register the term dictionary of a game"""
+        with self._lock:
+            self.game_terms[game_name] = dictionary
+        logger.info(f"Local intent term dictionary loaded for '{game_name}': {len(dictionary.phrases)} phrases, {len(dictionary.term_df)} terms")
+
+    def decide(self, query: str, game_name: Optional[str] = None) -> LocalIntentDecision:
+        """
+        Classify a query locally (no side effects on the counters)
+
+        Args:
+            query: Raw user query
+            game_name: Vector store game name, selects the term dictionary
+
+        Returns:
+            LocalIntentDecision with intent "unknown" when no rule applies
+        """
+        query_lower = query.lower().strip()
+        normalized = normalize_query(query)
+        chinese_chars = sum(1 for char in query if '一' <= char <= '鿿')
+        detected_language = "zh" if chinese_chars > len(query) * 0.3 else "en"
+
+        latin_words = _LATIN_WORD_RE.findall(normalized)
+        cjk_runs = _CJK_RUN_RE.findall(normalized)
+
+        # Same matching as _simple_intent_detection (substring) with the prompt's keyword lists,
+        # but Latin keywords must match whole words ("vs" must not fire inside "canvas")
+        padded = f" {' '.join(latin_words)} "
+        def has_keyword(keyword: str) -> bool:
+            if keyword.isascii():
+                return f" {keyword} " in padded or (" " in keyword and keyword in query_lower)
+            return keyword in normalized
+
+        wiki_hits = [kw for kw in WIKI_KEYWORDS if has_keyword(kw)]
+        guide_hits = [kw for kw in GUIDE_KEYWORDS if has_keyword(kw)]
+
+        pattern_intents = set(self.reranker._score_intents(query_lower))
+        guide_pattern = bool(pattern_intents & GUIDE_PATTERN_INTENTS)
+        wiki_pattern = bool(pattern_intents & WIKI_PATTERN_INTENTS)
+
+        guide_signal = bool(guide_hits) or guide_pattern
+        wiki_signal = bool(wiki_hits)
+
+        if guide_signal and wiki_signal:
+            return LocalIntentDecision("unknown", 0.0, f"conflicting keywords: {wiki_hits + guide_hits}", detected_language)
+
+        if guide_signal:
+            confidence = 0.85 + (0.05 if guide_hits and guide_pattern else 0.0)
+            return LocalIntentDecision("guide", confidence, f"guide keywords {guide_hits}, patterns {guide_pattern}", detected_language)
+
+        if wiki_signal:
+            confidence = 0.85 + (0.05 if wiki_pattern else 0.0)
+            return LocalIntentDecision("wiki", confidence, f"wiki keywords {wiki_hits}", detected_language)
+
+        # Prompt rule: 1-2 word queries without guide keywords are wiki lookups
+        is_short = (len(latin_words) <= 2 and not cjk_runs) or (not latin_words and sum(map(len, cjk_runs)) <= 4)
+        if not normalized or not is_short:
+            return LocalIntentDecision("unknown", 0.0, "no rule applies", detected_language)
+
+        confidence = 0.75
+        reason = "short query without guide keywords"
+        dictionary = self.game_terms.get(game_name) if game_name else None
+        if dictionary:
+            if normalized in dictionary.phrases:
+                # Exact chunk keyword/topic: a known game entity
+                confidence = 0.95
+                reason += ", exact game term"
+            else:
+                terms = latin_words + cjk_runs
+                known = [term for term in terms if term in dictionary.term_df]
+                if terms and len(known) == len(terms) and any(dictionary.is_rare(term) for term in known):
+                    confidence = 0.9
+                    reason += ", rare game vocabulary"
+        return LocalIntentDecision("wiki", confidence, reason, detected_language)
+
+    def classify(self, query: str, game_name: Optional[str] = None) -> Tuple[LocalIntentDecision, Optional[UnifiedQueryResult]]:
+        """
+        Classify a query and build a result when the LLM call can be skipped
+
+        Returns:
+            (decision, UnifiedQueryResult or None when the LLM should be called)
+        """
+        start_time = time.time()
+        decision = self.decide(query, game_name)
+
+        confident = decision.confidence >= self.confidence_threshold and (
+            decision.intent == "wiki"
+            # Guide retrieval needs an English query, translation still requires the LLM
+            or (decision.intent == "guide" and self.allow_guide_fast_path and decision.detected_language == "en")
+        )
+
+        with self._lock:
+            self.stats["classified"] += 1
+            if confident:
+                self.stats["skipped_llm_calls"] += 1
+                self.stats[f"fast_path_{decision.intent}"] += 1
+            else:
+                self.stats["deferred"] += 1
+
+        if not confident:
+            return decision, None
+
+        result = UnifiedQueryResult(
+            original_query=query,
+            detected_language=decision.detected_language,
+            translated_query=query,
+            rewritten_query=query,
+            bm25_optimized_query=query,
+            intent=decision.intent,
+            confidence=decision.confidence,
+            search_type="keyword" if decision.intent == "wiki" else "hybrid",
+            reasoning=f"Local fast path: {decision.reason}",
+            translation_applied=False,
+            rewrite_applied=False,
+            processing_time=time.time() - start_time
+        )
+        return decision, result
+
+    def record_llm_outcome(self, decision: LocalIntentDecision, llm_intent: str) -> None:
+        """Record whether a deferred local decision agreed with the LLM (live calibration)"""
+        if decision.intent == "unknown":
+            return
+        with self._lock:
+            self.stats["shadow_checked"] += 1
+            if decision.intent == llm_intent:
+                self.stats["shadow_agreed"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get classifier statistics"""
+        with self._lock:
+            classified = self.stats["classified"]
+            checked = self.stats["shadow_checked"]
+            return {
+                **self.stats,
+                "skip_rate": self.stats["skipped_llm_calls"] / classified if classified else 0.0,
+                "shadow_agreement": self.stats["shadow_agreed"] / checked if checked else 0.0,
+                "games": list(self.game_terms)
+            }
+
+
+def load_replay_set(path: Path) -> List[Dict[str, Any]]:
+    """
+    Load a replay set of LLM-labelled queries
+
+    Accepts JSONL ({"query", "intent", optional "game"} per line) or the persisted
+    unified query cache (unified_query_cache.json), whose entries already carry the LLM intent.
+    """
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    stripped = text.lstrip()
+    if stripped.startswith("{") and '"entries"' in stripped[:200]:
+        data = json.loads(text)
+        return [
+            {"query": value["original_query"], "intent": value["intent"]}
+            for _, value, _ in data.get("entries", [])
+            if "Basic processing" not in value.get("reasoning", "")
+        ]
+
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def label_replay_set(queries: Iterable[str], llm_config=None) -> List[Dict[str, Any]]:
+    """Label queries with the unified LLM processor (one LLM call per uncached query)"""
+    from .unified_query_processor import process_query_unified
+    replay = []
+    for query in queries:
+        result = process_query_unified(query, llm_config=llm_config)
+        if "Basic processing" in result.reasoning:
+            logger.warning(f"LLM unavailable, not labelling: {query}")
+            continue
+        replay.append({"query": query, "intent": result.intent})
+    return replay
+
+
+def calibrate(replay: List[Dict[str, Any]],
+              classifier: Optional[LocalIntentClassifier] = None,
+              thresholds: Iterable[float] = (0.75, 0.8, 0.85, 0.9, 0.95)) -> Dict[str, Any]:
+    """
+    Measure agreement of the local fast path with the LLM on a replay set
+
+    For each threshold: coverage is the fraction of queries that would skip the LLM,
+    agreement is the fraction of those whose local intent matches the LLM label.
+
+    Args:
+        replay: Entries with "query", LLM "intent" and optional "game"
+        classifier: Classifier under test (game term dictionaries already set)
+        thresholds: Confidence thresholds to evaluate
+    """
+    classifier = classifier or LocalIntentClassifier()
+    decisions = [(entry, classifier.decide(entry["query"], entry.get("game"))) for entry in replay]
+
+    report = {"queries": len(replay), "thresholds": []}
+    for threshold in thresholds:
+        fast_path = [
+            (entry, decision) for entry, decision in decisions
+            if decision.confidence >= threshold and (
+                decision.intent == "wiki"
+                or (decision.intent == "guide" and classifier.allow_guide_fast_path and decision.detected_language == "en")
+            )
+        ]
+        agreed = sum(1 for entry, decision in fast_path if decision.intent == entry["intent"])
+        report["thresholds"].append({
+            "threshold": threshold,
+            "skipped_llm_calls": len(fast_path),
+            "coverage": len(fast_path) / len(replay) if replay else 0.0,
+            "agreement": agreed / len(fast_path) if fast_path else 1.0,
+            "disagreements": [
+                (entry["query"], decision.intent, entry["intent"])
+                for entry, decision in fast_path if decision.intent != entry["intent"]
+            ]
+        })
+    return report
+
+
+if __name__ == "__main__":
+    # Usage: python local_intent_classifier.py [replay.jsonl | unified_query_cache.json] [--guide]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if args:
+        replay_set = load_replay_set(Path(args[0]))
+    else:
+        # Labels follow the unified prompt's classification rules
+        replay_set = [
+            {"query": "Excalibur", "intent": "wiki"},
+            {"query": "bile titan", "intent": "wiki"},
+            {"query": "railgun damage", "intent": "wiki"},
+            {"query": "what is the eruptor", "intent": "wiki"},
+            {"query": "铁剑", "intent": "wiki"},
+            {"query": "法师是什么", "intent": "wiki"},
+            {"query": "best warbond", "intent": "guide"},
+            {"query": "how to beat bile titan", "intent": "guide"},
+            {"query": "wizard build", "intent": "guide"},
+            {"query": "what should I unlock next", "intent": "guide"},
+            {"query": "解锁了喷火器下一个选什么", "intent": "guide"},
+            {"query": "sword vs spear", "intent": "guide"},
+            {"query": "where to find the moonveil", "intent": "wiki"},
+            {"query": "tips for automatons", "intent": "guide"},
+        ]
+        # Sample term dictionary standing in for a loaded game index
+        for entry in replay_set:
+            entry["game"] = "sample"
+    classifier = LocalIntentClassifier(allow_guide_fast_path="--guide" in sys.argv)
+    classifier.set_game_terms("sample", GameTermDictionary(
+        phrases={"excalibur", "bile titan", "eruptor", "moonveil", "铁剑"},
+        term_df={"excalibur": 2, "bile": 3, "titan": 4, "railgun": 3, "damage": 40, "eruptor": 2},
+        doc_count=200
+    ))
+    report = calibrate(replay_set, classifier)
+    print(f"Replayed {report['queries']} LLM-labelled queries")
+    for row in report["thresholds"]:
+        print(f"   - threshold {row['threshold']:.2f}: skips {row['skipped_llm_calls']} LLM calls "
+              f"({row['coverage']:.1%} coverage), agreement {row['agreement']:.1%}")
+        for query, local_intent, llm_intent in row["disagreements"]:
+            print(f"        ✗ '{query}': local={local_intent}, llm={llm_intent}")
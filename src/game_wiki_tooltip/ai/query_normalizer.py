@@ -0,0 +1,215 @@
+"""
+Query Normalizer Module
+=======================
+
+Features:
+1. Canonical form of user queries for cache keys (NFKC, case folding,
+   punctuation/whitespace collapsing, full-width/half-width folding)
+2. Near-duplicate lookup by token Jaccard similarity (words for Latin text,
+   character bigrams for CJK text)
+3. Replay measurement of LLM calls saved on a query log
+"""
+
+import logging
+import re
+import sys
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_CJK_RE = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]")
+_TOKEN_RE = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]+|[^\s぀-ヿ㐀-䶿一-鿿가-힯]+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonicalize a query so trivially different spellings share one cache entry
+
+    "Best warbond?", "best warbond" and " ｂｅｓｔ  warbond " all normalize to "best warbond".
+
+    Args:
+        query: Raw user query
+
+    Returns:
+        Normalized query
+    """
+    # NFKC folds full-width ASCII/CJK punctuation and half-width katakana to their canonical forms
+    text = unicodedata.normalize("NFKC", query).casefold()
+    # Punctuation becomes a separator, then whitespace is collapsed
+    text = "".join(" " if unicodedata.category(char).startswith("P") else char for char in text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def similarity_tokens(normalized_query: str) -> Set[str]:
+    """
+    Token set used for near-duplicate matching
+
+    Latin words are kept as tokens; CJK runs are split into character bigrams,
+    since they have no word separators.
+    """
+    tokens = set()
+    for run in _TOKEN_RE.findall(normalized_query):
+        if _CJK_RE.match(run):
+            if len(run) == 1:
+                tokens.add(run)
+            else:
+                tokens.update(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.add(run)
+    return tokens
+
+
+def jaccard_similarity(a: Set[str], b: Set[str]) -> float:
+    """Jaccard similarity of two token sets"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class NearDuplicateIndex:
+    """
+    Second-level cache lookup: finds a previously seen normalized query that is
+    similar enough (token Jaccard >= threshold) to reuse its cache key
+    """
+
+    def __init__(self, threshold: float = 0.85, max_entries: int = 256):
+        """
+        Initialize the index
+
+        Args:
+            threshold: Minimum Jaccard similarity for a match
+            max_entries: Maximum number of indexed queries (least recently added dropped first)
+        """
+        self.threshold = threshold
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # normalized query -> (tokens, cache key)
+        self._postings: Dict[str, Set[str]] = {}  # token -> normalized queries containing it
+        self._lock = threading.Lock()
+
+    def add(self, normalized_query: str, cache_key: str) -> None:
+        """Index a normalized query under its cache key"""
+        tokens = similarity_tokens(normalized_query)
+        if not tokens:
+            return
+        with self._lock:
+            if normalized_query in self._entries:
+                self._remove_locked(normalized_query)
+            self._entries[normalized_query] = (tokens, cache_key)
+            for token in tokens:
+                self._postings.setdefault(token, set()).add(normalized_query)
+            while len(self._entries) > self.max_entries:
+                self._remove_locked(next(iter(self._entries)))
+
+    def _remove_locked(self, normalized_query: str) -> None:
+        tokens, _ = self._entries.pop(normalized_query)
+        for token in tokens:
+            queries = self._postings.get(token)
+            if queries is not None:
+                queries.discard(normalized_query)
+                if not queries:
+                    del self._postings[token]
+
+    def find(self, normalized_query: str) -> Optional[str]:
+        """
+        Find the cache key of the most similar indexed query
+
+        Returns:
+            Cache key, or None if no indexed query reaches the threshold
+        """
+        tokens = similarity_tokens(normalized_query)
+        if not tokens:
+            return None
+        with self._lock:
+            candidates = set()
+            for token in tokens:
+                candidates.update(self._postings.get(token, ()))
+            best_key = None
+            best_score = self.threshold
+            for candidate in candidates:
+                candidate_tokens, cache_key = self._entries[candidate]
+                score = jaccard_similarity(tokens, candidate_tokens)
+                if score >= best_score:
+                    best_key, best_score = cache_key, score
+            return best_key
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._postings.clear()
+
+
+def measure_llm_call_reduction(queries: List[str], threshold: float = 0.85) -> Dict[str, Any]:
+    """
+    Replay a query log and count the LLM calls each cache key scheme would make
+
+    Assumes an unbounded cache with no expiry, so the numbers isolate the effect of key normalization.
+
+    Args:
+        queries: Query log in arrival order
+        threshold: Jaccard threshold for the near-duplicate lookup
+
+    Returns:
+        LLM call counts for raw keys, normalized keys and normalized + near-duplicate keys
+    """
+    raw_seen = set()
+    normalized_seen = set()
+    fuzzy_seen = set()
+    fuzzy_index = NearDuplicateIndex(threshold=threshold, max_entries=max(1, len(queries)))
+    raw_calls = normalized_calls = fuzzy_calls = 0
+
+    for query in queries:
+        if query not in raw_seen:
+            raw_seen.add(query)
+            raw_calls += 1
+
+        normalized = normalize_query(query)
+        if normalized not in normalized_seen:
+            normalized_seen.add(normalized)
+            normalized_calls += 1
+
+        if normalized not in fuzzy_seen and fuzzy_index.find(normalized) is None:
+            fuzzy_calls += 1
+            fuzzy_index.add(normalized, normalized)
+        fuzzy_seen.add(normalized)
+
+    def reduction(calls: int) -> float:
+        return 1.0 - calls / raw_calls if raw_calls else 0.0
+
+    return {
+        "queries": len(queries),
+        "raw_key_calls": raw_calls,
+        "normalized_key_calls": normalized_calls,
+        "near_duplicate_calls": fuzzy_calls,
+        "normalized_reduction": reduction(normalized_calls),
+        "near_duplicate_reduction": reduction(fuzzy_calls),
+        "threshold": threshold
+    }
+
+
+if __name__ == "__main__":
+    # Usage: python query_normalizer.py [query_log.txt] [threshold]
+    # The log has one query per line, in arrival order
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], 'r', encoding='utf-8') as f:
+            log_queries = [line.rstrip("\n") for line in f if line.strip()]
+    else:
+        log_queries = [
+            "Best warbond?", "best warbond", " best  warbond ", "BEST WARBOND!!",
+            "which warbond should I buy next", "Which warbond should I buy next?",
+            "which warbond should i buy next ?", "what warbond should I buy next",
+            "bile titan怎么打", "Bile Titan怎么打？", "bile titan 怎么打",
+            "解锁了喷火器下一个选什么", "解锁了喷火器，下一个选什么？",
+            "how to beat malenia", "How to beat Malenia?", "how to beat radahn",
+            "ｍａｌｅｎｉａ build", "malenia build", "best build for strength faith",
+            "Best build for strength/faith", "how to unlock wigfrid", "How to unlock Wigfrid",
+        ]
+    threshold = float(sys.argv[2]) if len(sys.argv) > 2 else 0.85
+    stats = measure_llm_call_reduction(log_queries, threshold=threshold)
+    print(f"Replayed {stats['queries']} queries")
+    print(f"   - Raw keys: {stats['raw_key_calls']} LLM calls")
+    print(f"   - Normalized keys: {stats['normalized_key_calls']} LLM calls ({stats['normalized_reduction']:.1%} fewer)")
+    print(f"   - + near-duplicate (Jaccard >= {threshold}): {stats['near_duplicate_calls']} LLM calls ({stats['near_duplicate_reduction']:.1%} fewer)")
@@ -26,6 +26,10 @@ class LLMSettings:
     timeout: int = 30
     enable_cache: bool = True
     cache_ttl: int = 3600  # Cache TTL in seconds
+    cache_max_entries: int = 256  # Max cached query processing results (LRU eviction)
+    persist_cache: bool = True  # Keep query processing cache on disk across restarts
+    enable_fuzzy_cache: bool = False  # Reuse cached results of near-duplicate queries
+    fuzzy_cache_threshold: float = 0.85  # Token Jaccard similarity required for a near-duplicate hit
     max_retries: int = 3
     retry_delay: float = 1.0
     response_language: str = "auto"  # AI回复语言设置：auto/zh/en
@@ -61,6 +65,10 @@ class LLMSettings:
             "timeout": self.timeout,
             "enable_cache": self.enable_cache,
             "cache_ttl": self.cache_ttl,
+            "cache_max_entries": self.cache_max_entries,
+            "persist_cache": self.persist_cache,
+            "enable_fuzzy_cache": self.enable_fuzzy_cache,
+            "fuzzy_cache_threshold": self.fuzzy_cache_threshold,
             "max_retries": self.max_retries,
             "retry_delay": self.retry_delay,
             "response_language": self.response_language
@@ -84,13 +92,21 @@ class HybridSearchConfig:
     vector_weight: float = 0.5  # Same as evaluator
     bm25_weight: float = 0.5    # Same as evaluator
     rrf_k: int = 60            # RRF algorithm parameters
+    result_cache_size: int = 128  # Max cached fused results (TTL follows RAGConfig.cache_ttl)
+    speculative_retrieval: bool = True  # Retrieve on the raw query while the LLM rewrite is in flight
+    speculative_min_overlap: float = 0.6  # BM25 top-k overlap needed to reuse the speculative vector leg
+    query_embedding_cache_size: int = 256  # Max cached query embeddings (lets speculation run the vector leg)
     
     def to_dict(self) -> Dict[str, Any]:
         return {
             "fusion_method": self.fusion_method,
             "vector_weight": self.vector_weight,
             "bm25_weight": self.bm25_weight,
-            "rrf_k": self.rrf_k
+            "rrf_k": self.rrf_k,
+            "result_cache_size": self.result_cache_size,
+            "speculative_retrieval": self.speculative_retrieval,
+            "speculative_min_overlap": self.speculative_min_overlap,
+            "query_embedding_cache_size": self.query_embedding_cache_size
         }
 
 
@@ -106,6 +122,12 @@ class SummarizationConfig:
     enable_google_search: bool = True  # Enable Google search tool
     thinking_budget: int = -1  # -1 for dynamic thinking, 0 to disable, >0 for fixed budget
     api_key: Optional[str] = None  # API key for summarizer
+    context_token_budget: int = 2000  # Estimated token budget of the packed knowledge chunks
+    context_summary_max_chars: int = 600  # Chunk summaries are truncated to this length
+    answer_cache_size: int = 64  # Max cached full answers (keyed by retrieved chunk set and question)
+    answer_cache_ttl: int = 1800  # Cached answer time-to-live in seconds
+    answer_pack_enabled: bool = True  # Serve prepared offline answers (answer_pack.json) when a question matches
+    answer_pack_similarity: float = 0.92  # Minimum embedding cosine similarity for an answer pack match
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -115,7 +137,13 @@ class SummarizationConfig:
             "include_sources": self.include_sources,
             "language": self.language,
             "enable_google_search": self.enable_google_search,
-            "thinking_budget": self.thinking_budget
+            "thinking_budget": self.thinking_budget,
+            "context_token_budget": self.context_token_budget,
+            "context_summary_max_chars": self.context_summary_max_chars,
+            "answer_cache_size": self.answer_cache_size,
+            "answer_cache_ttl": self.answer_cache_ttl,
+            "answer_pack_enabled": self.answer_pack_enabled,
+            "answer_pack_similarity": self.answer_pack_similarity
         }
 
 
@@ -140,12 +168,18 @@ class QueryProcessingConfig:
     enable_query_rewrite: bool = True
     enable_intent_classification: bool = True
     unified_processing: bool = True  # Use unified processing to improve performance
+    enable_local_intent: bool = False  # Skip the unified LLM call when the local classifier is confident (opt-in: calibrate the threshold first)
+    local_intent_threshold: float = 0.85  # Minimum local confidence to skip the LLM call
+    local_intent_guide_fast_path: bool = False  # Also skip it for guide queries (no LLM rewrite for retrieval)
     
     def to_dict(self) -> Dict[str, Any]:
         return {
             "enable_query_rewrite": self.enable_query_rewrite,
             "enable_intent_classification": self.enable_intent_classification,
-            "unified_processing": self.unified_processing
+            "unified_processing": self.unified_processing,
+            "enable_local_intent": self.enable_local_intent,
+            "local_intent_threshold": self.local_intent_threshold,
+            "local_intent_guide_fast_path": self.local_intent_guide_fast_path
         }
 
 
@@ -175,6 +209,7 @@ class RAGConfig:
     top_k: int = 5
     enable_cache: bool = True
     cache_ttl: int = 3600  # Cache time (seconds)
+    engine_pool_memory_mb: int = 512  # Memory budget of loaded game engines, least recently used idle engines are evicted beyond it
     
     @classmethod
     def from_dict(cls, config_dict: Dict[str, Any]) -> "RAGConfig":
@@ -213,6 +248,8 @@ class RAGConfig:
             config.enable_cache = config_dict["enable_cache"]
         if "cache_ttl" in config_dict:
             config.cache_ttl = config_dict["cache_ttl"]
+        if "engine_pool_memory_mb" in config_dict:
+            config.engine_pool_memory_mb = config_dict["engine_pool_memory_mb"]
         
         return config
     
@@ -235,7 +272,8 @@ class RAGConfig:
             "llm_settings": self.llm_settings.to_dict(),
             "top_k": self.top_k,
             "enable_cache": self.enable_cache,
-            "cache_ttl": self.cache_ttl
+            "cache_ttl": self.cache_ttl,
+            "engine_pool_memory_mb": self.engine_pool_memory_mb
         }
     
     @classmethod
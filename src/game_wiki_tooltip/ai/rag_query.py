@@ -19,6 +19,7 @@ from pathlib import Path
 import time
 import sys
 import os
+import threading
 
 class VectorStoreUnavailableError(Exception):
     """向量存储不可用错误"""
@@ -102,24 +103,48 @@ except ImportError:
 # 导入混合检索器和BM25错误类
 try:
     from .hybrid_retriever import HybridSearchRetriever, VectorRetrieverAdapter
-    from .enhanced_bm25_indexer import BM25UnavailableError
+    from .enhanced_bm25_indexer import BM25UnavailableError, warm_up_tokenizer
     HYBRID_RETRIEVER_AVAILABLE = True
 except ImportError as e:
     HybridSearchRetriever = None
     VectorRetrieverAdapter = None
     BM25UnavailableError = Exception  # 回退到基础异常类
+    warm_up_tokenizer = None
     HYBRID_RETRIEVER_AVAILABLE = False
     logging.warning(f"混合检索器模块不可用: {e}")
 
 # 导入配置和查询重写
 from .rag_config import LLMSettings
 from .rag_config import RAGConfig, get_default_config
+from .ttl_cache import TTLCache
+from .query_normalizer import normalize_query
+from .answer_pack import AnswerPack
+from .chunk_store import load_chunk_store
+from .index_bundle import open_index_bundle
+from src.game_wiki_tooltip.core.cancellation import await_cancellable, is_cancel_requested
+from src.game_wiki_tooltip.core.file_watcher import get_file_watcher
+from src.game_wiki_tooltip.core.title_resolver import TitleResolver
 
 logger = logging.getLogger(__name__)
 
-# 向量存储映射配置的全局缓存
+# metadata.json解析为Python对象后相对文件大小的内存放大倍数（估算值）
+METADATA_MEMORY_FACTOR = 4
+
+# 初始化时并行加载并分别发布就绪状态的组件
+RAG_COMPONENTS = ("metadata", "bm25", "vectors")
+
+# 向量存储映射配置的全局缓存（由文件变更通知失效，调用时不再 stat）
 _vector_mappings_cache = None
-_vector_mappings_last_modified = None
+_vector_mappings_lock = threading.Lock()
+
+
+def _on_vector_mappings_changed(_path=None) -> None:
+    """vector_mappings.json 变化：丢弃映射缓存与编译好的标题解析器"""
+    global _vector_mappings_cache
+    with _vector_mappings_lock:
+        _vector_mappings_cache = None
+    _title_resolver.invalidate()
+
 
 def load_vector_mappings() -> Dict[str, str]:
     """
@@ -128,45 +153,53 @@ def load_vector_mappings() -> Dict[str, str]:
     Returns:
         从窗口标题到向量存储名称的映射字典
     """
-    global _vector_mappings_cache, _vector_mappings_last_modified
+    global _vector_mappings_cache
     
-    try:
-        # 使用get_resource_path正确处理打包环境
-        mapping_file = get_resource_path("assets/vector_mappings.json")
-        
-        # 检查文件是否存在
-        if not mapping_file.exists():
-            logger.warning(f"向量存储映射配置文件不存在: {mapping_file}")
-            return {}  # 返回空字典而不是None
-        
-        # 检查文件修改时间，实现缓存机制
-        current_modified = mapping_file.stat().st_mtime
-        if (_vector_mappings_cache is not None and 
-            _vector_mappings_last_modified == current_modified):
-            return _vector_mappings_cache
-        
-        # 读取配置文件
-        with open(mapping_file, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-        
-        # 构建映射字典
-        mappings = {}
-        for mapping in config.get("mappings", []):
-            vector_db_name = mapping.get("vector_db_name")
-            window_titles = mapping.get("window_titles", [])
-            
-            for title in window_titles:
-                mappings[title.lower()] = vector_db_name
-        
-        # 更新缓存
-        _vector_mappings_cache = mappings
-        _vector_mappings_last_modified = current_modified
-        
-        logger.info(f"成功加载向量存储映射配置，包含{len(mappings)}个映射")
+    mappings = _vector_mappings_cache
+    if mappings is not None:
         return mappings
-    except Exception as e:
-        logger.error(f"加载向量存储映射配置失败: {e}")
-        return {}  # 返回空字典而不是None
+    
+    with _vector_mappings_lock:
+        if _vector_mappings_cache is not None:
+            return _vector_mappings_cache
+        try:
+            # 使用get_resource_path正确处理打包环境
+            mapping_file = get_resource_path("assets/vector_mappings.json")
+            # 文件创建、修改或删除时由监视线程通知失效
+            get_file_watcher().watch(mapping_file, _on_vector_mappings_changed)
+            
+            # 检查文件是否存在
+            if not mapping_file.exists():
+                logger.warning(f"向量存储映射配置文件不存在: {mapping_file}")
+                _vector_mappings_cache = {}
+                return _vector_mappings_cache
+            
+            # 读取配置文件
+            with open(mapping_file, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+            
+            # 构建映射字典
+            mappings = {}
+            for mapping in config.get("mappings", []):
+                vector_db_name = mapping.get("vector_db_name")
+                window_titles = mapping.get("window_titles", [])
+                
+                for title in window_titles:
+                    mappings[title.lower()] = vector_db_name
+            
+            # 更新缓存
+            _vector_mappings_cache = mappings
+            
+            logger.info(f"成功加载向量存储映射配置，包含{len(mappings)}个映射")
+            return mappings
+        except Exception as e:
+            logger.error(f"加载向量存储映射配置失败: {e}")
+            return {}  # 返回空字典而不是None
+
+
+# 窗口标题 → 向量存储名称：所有标题片段编译为一个自动机，结果按完整标题记忆
+_title_resolver = TitleResolver("vector_mappings", lambda: list(load_vector_mappings().items()))
+
 
 def map_window_title_to_game_name(window_title: str) -> Optional[str]:
     """
@@ -178,26 +211,17 @@ def map_window_title_to_game_name(window_title: str) -> Optional[str]:
     Returns:
         对应的向量存储文件名（不含.json扩展名），如果未找到则返回None
     """
-    # 转换为小写进行匹配
-    title_lower = window_title.lower()
-    
-    # 加载向量存储映射配置
-    title_to_vectordb_mapping = load_vector_mappings()
-    
-    # 额外的安全检查 - 虽然load_vector_mappings()现在应该永远不会返回None
-    if not title_to_vectordb_mapping:
-        logger.warning(f"向量映射配置为空或无效")
-        return None
-    
-    # 尝试精确匹配
-    for title_key, vectordb_name in title_to_vectordb_mapping.items():
-        if title_key in title_lower:
-            logger.info(f"窗口标题'{window_title}'映射到向量存储'{vectordb_name}'")
-            return vectordb_name
+    # 重复的焦点事件只查记忆表，结果已记录过，不再重复输出日志
+    repeated = _title_resolver.is_memoized(window_title)
+    vectordb_name = _title_resolver.resolve(window_title)
+    if repeated:
+        return vectordb_name
     
-    # 如果未找到映射，记录警告并返回None
-    logger.warning(f"未找到窗口标题'{window_title}'的映射")
-    return None
+    if vectordb_name:
+        logger.info(f"窗口标题'{window_title}'映射到向量存储'{vectordb_name}'")
+    else:
+        logger.warning(f"未找到窗口标题'{window_title}'的映射")
+    return vectordb_name
 
 class EnhancedRagQuery:
     """增强的RAG查询接口，支持向量存储检索和LLM查询重写"""
@@ -231,6 +255,13 @@ class EnhancedRagQuery:
         self.vector_store_path = vector_store_path
         self.vector_store = None
         self.metadata = None
+        self.chunk_store = None  # 共享片段存储，metadata 即其 rows，BM25 检索结果引用同一批片段
+        self.index_bundle = None  # 单文件索引包（内存映射），存在时向量、BM25和片段都从中读取
+        self.bundle_vectors = None  # 索引包中的向量矩阵（零拷贝视图），存在时直接做内积检索
+        self.faiss_index = None  # 无索引包时初始化阶段读取一次的FAISS索引
+        # 各组件的就绪状态（并行加载，片段和BM25就绪后即可只用BM25检索）
+        self.component_ready = {component: threading.Event() for component in RAG_COMPONENTS}
+        self._component_listeners = []  # 组件就绪时的回调（在加载线程中调用）
         self.config = None
         self.processor = None
         self.enable_hybrid_search = enable_hybrid_search
@@ -274,6 +305,29 @@ class EnhancedRagQuery:
         }
         self.reranker = None
         
+        # 查询向量缓存：命中时推测检索也能执行向量检索，且重复查询不再调用嵌入API
+        hybrid_settings = self.rag_config.hybrid_search if self.rag_config else None
+        self.enable_speculative_retrieval = hybrid_settings.speculative_retrieval if hybrid_settings else True
+        self.query_embedding_cache = TTLCache(
+            max_size=hybrid_settings.query_embedding_cache_size if hybrid_settings else 256,
+            ttl=self.rag_config.cache_ttl if self.rag_config else 3600
+        )
+        
+        # 完整答案缓存：检索到相同片段集合的等价问题直接回放答案，不再调用摘要模型
+        summarization_settings = self.rag_config.summarization if self.rag_config else None
+        self.enable_answer_cache = self.rag_config.enable_cache if self.rag_config else True
+        self.answer_cache = TTLCache(
+            max_size=summarization_settings.answer_cache_size if summarization_settings else 64,
+            ttl=summarization_settings.answer_cache_ttl if summarization_settings else 1800
+        )
+        
+        # 离线答案包：常见问题的预生成答案，初始化时随向量库加载
+        self.enable_answer_pack = summarization_settings.answer_pack_enabled if summarization_settings else True
+        self.answer_pack_similarity = summarization_settings.answer_pack_similarity if summarization_settings else 0.92
+        self.answer_pack = None
+        # 最近一次摘要回答的来源片段与完成状态（供离线答案包构建使用）
+        self.last_answer_info = None
+        
         # 初始化摘要器
         if self.enable_summarization:
             self._initialize_summarizer()
@@ -282,12 +336,17 @@ class EnhancedRagQuery:
         if self.enable_intent_reranking:
             self._initialize_reranker()
         
-    async def initialize(self, game_name: Optional[str] = None):
+    async def initialize(self, game_name: Optional[str] = None,
+                         cancel_event: Optional[threading.Event] = None,
+                         warm_tokenizer: bool = False):
         """
         初始化RAG系统
         
         Args:
             game_name: 游戏名称，用于自动查找向量存储
+            cancel_event: 取消标志（后台预热时使用），在各加载阶段之间检查，
+                          设置后抛出 asyncio.CancelledError
+            warm_tokenizer: 是否同时加载jieba词典，避免首个中文查询时再加载
         """
         try:
             print(f"🔧 [RAG-DEBUG] 开始初始化RAG系统 - 游戏: {game_name}")
@@ -344,43 +403,51 @@ class EnhancedRagQuery:
                 logger.error(error_msg)
                 raise VectorStoreUnavailableError(error_msg)
             
-            # 加载向量存储
+            # 加载向量存储：各组件的阻塞文件读取都放到线程池，事件循环只负责等待；
+            # 向量组件（嵌入客户端、向量索引）与片段/BM25/重排序特征并行加载，
+            # 片段和BM25就绪后即可检索（向量索引未就绪时只用BM25）
             try:
-                if self.google_api_key:
-                    self.processor = BatchEmbeddingProcessor(api_key=self.google_api_key)
-                    self.vector_store = self.processor.load_vector_store(self.vector_store_path)
-                else:
-                    logger.info("以离线模式加载向量存储（未提供API密钥）")
-                    self.processor = None
-                    self.vector_store = {"metadata": None, "index_path": None}
-
-                # 加载配置和元数据
-                with open(self.vector_store_path, 'r', encoding='utf-8') as f:
-                    self.config = json.load(f)
-                if isinstance(self.vector_store, dict):
-                    self.vector_store["index_path"] = self.config.get("index_path")
-
-                if self.config["vector_store_type"] == "faiss":
-                    if isinstance(self.vector_store, dict):
-                        self.metadata = self.vector_store.get("metadata")
-                        if not self.metadata:
-                            index_dir = Path(self.vector_store_path).parent / Path(self.config["index_path"]).name
-                            metadata_path = index_dir / "metadata.json"
-                            if metadata_path.exists():
-                                with open(metadata_path, 'r', encoding='utf-8') as meta_file:
-                                    self.metadata = json.load(meta_file)
-                                self.vector_store["metadata"] = self.metadata
-                    else:
-                        self.metadata = self.vector_store["metadata"]
+                loop = asyncio.get_running_loop()
+                self._reset_component_readiness()
+                self._raise_if_cancelled(cancel_event)
+                await loop.run_in_executor(None, self._load_config_and_bundle)
+                self.game_name = game_name
                 
-                logger.info(f"Vector store loaded: {self.config['chunk_count']} chunks")
+                self._raise_if_cancelled(cancel_event)
+                if self.config["vector_store_type"] != "faiss":
+                    # Qdrant的向量存储就是检索客户端，其他组件依赖它，按顺序加载
+                    await loop.run_in_executor(None, self._load_vector_component)
+                    vectors_future = None
+                else:
+                    vectors_future = loop.run_in_executor(None, self._load_vector_component)
                 
-                # 存储来自初始参数的游戏名称
-                self.game_name = game_name
+                try:
+                    await loop.run_in_executor(None, self._load_metadata_component)
+                    self._raise_if_cancelled(cancel_event)
+                    
+                    component_futures = [
+                        loop.run_in_executor(None, self._load_rerank_features),
+                        loop.run_in_executor(None, self._load_answer_pack)
+                    ]
+                    if self.enable_hybrid_search:
+                        component_futures.append(loop.run_in_executor(None, self._initialize_hybrid_retriever))
+                    if warm_tokenizer and warm_up_tokenizer:
+                        component_futures.append(loop.run_in_executor(None, warm_up_tokenizer))
+                    results = await asyncio.gather(*component_futures, return_exceptions=True)
+                    for result in results:
+                        if isinstance(result, BaseException):
+                            raise result
+                    
+                    self._raise_if_cancelled(cancel_event)
+                    if vectors_future is not None:
+                        await vectors_future
+                except BaseException:
+                    # 等待仍在线程池中运行的向量加载结束，避免失败后它继续写入引擎状态
+                    if vectors_future is not None:
+                        await asyncio.gather(vectors_future, return_exceptions=True)
+                    raise
                 
-                # 初始化混合检索器
-                if self.enable_hybrid_search:
-                    self._initialize_hybrid_retriever()
+                logger.info(f"Vector store loaded: {self.config['chunk_count']} chunks")
                     
             except Exception as e:
                 error_msg = f"Failed to load vector store: {e}"
@@ -393,13 +460,164 @@ class EnhancedRagQuery:
         except VectorStoreUnavailableError:
             # 重新抛出向量存储特定错误
             self.is_initialized = False
+            self._reset_component_readiness()
+            raise
+        except asyncio.CancelledError:
+            self._reset_component_readiness()
             raise
         except Exception as e:
             error_msg = f"RAG system initialization failed: {e}"
             logger.error(error_msg)
             self.is_initialized = False
+            self._reset_component_readiness()
             raise VectorStoreUnavailableError(error_msg)
+
+    @staticmethod
+    def _raise_if_cancelled(cancel_event: Optional[threading.Event]):
+        """加载阶段之间的取消检查点（CancelledError 不会被 except Exception 捕获）"""
+        if cancel_event is not None and cancel_event.is_set():
+            raise asyncio.CancelledError()
+
+    def _reset_component_readiness(self):
+        for event in self.component_ready.values():
+            event.clear()
     
+    def _mark_component_ready(self, component: str):
+        """发布组件就绪状态"""
+        self.component_ready[component].set()
+        print(f"✅ [RAG-DEBUG] 组件就绪: {component}")
+        logger.info(f"RAG component ready: {component}")
+        for listener in list(self._component_listeners):
+            try:
+                listener(component)
+            except Exception as e:
+                logger.error(f"Component listener failed: {e}")
+    
+    def add_component_listener(self, callback):
+        """注册组件就绪回调 callback(component)，在完成加载的线程中调用"""
+        self._component_listeners.append(callback)
+    
+    def is_component_ready(self, component: str) -> bool:
+        """组件（metadata / bm25 / vectors）是否已加载"""
+        return self.component_ready[component].is_set()
+    
+    @property
+    def search_ready(self) -> bool:
+        """是否可以检索：初始化完成，或片段与BM25已就绪（此时向量索引可能仍在加载）"""
+        return self.is_initialized or (
+            self.hybrid_retriever is not None
+            and self.is_component_ready("metadata")
+            and self.is_component_ready("bm25")
+        )
+    
+    def _load_config_and_bundle(self):
+        """读取向量库配置，并打开单文件索引包（缺失、损坏或过期时为None）"""
+        with open(self.vector_store_path, 'r', encoding='utf-8') as f:
+            self.config = json.load(f)
+        self.index_bundle = None
+        if self.config["vector_store_type"] == "faiss":
+            self.index_bundle = open_index_bundle(self._index_dir())
+            if self.index_bundle is not None:
+                print(f"📦 [RAG-DEBUG] 使用索引包: {self.index_bundle.path}")
+    
+    def _index_dir(self) -> Path:
+        return Path(self.vector_store_path).parent / Path(self.config["index_path"]).name
+    
+    def _load_vector_component(self):
+        """加载嵌入客户端与向量索引（索引包的向量为内存映射，否则读取index.faiss一次）"""
+        if self.google_api_key:
+            self.processor = BatchEmbeddingProcessor(api_key=self.google_api_key)
+        else:
+            logger.info("以离线模式加载向量存储（未提供API密钥）")
+            self.processor = None
+        
+        if self.config["vector_store_type"] != "faiss":
+            if self.processor:
+                self.vector_store = self.processor.load_vector_store(self.vector_store_path)
+            else:
+                self.vector_store = {"metadata": None, "index_path": None}
+        elif self.index_bundle is not None and self.index_bundle.has("vectors") \
+                and self.index_bundle.json("vectors.meta").get("metric") == "ip":
+            self.bundle_vectors = self.index_bundle.array("vectors")
+        elif self.processor:
+            self.faiss_index = self._read_faiss_index()
+        self._mark_component_ready("vectors")
+    
+    def _read_faiss_index(self):
+        """读取index.faiss，文件或faiss不可用时返回None（检索时返回空结果）"""
+        index_file_path = self._resolve_faiss_index_file()
+        if not index_file_path.exists():
+            logger.error(f"FAISS index file does not exist: {index_file_path}")
+            return None
+        try:
+            import faiss
+        except ImportError:
+            logger.error("Failed to import faiss library")
+            return None
+        index = faiss.read_index(str(index_file_path))
+        logger.info(f"FAISS index loaded: {index_file_path} ({index.ntotal} vectors, dimension {index.d})")
+        return index
+    
+    def _load_metadata_component(self):
+        """加载共享片段存储（索引包中按需解码，否则读取metadata.json，同一游戏只加载一次）"""
+        if self.config["vector_store_type"] == "faiss":
+            index_dir = self._index_dir()
+            if self.index_bundle is not None:
+                self.chunk_store = self.index_bundle.chunk_store()
+                # 索引包的片段按需解码，直接作为序列使用，不一次性展开
+                self.metadata = self.chunk_store
+            elif (index_dir / "metadata.json").exists():
+                self.chunk_store = load_chunk_store(index_dir)
+                self.metadata = self.chunk_store.rows
+            elif self.google_api_key:
+                raise FileNotFoundError(f"Metadata file not found: {index_dir / 'metadata.json'}")
+            self.vector_store = {
+                "index_path": self.config.get("index_path"),
+                "metadata": self.metadata,
+                "chunk_store": self.chunk_store,
+                "config": self.config
+            }
+        elif isinstance(self.vector_store, dict):
+            self.metadata = self.vector_store.get("metadata")
+        self._mark_component_ready("metadata")
+    
+    def _load_rerank_features(self):
+        """加载索引时预计算的意图特征矩阵，重排序时按行号查表"""
+        if self.reranker and self.metadata and self.config["vector_store_type"] == "faiss":
+            self.reranker.attach_intent_features(
+                self._index_dir(), self.metadata,
+                stored_features=self.index_bundle.intent_features() if self.index_bundle else None
+            )
+    
+    def _load_answer_pack(self):
+        """加载离线答案包，来源片段已变化的答案会被丢弃"""
+        if self.enable_answer_pack and self.enable_summarization and self.metadata \
+                and self.config["vector_store_type"] == "faiss":
+            self.answer_pack = AnswerPack.load(self._index_dir(), self.metadata, self.answer_pack_similarity)
+    
+    def estimate_memory_bytes(self) -> int:
+        """
+        估算引擎常驻内存（供引擎池按内存预算淘汰）
+
+        FAISS/BM25索引与意图特征基本按文件大小常驻内存；metadata.json解析为
+        Python dict/str对象后约为文件大小的数倍，按倍数计入。
+        """
+        if not self.vector_store_path or not self.config or not self.config.get("index_path"):
+            return 0
+        index_dir = Path(self.vector_store_path).parent / Path(self.config["index_path"]).name
+        if not index_dir.exists():
+            return 0
+        if self.index_bundle is not None:
+            # 索引包按页映射，只计入文件本身（已解码的片段不在估算内）
+            return Path(self.index_bundle.path).stat().st_size
+        total = 0
+        for path in index_dir.rglob("*"):
+            if not path.is_file():
+                continue
+            size = path.stat().st_size
+            total += size * METADATA_MEMORY_FACTOR if path.name == "metadata.json" else size
+        return total
+
     def _initialize_hybrid_retriever(self):
         """
         Initialize hybrid retriever
@@ -449,13 +667,17 @@ class EnhancedRagQuery:
                 rrf_k=self.hybrid_config.get("rrf_k", 60),
                 llm_config=self.llm_config,
                 enable_unified_processing=enable_unified_processing,  # 从配置中读取
-                enable_query_rewrite=enable_query_rewrite
+                enable_query_rewrite=enable_query_rewrite,
+                rag_config=self.rag_config,
+                chunk_store=self.chunk_store,
+                index_bundle=self.index_bundle
             )
             
             if enable_unified_processing:
                 logger.info("Hybrid retriever initialized successfully (unified processing mode)")
             else:
                 logger.info("Hybrid retriever initialized successfully (independent processing mode, unified processing disabled)")
+            self._mark_component_ready("bm25")
             
         except BM25UnavailableError as e:
             # BM25特定错误，重新包装为向量存储错误
@@ -529,6 +751,65 @@ class EnhancedRagQuery:
             logger.error(f"Intent-aware reranker initialization failed: {e}")
             self.enable_intent_reranking = False
     
+    def _resolve_faiss_index_file(self) -> Path:
+        """Resolve the index.faiss path (same path logic as BatchEmbeddingProcessor._load_faiss_store)"""
+        index_path_str = self.config["index_path"]
+        if not Path(index_path_str).is_absolute():
+            # Use resource path function to build absolute path
+            vectorstore_dir = get_resource_path("ai/vectorstore")
+            index_path = vectorstore_dir / Path(index_path_str).name
+        else:
+            index_path = Path(index_path_str)
+        return index_path / "index.faiss"
+    
+    def _embed_query(self, query_text: str) -> List[float]:
+        """
+        Embed a query, reusing cached embeddings
+        
+        Args:
+            query_text: Query text
+            
+        Returns:
+            Embedding vector
+        """
+        cached = self.query_embedding_cache.get(query_text)
+        if cached is not None:
+            print(f"⚡ [VECTOR-DEBUG] Query embedding cache hit")
+            return cached
+        
+        if hasattr(self.processor, 'embedding_client'):
+            query_vector = self.processor.embedding_client.embed_query(query_text)
+        else:
+            query_vector = self.processor.embed_batch([query_text])[0]
+        if len(query_vector):
+            self.query_embedding_cache.set(query_text, list(query_vector))
+        return query_vector
+    
+    def has_cached_query_embedding(self, query_text: str) -> bool:
+        """Whether the query's embedding is cached (vector search needs no API call)"""
+        return query_text in self.query_embedding_cache
+    
+    def speculative_retrieve(self, raw_query: str) -> Optional[Dict[str, Any]]:
+        """
+        Speculatively retrieve on the raw query while LLM query rewriting is in flight
+        
+        Blocking (BM25 + optional FAISS search), run it in a worker thread.
+        
+        Args:
+            raw_query: Query exactly as the user typed it
+            
+        Returns:
+            Speculation to pass to query_stream(speculative_retrieval=...), or None if unavailable
+        """
+        if not (self.is_initialized and self.enable_speculative_retrieval and self.hybrid_retriever):
+            return None
+        try:
+            # Same depth as _search_hybrid_with_processed_query, so the legs are interchangeable
+            return self.hybrid_retriever.speculate(raw_query, vector_search_count=10, bm25_search_count=10)
+        except Exception as e:
+            logger.warning(f"Speculative retrieval failed: {e}")
+            return None
+    
     def _search_faiss(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
         """
         Use FAISS for vector search
@@ -546,6 +827,10 @@ class EnhancedRagQuery:
             print(f"⚠️ [VECTOR-DEBUG] Vector store or metadata not initialized")
             logger.warning("Vector store or metadata not initialized")
             return []
+        if not self.is_component_ready("vectors"):
+            print("⏳ [VECTOR-DEBUG] Vector index still loading, skip FAISS search (BM25 only)")
+            logger.info("Vector index still loading, skip FAISS search")
+            return []
         if not self.processor:
             print("⚠️ [VECTOR-DEBUG] Embedding processor not initialized, skip FAISS search")
             logger.warning("Embedding processor not initialized, skip FAISS search")
@@ -558,11 +843,7 @@ class EnhancedRagQuery:
             
             # Use Gemini embeddings with QUESTION_ANSWERING task type for queries
             try:
-                if hasattr(self.processor, 'embedding_client'):
-                    query_vectors = [self.processor.embedding_client.embed_query(query_text)]
-                else:
-                    query_vectors = self.processor.embed_batch([query_text])
-                query_vector = np.array(query_vectors[0], dtype=np.float32).reshape(1, -1)
+                query_vector = np.array(self._embed_query(query_text), dtype=np.float32).reshape(1, -1)
             except RuntimeError as e:
                 if "EMBEDDING_OVERLOAD" in str(e):
                     # Return a special result to notify user about overload
@@ -580,38 +861,13 @@ class EnhancedRagQuery:
                 raise
             print(f"🔢 [VECTOR-DEBUG] Query vector dimension: {query_vector.shape}, first 5 values: {query_vector[0][:5]}")
             
-            # Build correct index file path
-            # Use the same path logic as BatchEmbeddingProcessor._load_faiss_store
-            index_path_str = self.config["index_path"]
-            if not Path(index_path_str).is_absolute():
-                # Use resource path function to build absolute path
-                vectorstore_dir = get_resource_path("ai/vectorstore")
-                index_path = vectorstore_dir / Path(index_path_str).name
+            if self.bundle_vectors is not None:
+                # Vectors mapped from the index bundle: same inner-product ranking as IndexFlatIP
+                scores, indices = self._search_bundle_vectors(query_vector[0], top_k)
             else:
-                index_path = Path(index_path_str)
-            
-            index_file_path = index_path / "index.faiss"
-            print(f"📂 [VECTOR-DEBUG] FAISS index file path: {index_file_path}")
-            logger.info(f"Attempting to load FAISS index file: {index_file_path}")
-            
-            if not index_file_path.exists():
-                print(f"❌ [VECTOR-DEBUG] FAISS index file does not exist: {index_file_path}")
-                logger.error(f"FAISS index file does not exist: {index_file_path}")
-                return []
-            
-            # Load FAISS index
-            try:
-                import faiss
-            except ImportError:
-                logger.error("Failed to import faiss library")
-                print(f"❌ [VECTOR-DEBUG] Failed to import faiss library, please ensure faiss-cpu is installed")
-                return []
-            
-            index = faiss.read_index(str(index_file_path))
-            print(f"📊 [VECTOR-DEBUG] FAISS index information: total vectors={index.ntotal}, dimension={index.d}")
-            
-            # Execute search
-            scores, indices = index.search(query_vector, top_k)
+                scores, indices = self._search_faiss_index(query_vector, top_k)
+                if scores is None:
+                    return []
             print(f"🔍 [VECTOR-DEBUG] FAISS search raw results:")
             print(f"   - Retrieved indices: {indices[0]}")
             print(f"   - Similarity scores: {scores[0]}")
@@ -624,7 +880,8 @@ class EnhancedRagQuery:
                     chunk_info = {
                         "chunk": chunk,
                         "score": float(score),
-                        "rank": i + 1
+                        "rank": i + 1,
+                        "row_id": int(idx)
                     }
                     results.append(chunk_info)
                     
@@ -654,6 +911,42 @@ class EnhancedRagQuery:
             logger.error(f"FAISS search failed: {e}")
             return []
     
+    def _search_faiss_index(self, query_vector, top_k: int):
+        """Search the FAISS index loaded at initialization (read from disk if missing), returns (scores, indices) or (None, None)"""
+        if self.faiss_index is not None:
+            return self.faiss_index.search(query_vector, top_k)
+        
+        index_file_path = self._resolve_faiss_index_file()
+        print(f"📂 [VECTOR-DEBUG] FAISS index file path: {index_file_path}")
+        logger.info(f"Attempting to load FAISS index file: {index_file_path}")
+        
+        if not index_file_path.exists():
+            print(f"❌ [VECTOR-DEBUG] FAISS index file does not exist: {index_file_path}")
+            logger.error(f"FAISS index file does not exist: {index_file_path}")
+            return None, None
+        
+        # Load FAISS index
+        try:
+            import faiss
+        except ImportError:
+            logger.error("Failed to import faiss library")
+            print(f"❌ [VECTOR-DEBUG] Failed to import faiss library, please ensure faiss-cpu is installed")
+            return None, None
+        
+        index = faiss.read_index(str(index_file_path))
+        print(f"📊 [VECTOR-DEBUG] FAISS index information: total vectors={index.ntotal}, dimension={index.d}")
+        
+        # Execute search
+        return index.search(query_vector, top_k)
+    
+    def _search_bundle_vectors(self, query_vector, top_k: int):
+        """Inner-product top-k over the bundle vectors, shaped like faiss search output"""
+        scores = self.bundle_vectors @ query_vector
+        top_k = min(top_k, scores.shape[0])
+        indices = np.argpartition(-scores, top_k - 1)[:top_k]
+        indices = indices[np.argsort(-scores[indices], kind="stable")]
+        return scores[indices].reshape(1, -1), indices.reshape(1, -1)
+    
     def _search_qdrant(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
         """
         Use Qdrant for vector search
@@ -682,11 +975,7 @@ class EnhancedRagQuery:
             print(f"📄 [VECTOR-DEBUG] Query text for embedding: '{query_text[:100]}...'")
             
             # Use Gemini embeddings with QUESTION_ANSWERING task type for queries
-            if hasattr(self.processor, 'embedding_client'):
-                query_vectors = [self.processor.embedding_client.embed_query(query_text)]
-            else:
-                query_vectors = self.processor.embed_batch([query_text])
-            query_vector = query_vectors[0]
+            query_vector = self._embed_query(query_text)
             print(f"🔢 [VECTOR-DEBUG] Query vector dimension: {len(query_vector)}, first 5 values: {query_vector[:5]}")
             
             # Execute search
@@ -734,13 +1023,14 @@ class EnhancedRagQuery:
             logger.error(f"Qdrant search failed: {e}")
             return []
 
-    def _search_hybrid_with_processed_query(self, unified_query_result, top_k: int = 3) -> Dict[str, Any]:
+    def _search_hybrid_with_processed_query(self, unified_query_result, top_k: int = 3, speculative_retrieval: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Use preprocessed unified query results for hybrid search
         
         Args:
             unified_query_result: Unified query processing result object
             top_k: Number of results to return
+            speculative_retrieval: Result of speculative_retrieve() on the raw query (optional)
             
         Returns:
             Hybrid search results (including metadata)
@@ -782,36 +1072,20 @@ class EnhancedRagQuery:
             print(f"   - Semantic query: '{unified_query_result.rewritten_query}'")
             print(f"   - BM25 query: '{unified_query_result.bm25_optimized_query}'")
             
-            # Manually execute hybrid search process, using preprocessed query
-            # Vector search uses rewritten query
+            # Vector search uses rewritten query, BM25 search uses optimized query
             vector_search_count = 10
             bm25_search_count = 10
-            
-            print(f"🔍 [HYBRID-DEBUG] Starting vector search: query='{unified_query_result.rewritten_query}', top_k={vector_search_count}")
-            vector_results = self.hybrid_retriever.vector_retriever.search(unified_query_result.rewritten_query, vector_search_count)
-            print(f"📊 [HYBRID-DEBUG] Vector search results count: {len(vector_results)}")
-            
-            # BM25 search uses optimized query
-            bm25_results = []
-            if self.hybrid_retriever.bm25_indexer:
-                print(f"🔍 [HYBRID-DEBUG] Starting BM25 search:")
-                print(f"   - Original query: '{unified_query_result.original_query}'")
-                print(f"   - Semantic query: '{unified_query_result.rewritten_query}'")
-                print(f"   - BM25 optimized: '{unified_query_result.bm25_optimized_query}'")
-                print(f"   - Search count: {bm25_search_count}")
-                
-                bm25_results = self.hybrid_retriever.bm25_indexer.search(unified_query_result.bm25_optimized_query, bm25_search_count)
-                print(f"📊 [HYBRID-DEBUG] BM25 search results count: {len(bm25_results)}")
-            else:
-                print(f"⚠️ [HYBRID-DEBUG] BM25 indexer not initialized, skipping BM25 search")
-            
-            # Score fusion
             final_result_count = 5
-            print(f"🔄 [HYBRID-DEBUG] Starting score fusion: method={self.hybrid_retriever.fusion_method}")
-            
-            final_results = self.hybrid_retriever._fuse_results(vector_results, bm25_results, final_result_count)
             
-            print(f"✅ [HYBRID-DEBUG] Score fusion completed, final results count: {len(final_results)}")
+            final_results, vector_count, bm25_count, cache_hit = self.hybrid_retriever.retrieve_fused(
+                unified_query_result.rewritten_query,
+                unified_query_result.bm25_optimized_query,
+                vector_search_count=vector_search_count,
+                bm25_search_count=bm25_search_count,
+                final_result_count=final_result_count,
+                original_query=unified_query_result.original_query,
+                speculative=speculative_retrieval
+            )
             
             # Build return results
             return {
@@ -830,15 +1104,24 @@ class EnhancedRagQuery:
                 },
                 "metadata": {
                     "fusion_method": self.hybrid_retriever.fusion_method,
-                    "vector_results_count": len(vector_results),
-                    "bm25_results_count": len(bm25_results),
+                    "vector_results_count": vector_count,
+                    "bm25_results_count": bm25_count,
                     "final_results_count": len(final_results),
+                    "result_cache_hit": cache_hit,
                     "vector_search_count": vector_search_count,
                     "bm25_search_count": bm25_search_count,
                     "target_final_count": final_result_count,
+                    "speculation": {
+                        "reused_legs": speculative_retrieval.get("reused_legs", []),
+                        "rerun_legs": speculative_retrieval.get("rerun_legs", []),
+                        "bm25_overlap": speculative_retrieval.get("bm25_overlap")
+                    } if speculative_retrieval else None,
                     "processing_stats": {
                         "preprocessed_mode": True,
-                        "avoided_duplicate_processing": True
+                        "avoided_duplicate_processing": True,
+                        "result_cache": self.hybrid_retriever.result_cache.get_stats(),
+                        "query_embedding_cache": self.query_embedding_cache.get_stats(),
+                        "answer_cache": self.answer_cache.get_stats()
                     }
                 }
             }
@@ -948,7 +1231,7 @@ class EnhancedRagQuery:
         
         return "\n".join(answer_parts)
 
-    async def _format_answer_with_summary_stream(self, search_response: Dict[str, Any], question: str, original_query: str = None) -> AsyncGenerator[str, None]:
+    async def _format_answer_with_summary_stream(self, search_response: Dict[str, Any], question: str, original_query: str = None, stop_flag=None) -> AsyncGenerator[str, None]:
         """
         Use Gemini summarizer to format search results in streaming mode
         
@@ -956,6 +1239,7 @@ class EnhancedRagQuery:
             search_response: Search response (contains results and metadata)
             question: Original question
             original_query: Original query
+            stop_flag: Optional stop flag, checked by the summarizer at every await
             
         Yields:
             Streaming summary content
@@ -970,11 +1254,14 @@ class EnhancedRagQuery:
             print(f"🌊 [RAG-STREAM-DEBUG] Starting streaming summary formatting")
             print(f"   - Number of search results: {len(results)}")
             
-            # Build summary data
+            # Build summary data (the score decides which chunks survive context packing)
             chunks = []
             for result in results:
                 chunk = result.get("chunk", result)
+                if chunk is not result and "score" in result:
+                    chunk = {**chunk, "score": result["score"]}
                 chunks.append(chunk)
+            intent = results[0].get("detected_intent")
             
             # Extract game context
             game_context = None
@@ -1002,17 +1289,45 @@ class EnhancedRagQuery:
             if game_context and hasattr(self.summarizer, 'current_game_name'):
                 self.summarizer.current_game_name = game_context
             
+            # Answer cache: replay an earlier answer for the same chunk set and question
+            cache_key = self._answer_cache_key(results, question, original_query)
+            cached_answer = self.answer_cache.get(cache_key) if cache_key else None
+            self.last_answer_info = {
+                "chunk_ids": [chunk.get("chunk_id") for chunk in chunks],
+                "language": self.summarizer.resolve_response_language(question),
+                "model": self.summarizer.config.model_name,
+                "succeeded": bool(cached_answer)
+            }
+            if cached_answer:
+                print(f"💾 [RAG-STREAM-DEBUG] Answer cache hit, replaying {len(cached_answer)} chunks")
+                async for chunk in self._replay_cached_answer(cached_answer, stop_flag):
+                    yield chunk
+                return
+            
             # Call summarizer to generate structured reply
             print(f"🚀 [RAG-STREAM-DEBUG] Calling summarizer")
+            answer_chunks = []
+            stream_outcome = {"succeeded": False}
             async for chunk in self.summarizer.summarize_chunks_stream(
                 chunks=chunks,
                 query=question,
                 original_query=original_query,
-                context=game_context
+                context=game_context,
+                stop_flag=stop_flag,
+                intent=intent,
+                outcome=stream_outcome
             ):
                 print(f"📦 [RAG-STREAM-DEBUG] Received summary chunk: {len(chunk)} characters")
+                answer_chunks.append(chunk)
                 yield chunk
             
+            # Only complete answers are cached: stopped streams and error messages never are
+            succeeded = bool(answer_chunks) and stream_outcome["succeeded"] and not is_cancel_requested(stop_flag)
+            self.last_answer_info["succeeded"] = succeeded
+            if cache_key and succeeded:
+                self.answer_cache.set(cache_key, answer_chunks)
+                print(f"💾 [RAG-STREAM-DEBUG] Cached answer ({len(answer_chunks)} chunks)")
+            
             print(f"✅ [RAG-STREAM-DEBUG] Streaming summary formatting completed")
             
         except Exception as e:
@@ -1022,6 +1337,66 @@ class EnhancedRagQuery:
             yield "😅 Sorry, I encountered a problem while organizing information. Let me answer you in a simple way:\n\n"
             yield self._format_simple_answer(results)
 
+    def _answer_cache_key(self, results: List[Dict[str, Any]], question: str, original_query: Optional[str]) -> Optional[tuple]:
+        """
+        Answer cache key: (game, index version, sorted fused chunk IDs, normalized question, language, model)
+        
+        Returns None when the answer must not be cached (cache disabled, or no index version to
+        invalidate against outside hybrid search, or an error result such as a model overload notice).
+        """
+        if not self.enable_answer_cache or not self.summarizer or not self.hybrid_retriever:
+            return None
+        if any(r.get("error") for r in results):
+            return None
+        try:
+            index_version = self.hybrid_retriever.get_index_version()
+        except Exception as e:
+            logger.debug(f"Index version unavailable, answer not cacheable: {e}")
+            return None
+        
+        chunk_ids = []
+        for result in results:
+            chunk_id = result.get("row_id", result.get("chunk", result).get("chunk_id"))
+            if chunk_id is None:
+                return None
+            chunk_ids.append(str(chunk_id))
+        
+        return (
+            getattr(self, "game_name", None),
+            index_version,
+            tuple(sorted(chunk_ids)),
+            normalize_query(original_query or question),
+            self.summarizer.resolve_response_language(question),
+            self.summarizer.config.model_name
+        )
+    
+    def match_answer_pack(self, question: str, original_query: Optional[str] = None,
+                          embedding: Optional[List[float]] = None):
+        """
+        Match a question against the offline answer pack
+        
+        Args:
+            question: Processed (retrieval) query
+            original_query: Original user query
+            embedding: Embedding of question for the similarity match, None to match keys only
+            
+        Returns:
+            (PackedAnswer, match type, similarity), or None
+        """
+        if not self.answer_pack or not self.summarizer:
+            return None
+        language = self.summarizer.resolve_response_language(question)
+        return self.answer_pack.match([original_query, question], language, embedding=embedding)
+    
+    async def _replay_cached_answer(self, answer_chunks: List[str], stop_flag=None) -> AsyncGenerator[str, None]:
+        """Replay a cached answer as a stream, so the UI path is the same as for a live answer"""
+        for chunk in answer_chunks:
+            if is_cancel_requested(stop_flag):
+                print(f"🛑 [RAG-STREAM-DEBUG] Stop requested, cached answer replay interrupted")
+                return
+            yield chunk
+            await asyncio.sleep(0)
+    
     def _format_simple_answer(self, results: List[Dict[str, Any]]) -> str:
         """简单格式化答案（摘要失败时的回退方案）"""
         if not results:
@@ -1036,7 +1411,7 @@ class EnhancedRagQuery:
         
         return f"About {topic}:\n{summary}"
 
-    async def query_stream(self, question: str, top_k: int = 3, original_query: str = None, unified_query_result = None) -> AsyncGenerator[str, None]:
+    async def query_stream(self, question: str, top_k: int = 3, original_query: str = None, unified_query_result = None, speculative_retrieval: Optional[Dict[str, Any]] = None, stop_flag=None, use_answer_pack: bool = True) -> AsyncGenerator[str, None]:
         """
         Execute streaming RAG query
         
@@ -1045,21 +1420,40 @@ class EnhancedRagQuery:
             top_k: Number of search results
             original_query: Original query
             unified_query_result: Preprocessed unified query result (from assistant_integration)
+            speculative_retrieval: Speculative retrieval on the raw query (from speculative_retrieve)
+            stop_flag: Optional stop flag, lets a stop interrupt the summary stream mid-request
+            use_answer_pack: Serve a prepared answer from the offline answer pack when the question matches
             
         Yields:
             Streaming answer content
         """
-        if not self.is_initialized:
+        if not self.search_ready:
             await self.initialize()
             
-        # If initialization fails, return fallback information
-        if not self.is_initialized or not self.vector_store:
+        # If initialization fails, return fallback information (BM25-only search is served while vectors load)
+        if not self.search_ready or not self.vector_store:
             print(f"❌ [RAG-STREAM-DEBUG] RAG system not initialized correctly, switch to wiki mode")
             yield "Sorry, the guide query system encountered an issue, please try again later."
             return
             
         start_time = time.time()
         
+        # Offline answer pack: a prepared answer replaces retrieval and summarization
+        if use_answer_pack and self.answer_pack:
+            embedding = None
+            if self.answer_pack.has_embeddings and self.processor:
+                try:
+                    embedding = await await_cancellable(asyncio.to_thread(self._embed_query, question), stop_flag)
+                except Exception as e:
+                    logger.debug(f"Query embedding for answer pack failed, matching keys only: {e}")
+            match = self.match_answer_pack(question, original_query, embedding=embedding)
+            if match:
+                entry, match_type, similarity = match
+                print(f"📚 [RAG-STREAM-DEBUG] Answer pack hit ({match_type}, similarity {similarity:.3f}): '{entry.question}'")
+                async for chunk in self._replay_cached_answer(entry.answer, stop_flag):
+                    yield chunk
+                return
+        
         try:
             print(f"🌊 [RAG-STREAM-DEBUG] Starting streaming RAG query: '{question}'")
             if unified_query_result:
@@ -1076,7 +1470,14 @@ class EnhancedRagQuery:
                     print(f"🔍 [RAG-STREAM-DEBUG] Using hybrid search")
                     # If there is a preprocessed result, pass it to hybrid search
                     if unified_query_result:
-                        search_response = self._search_hybrid_with_processed_query(unified_query_result, top_k)
+                        # Retrieval (including the query embedding request) runs off the event loop, a stop returns at once
+                        search_response = await await_cancellable(
+                            asyncio.to_thread(
+                                self._search_hybrid_with_processed_query,
+                                unified_query_result, top_k, speculative_retrieval=speculative_retrieval
+                            ),
+                            stop_flag
+                        )
                     
                     results = search_response.get("results", [])
                     
@@ -1101,7 +1502,7 @@ class EnhancedRagQuery:
                     
                     if self.enable_summarization and self.summarizer and len(results) > 0:
                         print(f"💬 [RAG-STREAM-DEBUG] Using Gemini streaming summary to format answer")
-                        async for chunk in self._format_answer_with_summary_stream(search_response, question, original_query=original_query):
+                        async for chunk in self._format_answer_with_summary_stream(search_response, question, original_query=original_query, stop_flag=stop_flag):
                             yield chunk
                     else:
                         print(f"💬 [RAG-STREAM-DEBUG] Using original format to format answer")
@@ -1117,10 +1518,8 @@ class EnhancedRagQuery:
                 else:
                     # Single vector search
                     print(f"🔍 [RAG-STREAM-DEBUG] Using single vector search")
-                    if self.config["vector_store_type"] == "faiss":
-                        results = self._search_faiss(question, top_k)
-                    else:
-                        results = self._search_qdrant(question, top_k)
+                    search = self._search_faiss if self.config["vector_store_type"] == "faiss" else self._search_qdrant
+                    results = await await_cancellable(asyncio.to_thread(search, question, top_k), stop_flag)
                     
                     # Apply intent-aware reranking
                     if self.enable_intent_reranking and self.reranker and results:
@@ -1157,7 +1556,7 @@ class EnhancedRagQuery:
                     
                     if self.enable_summarization and self.summarizer and len(results) > 0:
                         print(f"💬 [RAG-STREAM-DEBUG] Using Gemini streaming summary to format answer")
-                        async for chunk in self._format_answer_with_summary_stream(search_response, question, original_query=original_query):
+                        async for chunk in self._format_answer_with_summary_stream(search_response, question, original_query=original_query, stop_flag=stop_flag):
                             yield chunk
                     else:
                         print(f"💬 [RAG-STREAM-DEBUG] Using original format to format answer")
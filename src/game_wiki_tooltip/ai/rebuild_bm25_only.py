@@ -253,6 +253,17 @@ def rebuild_bm25_for_game(game_name: str) -> bool:
                 json.dump(config, f, ensure_ascii=False, indent=2)
             
             logger.info(f"📝 更新配置文件: {config_file}")
+            
+            # 重新生成索引包，否则旧索引包会因源文件变化被忽略
+            try:
+                from src.game_wiki_tooltip.ai.index_bundle import write_index_bundle
+                bundle_path = write_index_bundle(game_dir, config)
+                logger.info(f"📦 更新索引包: {bundle_path}")
+            except Exception as e:
+                logger.warning(f"⚠️ 索引包生成失败，将逐个加载索引文件: {e}")
+                # 旧索引包对应重建前的索引，删除以免继续被加载
+                from src.game_wiki_tooltip.ai.index_bundle import remove_index_bundle
+                remove_index_bundle(game_dir)
         
         # 获取统计信息
         stats = bm25_indexer.get_stats()
@@ -0,0 +1,240 @@
+"""
+TTL + LRU Cache Module
+======================
+
+Features:
+1. Bounded in-memory cache with least-recently-used eviction
+2. Per-entry time-to-live expiration
+3. Hit/miss/eviction statistics for the processing stats reports
+4. Thread safe (retrieval runs on worker threads as well as the event loop)
+5. Optional JSON persistence so entries survive restarts, written in the background
+   after a short quiet period and flushed at exit
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a fixed TTL"""
+
+    def __init__(self,
+                 max_size: int = 128,
+                 ttl: float = 3600,
+                 persist_path: Optional[Path] = None,
+                 serializer: Optional[Callable[[Any], Any]] = None,
+                 deserializer: Optional[Callable[[Any], Any]] = None,
+                 save_delay: float = 5.0):
+        """
+        Initialize the cache
+
+        Args:
+            max_size: Maximum number of entries, least recently used entries are evicted first
+            ttl: Entry time-to-live in seconds (<= 0 disables expiration)
+            persist_path: Optional JSON file the cache is loaded from and saved to (keys must be strings)
+            serializer: Converts a value to a JSON-serializable object when persisting
+            deserializer: Converts a persisted object back to a value
+            save_delay: Seconds after the first unsaved change before the persisted file is rewritten,
+                so a burst of inserts costs one background write instead of one per insert
+        """
+        self.max_size = max(1, int(max_size))
+        self.ttl = ttl
+        self.persist_path = Path(persist_path) if persist_path else None
+        self._serializer = serializer or (lambda value: value)
+        self._deserializer = deserializer or (lambda data: data)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self.save_delay = max(0.0, save_delay)
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evictions": 0,
+            "invalidations": 0
+        }
+
+        if self.persist_path:
+            self.load()
+            # Weak reference so the exit hook does not keep discarded caches alive
+            self_ref = weakref.ref(self)
+            atexit.register(lambda: self_ref() is not None and self_ref().flush())
+
+    def _is_expired(self, stored_at: float, now: float) -> bool:
+        return bool(self.ttl and self.ttl > 0 and now - stored_at > self.ttl)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None on miss/expiry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+
+            value, stored_at = entry
+            if self._is_expired(stored_at, time.time()):
+                del self._entries[key]
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store value under key, evicting expired and then least recently used entries when full"""
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            self._purge_expired_locked()
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+        self._schedule_save()
+
+    def purge_expired(self) -> int:
+        """Proactively drop all expired entries, returns the number removed"""
+        with self._lock:
+            return self._purge_expired_locked()
+
+    def _purge_expired_locked(self) -> int:
+        now = time.time()
+        expired_keys = [key for key, (_, stored_at) in self._entries.items() if self._is_expired(stored_at, now)]
+        for key in expired_keys:
+            del self._entries[key]
+        self.stats["expired"] += len(expired_keys)
+        return len(expired_keys)
+
+    def _schedule_save(self) -> None:
+        """Mark the persisted file stale and start the background save timer if none is pending"""
+        if not self.persist_path:
+            return
+        with self._lock:
+            self._dirty = True
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(self.save_delay, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self) -> bool:
+        """Save now if there are unsaved changes, returns whether the file is up to date"""
+        with self._lock:
+            timer, self._save_timer = self._save_timer, None
+            dirty, self._dirty = self._dirty, False
+        if timer is not None:
+            timer.cancel()
+        if not dirty:
+            return True
+        if self.save():
+            return True
+        with self._lock:
+            self._dirty = True
+        return False
+
+    def save(self) -> bool:
+        """Write unexpired entries to persist_path (atomic replace), returns success"""
+        if not self.persist_path:
+            return False
+        with self._lock:
+            self._purge_expired_locked()
+            entries = [
+                [key, self._serializer(value), stored_at]
+                for key, (value, stored_at) in self._entries.items()
+            ]
+        with self._save_lock:
+            try:
+                self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.persist_path.with_suffix(self.persist_path.suffix + ".tmp")
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({"version": 1, "entries": entries}, f, ensure_ascii=False)
+                os.replace(tmp_path, self.persist_path)
+                return True
+            except Exception as e:
+                logger.warning(f"Failed to persist cache to {self.persist_path}: {e}")
+                return False
+
+    def load(self) -> int:
+        """Load unexpired entries from persist_path, returns the number loaded"""
+        if not self.persist_path or not self.persist_path.exists():
+            return 0
+        try:
+            with open(self.persist_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Failed to load persisted cache {self.persist_path}: {e}")
+            return 0
+
+        now = time.time()
+        loaded = 0
+        with self._lock:
+            # Entries were saved in LRU order, oldest first
+            for key, value, stored_at in data.get("entries", []):
+                if self._is_expired(stored_at, now):
+                    continue
+                try:
+                    self._entries[key] = (self._deserializer(value), stored_at)
+                except Exception as e:
+                    logger.debug(f"Skipping unreadable cache entry: {e}")
+                    continue
+                self._entries.move_to_end(key)
+                loaded += 1
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        logger.info(f"Loaded {loaded} cached entries from {self.persist_path}")
+        return loaded
+
+    def clear(self) -> None:
+        """Drop all entries (counted as one invalidation)"""
+        with self._lock:
+            if self._entries:
+                logger.debug(f"Invalidating {len(self._entries)} cached entries")
+            self._entries.clear()
+            self.stats["invalidations"] += 1
+
+        self._schedule_save()
+
+    def items(self) -> list:
+        """Snapshot of unexpired (key, value) pairs, least recently used first"""
+        with self._lock:
+            now = time.time()
+            return [
+                (key, value) for key, (value, stored_at) in self._entries.items()
+                if not self._is_expired(stored_at, now)
+            ]
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Check for an unexpired entry without touching LRU order or statistics"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not self._is_expired(entry[1], time.time())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "persistent": self.persist_path is not None,
+                "hit_rate": self.stats["hits"] / lookups if lookups else 0.0
+            }
@@ -5,18 +5,41 @@ Unified Query Processor - Complete Multiple Tasks in One LLM Call
 Combine query translation, rewriting, and intent analysis into a single LLM call to improve response speed
 """
 
+import asyncio
 import json
 import hashlib
+import random
 import time
 import logging
+from pathlib import Path
 from typing import Dict, Any, Optional, Literal
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict, replace
 
 from .rag_config import LLMSettings
 from .rag_config import RAGConfig, get_default_config
+from .ttl_cache import TTLCache
+from .query_normalizer import normalize_query, NearDuplicateIndex
+from .gemini_client_registry import get_client_registry_stats
+from src.game_wiki_tooltip.core.single_flight import get_single_flight
+# Stop flags: CancellationToken wakes waits immediately, callables / is_set() objects are polled
+from src.game_wiki_tooltip.core.cancellation import await_cancellable
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever _create_unified_prompt changes, so cached (and persisted) results from the old prompt are not reused
+PROMPT_VERSION = "unified-v1"
+
+
+def _default_cache_path() -> Optional[Path]:
+    """Persistent query cache location in the app data directory (None if unavailable)"""
+    try:
+        from src.game_wiki_tooltip.core.utils import APPDATA_DIR
+        return Path(APPDATA_DIR) / "cache" / "unified_query_cache.json"
+    except Exception as e:
+        logger.debug(f"App data directory unavailable, query cache will not be persisted: {e}")
+        return None
+
+
 @dataclass
 class UnifiedQueryResult:
     """Unified query processing result"""
@@ -46,13 +69,33 @@ class UnifiedQueryProcessor:
             self.rag_config = None
         self.llm_client = None
         
-        # Cache mechanism
-        self.query_cache = {}
+        # Cache mechanism: bounded LRU with TTL, optionally persisted across restarts
+        persist_path = _default_cache_path() if self.llm_config.persist_cache else None
+        self.query_cache = TTLCache(
+            max_size=self.llm_config.cache_max_entries,
+            ttl=self.llm_config.cache_ttl,
+            persist_path=persist_path,
+            serializer=asdict,
+            deserializer=lambda data: UnifiedQueryResult(**data)
+        )
+        
+        # Optional second-level lookup for near-duplicate queries
+        self.near_duplicate_index = None
+        if self.llm_config.enable_fuzzy_cache:
+            self.near_duplicate_index = NearDuplicateIndex(
+                threshold=self.llm_config.fuzzy_cache_threshold,
+                max_entries=self.llm_config.cache_max_entries
+            )
+            for cache_key, cached in self.query_cache.items():
+                self.near_duplicate_index.add(self._normalize_query(cached.original_query), cache_key)
+        
+        # Identical concurrent queries (hotkey double-press, voice auto-send) share one LLM call
+        self.single_flight = get_single_flight("unified_query")
         
-        # Statistics
+        # Processing statistics (cache hits/misses are tracked by query_cache)
         self.stats = {
             "total_queries": 0,
-            "cache_hits": 0,
+            "near_duplicate_hits": 0,
             "successful_processing": 0,
             "failed_processing": 0,
             "average_processing_time": 0.0
@@ -80,14 +123,14 @@ class UnifiedQueryProcessor:
     def _initialize_gemini_client(self):
         """Initialize Gemini client"""
         try:
-            from google import genai
+            from .gemini_client_registry import get_gemini_client
             
             api_key = self.llm_config.get_api_key()
             if not api_key:
                 raise ValueError("Gemini API key not found")
             
-            # Create client instance with API key (new API)
-            self.llm_client = genai.Client(api_key=api_key)
+            # Shared client per (API key, endpoint), keeps its connection pool across processors
+            self.llm_client = get_gemini_client(api_key, self.llm_config.resolved_base_url())
             
             # Store model configuration for later use
             self.model_name = self.llm_config.model
@@ -100,32 +143,49 @@ class UnifiedQueryProcessor:
             logger.error(f"Gemini client initialization failed: {e}")
             raise
 
+    def _normalize_query(self, query: str) -> str:
+        """Normalize query for cache lookups (case, width, punctuation and whitespace insensitive)"""
+        return normalize_query(query)
+    
     def _generate_cache_key(self, query: str) -> str:
-        """Generate cache key"""
-        return hashlib.md5(f"{query}_{self.llm_config.model}".encode()).hexdigest()
+        """Generate cache key from (normalized query, model, prompt version)"""
+        key_source = json.dumps([self._normalize_query(query), self.llm_config.model, PROMPT_VERSION], ensure_ascii=False)
+        return hashlib.md5(key_source.encode("utf-8")).hexdigest()
     
     def _get_cached_result(self, query: str) -> Optional[UnifiedQueryResult]:
         """Get cached result"""
         if not self.llm_config.enable_cache:
             return None
-            
-        cache_key = self._generate_cache_key(query)
-        if cache_key in self.query_cache:
-            cached_data, timestamp = self.query_cache[cache_key]
-            if time.time() - timestamp < self.llm_config.cache_ttl:
-                self.stats["cache_hits"] += 1
-                return cached_data
-            else:
-                del self.query_cache[cache_key]
-        return None
+        cached = self.query_cache.get(self._generate_cache_key(query))
+        if cached is None and self.near_duplicate_index is not None:
+            similar_key = self.near_duplicate_index.find(self._normalize_query(query))
+            if similar_key:
+                cached = self.query_cache.get(similar_key)
+                if cached is not None:
+                    self.stats["near_duplicate_hits"] += 1
+                    logger.info(f"Near-duplicate cache hit: '{query}' -> '{cached.original_query}'")
+        if cached is not None and cached.original_query != query:
+            # Normalized/near-duplicate hits share the processing, but keep the caller's own query text
+            cached = replace(cached, original_query=query)
+        return cached
     
     def _cache_result(self, query: str, result: UnifiedQueryResult):
         """Cache result"""
         if not self.llm_config.enable_cache:
             return
-            
         cache_key = self._generate_cache_key(query)
-        self.query_cache[cache_key] = (result, time.time())
+        self.query_cache.set(cache_key, result)
+        if self.near_duplicate_index is not None:
+            self.near_duplicate_index.add(self._normalize_query(query), cache_key)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get processing and cache statistics"""
+        return {
+            **self.stats,
+            "cache": self.query_cache.get_stats(),
+            "single_flight": self.single_flight.get_stats(),
+            "gemini_clients": get_client_registry_stats()
+        }
     
     def _create_unified_prompt(self, query: str) -> str:
         """Create unified processing prompt"""
@@ -230,25 +290,105 @@ This is a specialized query designed to enhance important game terms while prese
         
         return prompt
     
+    def _parse_llm_response_text(self, response_text: str) -> Dict:
+        """Strip markdown fences and parse the JSON response"""
+        response_text = response_text.strip()
+        if response_text.startswith('```json'):
+            response_text = response_text[7:-3]
+        elif response_text.startswith('```'):
+            response_text = response_text[3:-3]
+        return json.loads(response_text)
+    
+    def _build_generation_config(self):
+        """Build Gemini generation config"""
+        from google.genai import types
+        
+        return types.GenerateContentConfig(
+            temperature=self.generation_config['temperature'],
+            max_output_tokens=self.llm_config.max_tokens
+        )
+    
+    def _async_client(self):
+        """
+        Gemini async API bound to the running event loop
+        
+        A genai.Client's async HTTP pool belongs to the loop it was first used on. Queries run on the
+        shared query loop (RAGIntegration.async_worker), so the registry's client for that loop and its
+        warm connection are reused across queries; calls from any other loop get a client of their own.
+        """
+        from .gemini_client_registry import get_gemini_aio_client
+        return get_gemini_aio_client(self.llm_config.get_api_key(), self.llm_config.resolved_base_url())
+    
+    async def _await_unless_stopped(self, coro, timeout: float, stop_flag=None):
+        """
+        Await coro with a timeout, cancelling it as soon as stop_flag fires
+        
+        Raises:
+            asyncio.TimeoutError: When the timeout elapses
+            asyncio.CancelledError: When stop_flag fires
+        """
+        return await await_cancellable(coro, stop_flag, timeout=timeout)
+    
+    async def _call_llm_with_retry_async(self, prompt: str, deadline: float, stop_flag=None) -> Optional[Dict]:
+        """
+        Async LLM call with jittered exponential backoff, bounded by a total deadline
+        
+        Args:
+            prompt: Prompt text
+            deadline: Event loop time by which processing must finish
+            stop_flag: Stop flag, checked while the request and the backoff are in flight
+        """
+        if "gemini" not in self.llm_config.model.lower():
+            # Only Gemini has an async client here; run the sync path off the loop
+            return await asyncio.to_thread(self._call_llm_with_retry, prompt)
+        
+        loop = asyncio.get_running_loop()
+        config = self._build_generation_config()
+        
+        for attempt in range(self.llm_config.max_retries):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                logger.warning("Unified processing deadline exceeded")
+                break
+            try:
+                response = await self._await_unless_stopped(
+                    self._async_client().models.generate_content(
+                        model=self.model_name,
+                        contents=[prompt],
+                        config=config
+                    ),
+                    timeout=remaining,
+                    stop_flag=stop_flag
+                )
+                return self._parse_llm_response_text(response.text)
+            
+            except asyncio.CancelledError:
+                raise
+            except asyncio.TimeoutError:
+                logger.warning(f"Unified processing LLM call timed out (attempt {attempt + 1}/{self.llm_config.max_retries})")
+                break
+            except Exception as e:
+                logger.warning(f"Unified processing LLM call failed (attempt {attempt + 1}/{self.llm_config.max_retries}): {e}")
+                if attempt < self.llm_config.max_retries - 1:
+                    # Full jitter keeps concurrent retries from synchronizing
+                    backoff = self.llm_config.retry_delay * (2 ** attempt) * random.uniform(0.5, 1.5)
+                    backoff = min(backoff, deadline - loop.time())
+                    if backoff <= 0:
+                        break
+                    await self._await_unless_stopped(asyncio.sleep(backoff), timeout=backoff + 1, stop_flag=stop_flag)
+        
+        return None
+    
     def _call_llm_with_retry(self, prompt: str) -> Optional[Dict]:
         """LLM call with retry"""
         for attempt in range(self.llm_config.max_retries):
             try:
                 if "gemini" in self.llm_config.model.lower():
                     # Use new client API
-                    from google.genai import types
-                    
-                    # Build generation config
-                    config = types.GenerateContentConfig(
-                        temperature=self.generation_config['temperature'],
-                        # max_output_tokens can be set here if needed
-                        max_output_tokens=self.llm_config.max_tokens
-                    )
-                    
                     response = self.llm_client.models.generate_content(
                         model=self.model_name,
                         contents=[prompt],
-                        config=config
+                        config=self._build_generation_config()
                     )
                     response_text = response.text.strip()
                 elif "gpt" in self.llm_config.model.lower():
@@ -263,12 +403,7 @@ This is a specialized query designed to enhance important game terms while prese
                     return None
                 
                 # Parse JSON response
-                if response_text.startswith('```json'):
-                    response_text = response_text[7:-3]
-                elif response_text.startswith('```'):
-                    response_text = response_text[3:-3]
-                
-                return json.loads(response_text)
+                return self._parse_llm_response_text(response_text)
                 
             except Exception as e:
                 logger.warning(f"Unified processing LLM call failed (attempt {attempt + 1}/{self.llm_config.max_retries}): {e}")
@@ -313,6 +448,87 @@ This is a specialized query designed to enhance important game terms while prese
             processing_time=processing_time
         )
     
+    def _lookup_cached_processing(self, query: str) -> Optional[UnifiedQueryResult]:
+        """Cache lookup with debug output, shared by sync and async processing"""
+        cached_result = self._get_cached_result(query)
+        if cached_result:
+            print(f"💾 [QUERY-DEBUG] Using cached result")
+            print(f"   - Original query: '{cached_result.original_query}'")
+            print(f"   - Translation result: '{cached_result.translated_query}'")
+            print(f"   - Rewrite result: '{cached_result.rewritten_query}'")
+            print(f"   - BM25 optimization: '{cached_result.bm25_optimized_query}'")
+            print(f"   - Intent: {cached_result.intent} (confidence: {cached_result.confidence:.3f})")
+            logger.info(f"Using cached result: {query}")
+        return cached_result
+    
+    def _basic_processing_with_debug(self, query: str, reason: str) -> UnifiedQueryResult:
+        """Basic processing fallback with debug output"""
+        print(f"⚠️ [QUERY-DEBUG] {reason}, using basic processing")
+        result = self._basic_processing(query)
+        print(f"   - Detected language: {result.detected_language}")
+        print(f"   - Intent: {result.intent} (confidence: {result.confidence:.3f})")
+        print(f"   - Rewritten query: '{result.rewritten_query}'")
+        print(f"   - BM25 optimization: '{result.bm25_optimized_query}'")
+        print(f"   - Rewrite applied: {result.rewrite_applied}")
+        return result
+    
+    def _result_from_llm_response(self, query: str, llm_response: Dict, start_time: float) -> UnifiedQueryResult:
+        """Build the processing result from a parsed LLM response"""
+        detected_language = llm_response.get("detected_language", "en")
+        translated_query = llm_response.get("translated_query", query)
+        rewritten_query = llm_response.get("rewritten_query", translated_query)
+        
+        processing_time = time.time() - start_time
+        
+        print(f"✅ [QUERY-DEBUG] LLM processing successful:")
+        print(f"   - Detected language: {detected_language}")
+        print(f"   - Translation result: '{translated_query}'")
+        print(f"   - Rewrite result: '{rewritten_query}'")
+        print(f"   - BM25 optimization: '{llm_response.get('bm25_optimized_query', rewritten_query)}'")
+        print(f"   - Intent: {llm_response.get('intent', 'guide')} (confidence: {llm_response.get('confidence', 0.7):.3f})")
+        print(f"   - Search type: {llm_response.get('search_type', 'hybrid')}")
+        print(f"   - Processing time: {processing_time:.3f} seconds")
+        print(f"   - Reasoning: {llm_response.get('reasoning', 'LLM unified processing')}")
+        
+        result = UnifiedQueryResult(
+            original_query=query,
+            detected_language=detected_language,
+            translated_query=translated_query,
+            rewritten_query=rewritten_query,
+            bm25_optimized_query=llm_response.get("bm25_optimized_query", rewritten_query), # LLM processing not optimized
+            intent=llm_response.get("intent", "guide"),
+            confidence=llm_response.get("confidence", 0.7),
+            search_type=llm_response.get("search_type", "hybrid"),
+            reasoning=llm_response.get("reasoning", "LLM unified processing"),
+            translation_applied=translated_query != query,
+            rewrite_applied=rewritten_query != translated_query,
+            processing_time=processing_time
+        )
+        
+        self.stats["successful_processing"] += 1
+        logger.info(f"Unified processing successful: '{query}' -> translation: '{translated_query}' -> rewrite: '{rewritten_query}'")
+        return result
+    
+    def _finish_processing(self, query: str, result: UnifiedQueryResult, llm_succeeded: bool) -> UnifiedQueryResult:
+        """Update statistics and cache the result"""
+        # Update average processing time
+        self.stats["average_processing_time"] = (
+            (self.stats["average_processing_time"] * (self.stats["total_queries"] - 1) + 
+             result.processing_time) / self.stats["total_queries"]
+        )
+        
+        cache_stats = self.query_cache.get_stats()
+        print(f"📊 [QUERY-DEBUG] Query processing completed")
+        print(f"   - Total queries: {self.stats['total_queries']}")
+        print(f"   - Cache hits: {cache_stats['hits']} (size: {cache_stats['size']}/{cache_stats['max_size']})")
+        print(f"   - Successful processing: {self.stats['successful_processing']}")
+        print(f"   - Failed processing: {self.stats['failed_processing']}")
+        
+        # Cache result - only LLM results; basic fallback results are cheap and would pin a transient failure
+        if llm_succeeded:
+            self._cache_result(query, result)
+        return result
+    
     def process_query(self, query: str) -> UnifiedQueryResult:
         """
         Unified query processing: translation + rewriting + intent analysis
@@ -329,29 +545,15 @@ This is a specialized query designed to enhance important game terms while prese
         self.stats["total_queries"] += 1
         
         # Check cache
-        cached_result = self._get_cached_result(query)
+        cached_result = self._lookup_cached_processing(query)
         if cached_result:
-            print(f"💾 [QUERY-DEBUG] Using cached result")
-            print(f"   - Original query: '{cached_result.original_query}'")
-            print(f"   - Translation result: '{cached_result.translated_query}'")
-            print(f"   - Rewrite result: '{cached_result.rewritten_query}'")
-            print(f"   - BM25 optimization: '{cached_result.bm25_optimized_query}'")
-            print(f"   - Intent: {cached_result.intent} (confidence: {cached_result.confidence:.3f})")
-            logger.info(f"Using cached result: {query}")
             return cached_result
         
         # If LLM is unavailable, use basic processing
         if not self.llm_client:
-            print(f"⚠️ [QUERY-DEBUG] LLM unavailable, using basic processing")
-            result = self._basic_processing(query)
-            print(f"   - Detected language: {result.detected_language}")
-            print(f"   - Intent: {result.intent} (confidence: {result.confidence:.3f})")
-            print(f"   - Rewritten query: '{result.rewritten_query}'")
-            print(f"   - BM25 optimization: '{result.bm25_optimized_query}'")
-            print(f"   - Rewrite applied: {result.rewrite_applied}")
-            self._cache_result(query, result)
-            return result
+            return self._basic_processing_with_debug(query, "LLM unavailable")
         
+        llm_succeeded = False
         try:
             # Use LLM for unified processing
             print(f"🤖 [QUERY-DEBUG] Calling LLM for unified processing")
@@ -359,82 +561,101 @@ This is a specialized query designed to enhance important game terms while prese
             print(f"   - Using model: {self.llm_config.model}")
             print(f"   - Prompt length: {len(prompt)} characters")
             
-            llm_response = self._call_llm_with_retry(prompt)
+            # Coalesced with identical in-flight queries (same key as the result cache)
+            llm_response = self.single_flight.do(
+                self._generate_cache_key(query),
+                lambda: self._call_llm_with_retry(prompt)
+            )
             
             if llm_response:
-                # Parse LLM response
-                detected_language = llm_response.get("detected_language", "en")
-                translated_query = llm_response.get("translated_query", query)
-                rewritten_query = llm_response.get("rewritten_query", translated_query)
-                
-                processing_time = time.time() - start_time
-                
-                print(f"✅ [QUERY-DEBUG] LLM processing successful:")
-                print(f"   - Detected language: {detected_language}")
-                print(f"   - Translation result: '{translated_query}'")
-                print(f"   - Rewrite result: '{rewritten_query}'")
-                print(f"   - BM25 optimization: '{llm_response.get('bm25_optimized_query', rewritten_query)}'")
-                print(f"   - Intent: {llm_response.get('intent', 'guide')} (confidence: {llm_response.get('confidence', 0.7):.3f})")
-                print(f"   - Search type: {llm_response.get('search_type', 'hybrid')}")
-                print(f"   - Processing time: {processing_time:.3f} seconds")
-                print(f"   - Reasoning: {llm_response.get('reasoning', 'LLM unified processing')}")
-                
-                result = UnifiedQueryResult(
-                    original_query=query,
-                    detected_language=detected_language,
-                    translated_query=translated_query,
-                    rewritten_query=rewritten_query,
-                    bm25_optimized_query=llm_response.get("bm25_optimized_query", rewritten_query), # LLM processing not optimized
-                    intent=llm_response.get("intent", "guide"),
-                    confidence=llm_response.get("confidence", 0.7),
-                    search_type=llm_response.get("search_type", "hybrid"),
-                    reasoning=llm_response.get("reasoning", "LLM unified processing"),
-                    translation_applied=translated_query != query,
-                    rewrite_applied=rewritten_query != translated_query,
-                    processing_time=processing_time
-                )
-                
-                self.stats["successful_processing"] += 1
-                logger.info(f"Unified processing successful: '{query}' -> translation: '{translated_query}' -> rewrite: '{rewritten_query}'")
-                
+                result = self._result_from_llm_response(query, llm_response, start_time)
+                llm_succeeded = True
             else:
                 # LLM call failed, use basic processing
-                print(f"❌ [QUERY-DEBUG] LLM call failed, using basic processing")
-                result = self._basic_processing(query)
-                print(f"   - Detected language: {result.detected_language}")
-                print(f"   - Intent: {result.intent} (confidence: {result.confidence:.3f})")
-                print(f"   - Rewritten query: '{result.rewritten_query}'")
-                print(f"   - BM25 optimization: '{result.bm25_optimized_query}'")
-                print(f"   - Rewrite applied: {result.rewrite_applied}")
+                result = self._basic_processing_with_debug(query, "LLM call failed")
                 self.stats["failed_processing"] += 1
                 logger.warning(f"LLM unified processing failed, using basic processing: {query}")
                 
         except Exception as e:
             print(f"❌ [QUERY-DEBUG] Unified processing exception: {e}")
             logger.error(f"Unified processing exception: {e}")
-            result = self._basic_processing(query)
-            print(f"   - Fallback to basic processing")
-            print(f"   - Detected language: {result.detected_language}")
-            print(f"   - Intent: {result.intent} (confidence: {result.confidence:.3f})")
-            print(f"   - Rewritten query: '{result.rewritten_query}'")
-            print(f"   - BM25 optimization: '{result.bm25_optimized_query}'")
+            result = self._basic_processing_with_debug(query, "Unified processing exception")
             self.stats["failed_processing"] += 1
         
-        # Update average processing time
-        self.stats["average_processing_time"] = (
-            (self.stats["average_processing_time"] * (self.stats["total_queries"] - 1) + 
-             result.processing_time) / self.stats["total_queries"]
-        )
+        return self._finish_processing(query, result, llm_succeeded)
+    
+    async def process_query_async(self,
+                                  query: str,
+                                  timeout: Optional[float] = None,
+                                  stop_flag=None) -> UnifiedQueryResult:
+        """
+        Async unified query processing on the async Gemini client
         
-        print(f"📊 [QUERY-DEBUG] Query processing completed, caching result")
-        print(f"   - Total queries: {self.stats['total_queries']}")
-        print(f"   - Cache hits: {self.stats['cache_hits']}")
-        print(f"   - Successful processing: {self.stats['successful_processing']}")
-        print(f"   - Failed processing: {self.stats['failed_processing']}")
+        No thread is blocked: the request and the retry backoff are awaited on the event loop,
+        and the in-flight request is cancelled as soon as stop_flag fires.
         
-        # Cache result
-        self._cache_result(query, result)
-        return result
+        Args:
+            query: Original query
+            timeout: Total deadline in seconds for all attempts (defaults to llm_config.timeout)
+            stop_flag: Callable returning True (or object with is_set()) when the query was stopped
+            
+        Returns:
+            UnifiedQueryResult: Unified processing result (basic processing if the deadline is exceeded)
+            
+        Raises:
+            asyncio.CancelledError: When stop_flag fires or the calling task is cancelled
+        """
+        print(f"🔄 [QUERY-DEBUG] Starting async unified query processing: '{query}'")
+        
+        start_time = time.time()
+        self.stats["total_queries"] += 1
+        
+        cached_result = self._lookup_cached_processing(query)
+        if cached_result:
+            return cached_result
+        
+        if not self.llm_client:
+            return self._basic_processing_with_debug(query, "LLM unavailable")
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout if timeout is not None else self.llm_config.timeout)
+        
+        llm_succeeded = False
+        try:
+            print(f"🤖 [QUERY-DEBUG] Calling LLM for unified processing (async)")
+            prompt = self._create_unified_prompt(query)
+            print(f"   - Using model: {self.llm_config.model}")
+            print(f"   - Prompt length: {len(prompt)} characters")
+            
+            # Coalesced with identical in-flight queries; a waiter still honours its own stop flag and deadline
+            llm_response = await self._await_unless_stopped(
+                self.single_flight.do_async(
+                    self._generate_cache_key(query),
+                    lambda: self._call_llm_with_retry_async(prompt, deadline, stop_flag)
+                ),
+                timeout=max(0.0, deadline - loop.time()),
+                stop_flag=stop_flag
+            )
+            
+            if llm_response:
+                result = self._result_from_llm_response(query, llm_response, start_time)
+                llm_succeeded = True
+            else:
+                result = self._basic_processing_with_debug(query, "LLM call failed or deadline exceeded")
+                self.stats["failed_processing"] += 1
+                logger.warning(f"LLM unified processing failed, using basic processing: {query}")
+        
+        except asyncio.CancelledError:
+            print(f"🛑 [QUERY-DEBUG] Unified processing cancelled: '{query}'")
+            logger.info(f"Unified processing cancelled: {query}")
+            raise
+        except Exception as e:
+            print(f"❌ [QUERY-DEBUG] Unified processing exception: {e}")
+            logger.error(f"Unified processing exception: {e}")
+            result = self._basic_processing_with_debug(query, "Unified processing exception")
+            self.stats["failed_processing"] += 1
+        
+        return self._finish_processing(query, result, llm_succeeded)
 
 # Global instance
 _unified_processor = None
@@ -459,4 +680,25 @@ def process_query_unified(query: str, llm_config: Optional[LLMSettings] = None,
         UnifiedQueryResult: Processing result
     """
     processor = get_unified_processor(llm_config, rag_config)
-    return processor.process_query(query) 
\ No newline at end of file
+    return processor.process_query(query) 
+
+async def process_query_unified_async(query: str,
+                                      llm_config: Optional[LLMSettings] = None,
+                                      rag_config: Optional[RAGConfig] = None,
+                                      timeout: Optional[float] = None,
+                                      stop_flag=None) -> UnifiedQueryResult:
+    """
+    Async convenience function for unified query processing
+    
+    Args:
+        query: User query
+        llm_config: LLM configuration (deprecated, use rag_config)
+        rag_config: RAG configuration with LLM settings
+        timeout: Total deadline in seconds (defaults to llm_config.timeout)
+        stop_flag: Stop flag that cancels the in-flight request
+        
+    Returns:
+        UnifiedQueryResult: Processing result
+    """
+    processor = get_unified_processor(llm_config, rag_config)
+    return await processor.process_query_async(query, timeout=timeout, stop_flag=stop_flag)
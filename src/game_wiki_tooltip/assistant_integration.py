@@ -8,6 +8,7 @@ import logging
 import threading
 import time
 import uuid
+from collections import deque
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Tuple
 from dataclasses import dataclass
@@ -19,9 +20,14 @@ from PyQt6.QtGui import QDesktopServices
 from src.game_wiki_tooltip.window_component import AssistantController, TransitionMessages, MessageType, WindowState
 from src.game_wiki_tooltip.core.backend_client import BackendClient
 from src.game_wiki_tooltip.core.quota_manager import QuotaManager, QuotaDecision
+from src.game_wiki_tooltip.core.async_worker import AsyncLoopThread
+from src.game_wiki_tooltip.core.cancellation import CancellationToken, await_cancellable, is_cancel_requested
+from src.game_wiki_tooltip.core.engine_pool import EnginePool
+from src.game_wiki_tooltip.core.readiness import ReadinessGate, get_wakeup_trace
 from src.game_wiki_tooltip.core.config import SettingsManager
 from src.game_wiki_tooltip.core import events as analytics_events
-from src.game_wiki_tooltip.ai.rag_config import LLMSettings
+from src.game_wiki_tooltip.ai.rag_config import LLMSettings, RAGConfig, QueryProcessingConfig
+from src.game_wiki_tooltip.ai.context_packer import ContextPacker, estimate_tokens
 from src.game_wiki_tooltip.ai.unified_query_processor import UnifiedQueryResult
 from src.game_wiki_tooltip.core.utils import get_foreground_title
 from src.game_wiki_tooltip.core.smart_interaction_manager import SmartInteractionManager, InteractionMode
@@ -29,11 +35,19 @@ from src.game_wiki_tooltip.core.smart_interaction_manager import SmartInteractio
 # Lazy load AI modules - import only when needed to speed up startup
 logger = logging.getLogger(__name__)
 process_query_unified = None
+process_query_unified_async = None
 get_default_config = None
 EnhancedRagQuery = None
 _ai_modules_loaded = False
 _ai_modules_loading = False  # Prevent duplicate loading
 _ai_load_lock = threading.Lock()  # Thread lock to protect loading state
+_ai_modules_ready = ReadinessGate("ai_modules")  # Wakes waiters as soon as AI modules are loaded (or failed)
+
+# Limited mode 注入后端模型的参考资料 token 预算
+LIMITED_CONTEXT_TOKEN_BUDGET = 1200
+
+# 游戏窗口保持焦点多久后开始后台预热索引（快速 Alt+Tab 不触发加载）
+WARM_UP_FOCUS_DELAY_MS = 1500
 
 class AIModuleLoader(QThread):
     """Background thread for loading AI modules"""
@@ -61,21 +75,23 @@ class AIModuleLoader(QThread):
 
 def _lazy_load_ai_modules():
     """Lazy load AI modules, only import when first used"""
-    global process_query_unified, get_default_config, EnhancedRagQuery, _ai_modules_loaded, _ai_modules_loading
+    global process_query_unified, process_query_unified_async, get_default_config, EnhancedRagQuery, _ai_modules_loaded, _ai_modules_loading
     
     with _ai_load_lock:
         if _ai_modules_loaded:
             logger.info("✅ AI modules already loaded (probably during splash screen)")
             return True
-            
-        if _ai_modules_loading:
-            # Another thread is loading, wait for completion
-            logger.info("⏳ AI module is being loaded by another thread, waiting...")
-            while _ai_modules_loading and not _ai_modules_loaded:
-                time.sleep(0.1)
-            return _ai_modules_loaded
-            
-        _ai_modules_loading = True
+        
+        wait_for_other_loader = _ai_modules_loading
+        if not wait_for_other_loader:
+            _ai_modules_loading = True
+            _ai_modules_ready.reset()  # A previous attempt may have failed
+    
+    if wait_for_other_loader:
+        # Another thread is loading, woken up when it finishes
+        logger.info("⏳ AI module is being loaded by another thread, waiting...")
+        _ai_modules_ready.wait(waiter="lazy_load_ai_modules")
+        return _ai_modules_loaded
         
     try:
         logger.info("🔄 Starting AI module loading (fallback - should have been loaded during splash)...")
@@ -87,20 +103,24 @@ def _lazy_load_ai_modules():
             with _ai_load_lock:
                 _ai_modules_loaded = True
                 _ai_modules_loading = False
+            _ai_modules_ready.resolve(True, "splash screen")
             return True
         
         # Fallback: load modules if not already loaded
         from src.game_wiki_tooltip.ai.unified_query_processor import process_query_unified as _process_query_unified
+        from src.game_wiki_tooltip.ai.unified_query_processor import process_query_unified_async as _process_query_unified_async
         from src.game_wiki_tooltip.ai.rag_config import get_default_config as _get_default_config
         from src.game_wiki_tooltip.ai.rag_query import EnhancedRagQuery as _EnhancedRagQuery
         
         process_query_unified = _process_query_unified
+        process_query_unified_async = _process_query_unified_async
         get_default_config = _get_default_config
         EnhancedRagQuery = _EnhancedRagQuery
         
         with _ai_load_lock:
             _ai_modules_loaded = True
             _ai_modules_loading = False
+        _ai_modules_ready.resolve(True, "lazy load")
             
         elapsed = time.time() - start_time
         logger.info(f"✅ AI module loading completed (fallback), time taken: {elapsed:.2f} seconds")
@@ -109,6 +129,7 @@ def _lazy_load_ai_modules():
         logger.error(f"Failed to import AI components: {e}")
         with _ai_load_lock:
             _ai_modules_loading = False
+        _ai_modules_ready.resolve(False, str(e))
         return False
 
 def get_selected_game_title():
@@ -125,8 +146,8 @@ class QueryIntent:
     unified_query_result: Optional[object] = None  # Complete unified query result
 
 
-class QueryWorker(QThread):
-    """Worker thread for processing queries asynchronously"""
+class QueryWorker(QObject):
+    """Query processing task, runs on the RAG integration's persistent asyncio loop"""
     
     # Signals
     intent_detected = pyqtSignal(object)  # QueryIntent
@@ -140,22 +161,30 @@ class QueryWorker(QThread):
         self.query = query
         self.game_context = game_context
         self.search_mode = search_mode
-        self._stop_requested = False
-        self._current_task = None  # Current running async task
+        # Flows through query processing, retrieval and generation; firing it aborts in-flight requests
+        self._cancel_token = CancellationToken(name=f"query:{query[:30]}")
+        self._task = None  # LoopTask handle of the query on the async loop
+        self._speculative_task = None  # Speculative retrieval on the raw query
+        self._started_at = time.perf_counter()  # Query submission time, for TTFT
         
-    def run(self):
-        """Run the query processing in thread"""
+    @property
+    def _stop_requested(self) -> bool:
+        return self._cancel_token.cancelled
+    
+    def start(self):
+        """Submit the query to the persistent asyncio loop (signals reach the UI as queued connections)"""
+        self._task = self.rag_integration.async_worker.submit(self._run(), name=f"query:{self.query[:30]}")
+    
+    def isRunning(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the query task has finished (or was cancelled)"""
+        return self._task is None or self._task.wait(timeout)
+    
+    async def _run(self):
         try:
-            # Create event loop for this thread
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            try:
-                # Process query asynchronously
-                loop.run_until_complete(self._process_query())
-            finally:
-                loop.close()
-                
+            await self._process_query()
         except Exception as e:
             logger.error(f"Query worker error: {e}")
             self.error_occurred.emit(str(e))
@@ -172,11 +201,19 @@ class QueryWorker(QThread):
                 self.error_occurred.emit("AI modules are still loading. Please try again in a moment.")
                 return
                 
+            # Speculatively retrieve on the raw query while the LLM rewrites it
+            self._speculative_task = self.rag_integration.start_speculative_retrieval(
+                self.query,
+                game_context=self.game_context,
+                search_mode=self.search_mode
+            )
+            
             # Use unified query processor for intent detection and query optimization
             intent = await self.rag_integration.process_query_async(
                 self.query, 
                 game_context=self.game_context,
-                search_mode=self.search_mode
+                search_mode=self.search_mode,
+                stop_flag=self._cancel_token  # Cancels the in-flight LLM request on stop
             )
             
             # Check again if stop has been requested
@@ -211,16 +248,17 @@ class QueryWorker(QThread):
                 # For guide query, pass both original query and processed query
                 processed_query = intent.rewritten_query or intent.translated_query or self.query
                 
-                # Set current task and pass stop flag
-                self._current_task = self.rag_integration.generate_guide_async(
+                # Pass stop flag, stop() cancels this await through the task handle
+                await self.rag_integration.generate_guide_async(
                     processed_query,  # Query used for retrieval
                     game_context=self.game_context,
                     original_query=self.query,  # Original query, used for answer generation
                     skip_query_processing=True,  # Skip query processing inside RAG
                     unified_query_result=intent.unified_query_result,  # Pass complete unified query result
-                    stop_flag=lambda: self._stop_requested  # Pass stop flag check function
+                    stop_flag=self._cancel_token,  # Aborts retrieval, backend and LLM requests on stop
+                    speculative_task=self._speculative_task,  # Raw-query retrieval started before the rewrite
+                    request_started_at=self._started_at  # For time-to-first-token reporting
                 )
-                await self._current_task
                 
         except asyncio.CancelledError:
             logger.info("Query processing cancelled")
@@ -233,46 +271,38 @@ class QueryWorker(QThread):
                     self.error_occurred.emit(self.rag_integration._get_localized_message("game_not_supported"))
                 else:
                     self.error_occurred.emit(str(e))
+        finally:
+            # Wiki intent, stop or error: the speculative retrieval is no longer needed
+            # (unless the query was queued until the engine is ready, which then awaits it)
+            task = self._speculative_task
+            if task and not task.done() and (
+                self._stop_requested or not self.rag_integration.holds_pending_speculation(task)
+            ):
+                task.cancel()
     
     async def _wait_for_ai_modules(self) -> bool:
-        """Wait for AI modules to load with timeout"""
+        """Wait for AI modules to load with timeout (woken the moment loading finishes, stop cancels the wait)"""
         # In limited mode, skip AI module check
         if self.rag_integration.limited_mode:
             return True  # Skip AI module loading in limited mode
-            
-        max_wait = 5.0  # Maximum 5 seconds
-        check_interval = 0.1
-        elapsed = 0.0
         
-        while elapsed < max_wait:
-            # Check if modules are loaded
-            if _ai_modules_loaded:
-                return True
-            
-            # Check if stop requested
-            if self._stop_requested:
-                return False
-                
-            # Wait a bit
-            await asyncio.sleep(check_interval)
-            elapsed += check_interval
-            
-        # Timeout
-        return _ai_modules_loaded
+        if _ai_modules_loaded:
+            return True
+        
+        await _ai_modules_ready.wait_async(timeout=5.0, waiter="query_worker")
+        return _ai_modules_loaded and not self._stop_requested
             
     def stop(self):
         """Request to stop the worker"""
         try:
-            self._stop_requested = True
+            # Wakes every wait on the token and aborts in-flight HTTP requests right away
+            self._cancel_token.cancel("user stop")
             logger.info("🛑 QueryWorker stop request issued")
             
-            # If there's a current task, try to cancel it
-            if self._current_task and not self._current_task.done():
-                try:
-                    self._current_task.cancel()
-                    logger.info("🛑 Current async task cancelled")
-                except Exception as e:
-                    logger.error(f"Error cancelling async task: {e}")
+            # Cancel the query task on the async loop
+            if self._task and not self._task.done():
+                self._task.cancel()
+                logger.info("🛑 Current async task cancelled")
                     
         except Exception as e:
             logger.error(f"Error during QueryWorker stop process: {e}")
@@ -304,13 +334,32 @@ class RAGIntegration(QObject):
         self.query_processor = None
         self._pending_wiki_update = None  # Store wiki link information to be updated
         self._llm_config = None  # Store configured LLM configuration
-        self._lightweight_rag_cache = {}
+        # 按向量库游戏名共享的引擎池：当前游戏（rag_engine）与 limited mode 检索共用实例
+        self.engine_pool = EnginePool(memory_budget_bytes=self._engine_pool_budget_bytes())
+        self._rag_engine_lease = None  # 当前 rag_engine 在池中持有引用的 key
+        # 常驻的后台事件循环：查询与引擎初始化都作为任务提交到这里，循环上的资源在查询之间复用
+        self.async_worker = AsyncLoopThread(name="rag-async-loop")
         self.quota_manager = None
+        self.local_intent_classifier = None  # Lazily created, skips the unified LLM call for easy queries
+        # 来源与链接随标题一起保留，超出预算时整段丢弃片段而不是只丢引用
+        self.context_packer = ContextPacker(
+            token_budget=LIMITED_CONTEXT_TOKEN_BUDGET,
+            summary_max_chars=400,
+            core_fields=("title", "source", "url")
+        )
         
         # RAG initialization state tracking
         self._rag_initializing = False  # Flag to prevent duplicate initializations
         self._rag_init_game = None      # Track which game is being initialized
         self._current_rag_game = None   # Track current initialized game
+        self._rag_init_warm_up = False  # Current initialization is a cancellable background warm-up
+        self._rag_init_cancel = threading.Event()  # Cancel flag of the current initialization
+        self._rag_ready = ReadinessGate("rag_engine")  # Readiness of the current initialization round
+        self._pending_query_lock = threading.Lock()
+        self._pending_query = None  # Query queued until the RAG engine can serve it
+        
+        # 首字延迟（TTFT）统计：区分是否使用了推测检索
+        self.ttft_stats = {"speculative": deque(maxlen=100), "serial": deque(maxlen=100), "backend_stream": deque(maxlen=100)}
         
         # Initialize game configuration manager
 
@@ -494,6 +543,54 @@ class RAGIntegration(QObject):
         self._current_language = current_language
         logger.info(f"✅ Game configuration manager initialized, current language: {current_language}")
         
+    def _engine_pool_budget_bytes(self) -> int:
+        """引擎池内存预算：取用户设置中 rag.engine_pool_memory_mb，未设置时用默认值"""
+        default_mb = RAGConfig().engine_pool_memory_mb
+        try:
+            rag_settings = self.settings_manager.get('rag') or {}
+            memory_mb = int(rag_settings.get('engine_pool_memory_mb', default_mb))
+        except Exception as e:
+            logger.warning(f"Failed to read engine pool budget from settings, using default: {e}")
+            memory_mb = default_mb
+        return memory_mb * 1024 * 1024
+
+    def reload_engine_pool_settings(self):
+        """设置变更后更新引擎池内存预算（调小时立即淘汰超出预算的空闲引擎）"""
+        budget_bytes = self._engine_pool_budget_bytes()
+        if budget_bytes != self.engine_pool.memory_budget_bytes:
+            logger.info(f"🧮 Engine pool budget: {self.engine_pool.memory_budget_bytes // (1024 * 1024)}MB -> {budget_bytes // (1024 * 1024)}MB")
+            self.engine_pool.set_memory_budget(budget_bytes)
+
+    def _local_intent_settings(self) -> QueryProcessingConfig:
+        """本地意图分类设置：取用户设置中 rag.query_processing 的 enable_local_intent / local_intent_threshold / local_intent_guide_fast_path，未设置时用默认值"""
+        defaults = QueryProcessingConfig()
+        try:
+            rag_settings = self.settings_manager.get('rag') or {}
+            processing = rag_settings.get('query_processing') or {}
+            return QueryProcessingConfig(
+                enable_local_intent=bool(processing.get('enable_local_intent', defaults.enable_local_intent)),
+                local_intent_threshold=float(processing.get('local_intent_threshold', defaults.local_intent_threshold)),
+                local_intent_guide_fast_path=bool(processing.get('local_intent_guide_fast_path', defaults.local_intent_guide_fast_path))
+            )
+        except Exception as e:
+            logger.warning(f"Failed to read local intent settings, using defaults: {e}")
+            return defaults
+
+    def reload_local_intent_settings(self):
+        """设置变更后更新本地意图分类器（关闭时丢弃，开启时按当前游戏重建词典，否则更新阈值）"""
+        processing_config = self._local_intent_settings()
+        classifier = self.local_intent_classifier
+        if not processing_config.enable_local_intent:
+            if classifier is not None:
+                logger.info("🧭 Local intent classifier disabled")
+            self.local_intent_classifier = None
+        elif classifier is not None:
+            classifier.confidence_threshold = processing_config.local_intent_threshold
+            classifier.allow_guide_fast_path = processing_config.local_intent_guide_fast_path
+        elif self.rag_engine and self._current_rag_game:
+            # 新建分类器并载入当前游戏的词典
+            self._load_local_intent_terms(self._current_rag_game)
+
     def reload_for_language_change(self):
         """Reload game configuration when language settings change"""
         logger.info("🔄 Language setting change detected, reloading game configuration")
@@ -604,27 +701,38 @@ class RAGIntegration(QObject):
             
             logger.info(f"🌐 Updated AI response language: {old_language} -> {response_language}")
             
-            # If RAG engine is initialized, update its summarizer language setting
-            if hasattr(self, 'rag_engine') and self.rag_engine and hasattr(self.rag_engine, 'summarizer'):
-                if self.rag_engine.summarizer:
-                    # Update config language setting
-                    if hasattr(self.rag_engine.summarizer, 'config'):
-                        self.rag_engine.summarizer.config.language = response_language
-                        logger.info(f"🌐 Updated RAG summarizer config language setting to: {response_language}")
-                    
-                    # Update LLM config language setting (priority)
-                    if hasattr(self.rag_engine.summarizer, 'llm_config') and self.rag_engine.summarizer.llm_config:
-                        self.rag_engine.summarizer.llm_config.response_language = response_language
-                        logger.info(f"🌐 Updated RAG summarizer LLM config language setting to: {response_language}")
+            # Update the summarizer language of every loaded engine (pooled engines of other games included)
+            for _, engine in self.engine_pool.engines():
+                summarizer = getattr(engine, 'summarizer', None)
+                if not summarizer:
+                    continue
+                # Update config language setting
+                if hasattr(summarizer, 'config'):
+                    summarizer.config.language = response_language
+                
+                # Update LLM config language setting (priority)
+                if hasattr(summarizer, 'llm_config') and summarizer.llm_config:
+                    summarizer.llm_config.response_language = response_language
+                logger.info(f"🌐 Updated RAG summarizer language setting to: {response_language}")
                     
         except Exception as e:
             logger.error(f"Failed to update AI language setting: {e}")
             
-    def _init_rag_for_game(self, game_name: str, llm_config: LLMSettings, google_api_key: str, wait_for_init: bool = False):
-        """Initialize RAG engine for specific game"""
+    def _init_rag_for_game(self, game_name: str, llm_config: LLMSettings, google_api_key: str,
+                           wait_for_init: bool = False, warm_up: bool = False):
+        """
+        Initialize RAG engine for specific game
+
+        warm_up marks a background load started because the game window gained focus;
+        it can be cancelled with cancel_rag_warm_up() until a query needs the engine.
+        """
         try:
             # Check if already initializing or initialized for this game
-            if self._rag_initializing and self._rag_init_game == game_name:
+            if self._rag_initializing and self._rag_init_game == game_name and not self._rag_init_cancel.is_set():
+                if self._rag_init_warm_up and not warm_up:
+                    # A query needs this engine now, the warm-up is no longer cancellable
+                    self._rag_init_warm_up = False
+                    logger.info(f"🔥 Warm-up for game '{game_name}' promoted to regular initialization")
                 logger.info(f"⚠️ RAG initialization already in progress for game '{game_name}', skipping duplicate")
                 return
                 
@@ -632,9 +740,23 @@ class RAGIntegration(QObject):
                 logger.info(f"✓ RAG engine already initialized for game '{game_name}', no need to reinitialize")
                 return
             
-            # Mark as initializing
+            # Loading of another game is superseded by this one
+            if self._rag_initializing:
+                if warm_up and getattr(self, '_pending_query', None):
+                    # A focus warm-up never replaces a load that a queued query is waiting for
+                    logger.info(f"⏭️ Skipping warm-up for game '{game_name}', a query is waiting for '{self._rag_init_game}'")
+                    return
+                logger.info(f"⏹️ Cancelling RAG initialization for game '{self._rag_init_game}' (now '{game_name}')")
+                self._rag_init_cancel.set()
+            
+            # Mark as initializing; each round gets its own readiness gate, published before the flag
+            gate = ReadinessGate(f"rag_engine:{game_name}")
+            self._rag_ready = gate
+            cancel_event = threading.Event()
+            self._rag_init_cancel = cancel_event
             self._rag_initializing = True
             self._rag_init_game = game_name
+            self._rag_init_warm_up = warm_up
             
             # Ensure AI components are loaded first
             if not _ai_modules_loaded:
@@ -643,20 +765,40 @@ class RAGIntegration(QObject):
                     logger.error("Failed to load AI components, cannot initialize RAG")
                     self._rag_initializing = False
                     self._rag_init_game = None
+                    gate.resolve(False, "AI components unavailable")
                     return
             
             if not (get_default_config and EnhancedRagQuery):
                 logger.warning("RAG components not available after loading attempt")
                 self._rag_initializing = False
                 self._rag_init_game = None
+                gate.resolve(False, "RAG components unavailable")
                 return
                 
+            # Reuse a pooled engine of this game (e.g. loaded earlier, before switching games)
+            pooled = self.engine_pool.acquire(game_name)
+            if pooled is not None:
+                if pooled.is_initialized and getattr(pooled, 'summarizer', None):
+                    logger.info(f"♻️ Reusing pooled RAG engine for game '{game_name}'")
+                    self._release_rag_engine()
+                    self.rag_engine = pooled
+                    self._rag_engine_lease = game_name
+                    self._current_rag_game = game_name
+                    self._load_local_intent_terms(game_name)
+                    self._rag_init_complete = True
+                    self._rag_initializing = False
+                    self._rag_init_game = None
+                    gate.resolve(True, "pooled engine")
+                    return
+                # Lightweight (limited mode) engine without summarizer, replaced by the full engine below
+                self.engine_pool.release(game_name, pooled)
+            
             logger.info(f"🔄 Initializing new RAG engine for game '{game_name}'")
             
-            # Clear old RAG engine
+            # Release old RAG engine, it stays pooled until evicted
             if hasattr(self, 'rag_engine') and self.rag_engine:
-                logger.info("🗑️ Clearing old RAG engine instance")
-                self.rag_engine = None
+                logger.info("🗑️ Releasing old RAG engine instance")
+                self._release_rag_engine()
                 
             # Get RAG config
             rag_config = get_default_config()
@@ -668,7 +810,7 @@ class RAGIntegration(QObject):
             custom_hybrid_config["enable_query_translation"] = False  # Disable query translation
             
             # Create RAG engine
-            self.rag_engine = EnhancedRagQuery(
+            engine = EnhancedRagQuery(
                 vector_store_path=None,  # Will be auto-detected
                 enable_hybrid_search=rag_config.hybrid_search.enabled,
                 hybrid_config=custom_hybrid_config,  # Use custom configuration
@@ -680,40 +822,49 @@ class RAGIntegration(QObject):
                 enable_intent_reranking=rag_config.intent_reranking.enabled,
                 reranking_config=rag_config.intent_reranking.to_dict()
             )
+            self.rag_engine = engine
             
-            # Initialize the engine in thread
-            def init_rag():
-                # Set low priority to avoid affecting UI responsiveness
-                try:
-                    import os
-                    if hasattr(os, 'nice'):
-                        os.nice(10)  # Unix/Linux
-                    else:
-                        # Windows: set thread priority
-                        import ctypes
-                        import sys
-                        if sys.platform == 'win32':
-                            thread_handle = ctypes.windll.kernel32.GetCurrentThread()
-                            ctypes.windll.kernel32.SetThreadPriority(thread_handle, -2)  # THREAD_PRIORITY_LOWEST
-                except Exception as e:
-                    logger.warning(f"Failed to set thread priority: {e}")
-                
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
+            def on_component_ready(component: str):
+                # Chunks and BM25 loaded: a queued query can be served while the vector index still loads
+                if engine.search_ready and self.rag_engine is engine:
+                    gate.resolve(True, f"search ready ({component})")
+            engine.add_component_listener(on_component_ready)
+            
+            # Initialize the engine as a task on the persistent async loop
+            # (its blocking loads run on the loop's thread pool, the loop stays responsive)
+            async def init_rag():
                 try:
-                    logger.info(f"🚀 Starting async RAG engine initialization (game: {game_name})")
-                    loop.run_until_complete(self.rag_engine.initialize(game_name))
+                    logger.info(f"🚀 Starting async RAG engine initialization (game: {game_name}, warm-up: {warm_up})")
+                    await engine.initialize(game_name, cancel_event=cancel_event, warm_tokenizer=True)
                     logger.info(f"✅ RAG engine initialization completed (game: {game_name})")
+                    is_current = self.rag_engine is engine and not cancel_event.is_set()
+                    self.engine_pool.put(game_name, engine, acquire=is_current)
+                    if not is_current:
+                        # Superseded after loading finished, keep it pooled for a later switch back
+                        logger.info(f"♻️ RAG engine for '{game_name}' superseded, kept in pool")
+                        return
+                    self._rag_engine_lease = game_name
                     self._rag_init_complete = True
                     self._current_rag_game = game_name  # Record current RAG engine game
+                    await asyncio.to_thread(self._load_local_intent_terms, game_name)
                     # Clear initialization flags on success
                     self._rag_initializing = False
                     self._rag_init_game = None
                     # Clear error information
                     if hasattr(self, '_rag_init_error'):
                         delattr(self, '_rag_init_error')
+                    gate.resolve(True, "initialized")
+                except asyncio.CancelledError:
+                    logger.info(f"⏹️ RAG engine initialization cancelled (game: {game_name})")
+                    if self.rag_engine is engine:
+                        self.rag_engine = None
+                        self._rag_init_complete = False
+                        self._rag_initializing = False
+                        self._rag_init_game = None
                 except Exception as e:
                     logger.error(f"❌ RAG engine initialization failed (game: {game_name}): {e}")
+                    if self.rag_engine is not engine:
+                        return
                     self.rag_engine = None
                     self._rag_init_complete = False
                     self._rag_init_error = str(e)  # Record initialization error
@@ -722,33 +873,57 @@ class RAGIntegration(QObject):
                     self._rag_initializing = False
                     self._rag_init_game = None
                 finally:
-                    loop.close()
+                    # Failed, cancelled or superseded: waiters re-check and follow the current round
+                    gate.resolve(False, "not initialized")
             
             # Reset initialization status
             self._rag_init_complete = False
             
-            # Run initialization in a separate thread
-            import threading
-            init_thread = threading.Thread(target=init_rag)
-            init_thread.daemon = True
-            init_thread.start()
+            self.async_worker.submit(init_rag(), name=f"rag-init:{game_name}")
             
-            # If waiting for initialization to complete
-            if wait_for_init:
-                # Wait for initialization to complete, up to 5 seconds
-                import time
-                start_time = time.time()
-                while not hasattr(self, '_rag_init_complete') or not self._rag_init_complete:
-                    if time.time() - start_time > 5:  # Timeout
-                        logger.warning("RAG initialization timeout")
-                        break
-                    time.sleep(0.1)
+            # If waiting for initialization to complete (up to 5 seconds)
+            if wait_for_init and gate.wait(timeout=5, waiter="init_rag_for_game") is None:
+                logger.warning("RAG initialization timeout")
             
         except Exception as e:
             logger.error(f"Failed to initialize RAG for {game_name}: {e}")
             # Ensure initialization flags are cleared on any error
             self._rag_initializing = False
             self._rag_init_game = None
+            self._rag_ready.resolve(False, str(e))
+
+    def cancel_rag_warm_up(self, game_name: Optional[str] = None) -> bool:
+        """
+        Cancel a background warm-up that no query is waiting for
+
+        Loading stops at the next stage boundary. Returns whether a warm-up was cancelled.
+        """
+        if not (self._rag_initializing and self._rag_init_warm_up):
+            return False
+        if game_name and game_name != self._rag_init_game:
+            return False
+        if getattr(self, '_pending_query', None):
+            return False
+        logger.info(f"⏹️ Cancelling RAG warm-up for game '{self._rag_init_game}'")
+        self._rag_init_cancel.set()
+        return True
+
+    def _release_rag_engine(self):
+        """Drop the current engine and its pool reference (the engine stays pooled until evicted)"""
+        if self._rag_engine_lease is not None:
+            self.engine_pool.release(self._rag_engine_lease, self.rag_engine)
+            self._rag_engine_lease = None
+        self.rag_engine = None
+
+    def get_readiness_trace(self) -> List[Dict[str, Any]]:
+        """Recent readiness wakeups (AI modules, RAG engine rounds): waiter, wait time and wake latency"""
+        return get_wakeup_trace()
+    
+    def get_engine_pool_diagnostics(self) -> Dict[str, Any]:
+        """Resident size, references and last use of every pooled engine"""
+        diagnostics = self.engine_pool.diagnostics()
+        diagnostics["current_game"] = self._current_rag_game
+        return diagnostics
             
     def _check_vector_store_exists(self, game_name: str) -> bool:
         """Check if vector store exists for the given game"""
@@ -763,43 +938,87 @@ class RAGIntegration(QObject):
             logger.error(f"Error checking vector store existence: {e}")
             return False
             
-    def _check_rag_init_and_process_query(self):
-        """Check RAG initialization status and process pending query"""
+    def _queue_pending_query(self, game_name, query, game_context, original_query, skip_query_processing,
+                             unified_query_result, stop_flag, speculative_task, request_started_at):
+        """Queue a query until the RAG engine of game_name can serve it (dispatched by _check_rag_init_and_process_query)"""
+        with self._pending_query_lock:
+            self._pending_query = {
+                'game_name': game_name,
+                'query': query,
+                'game_context': game_context,
+                'original_query': original_query,
+                'skip_query_processing': skip_query_processing,
+                'unified_query_result': unified_query_result,
+                'stop_flag': stop_flag,
+                # Raw-query retrieval and submit time survive the wait, so the vector leg and TTFT stay correct
+                'speculative_task': speculative_task,
+                'request_started_at': request_started_at
+            }
+
+    def holds_pending_speculation(self, speculative_task) -> bool:
+        """Whether the queued query carries this speculative retrieval task"""
+        with self._pending_query_lock:
+            return bool(self._pending_query) and self._pending_query.get('speculative_task') is speculative_task
+
+    def _check_rag_init_and_process_query(self, ready: Optional[bool] = None):
+        """Dispatch the queued query as soon as the RAG engine can serve it (readiness gate callback)"""
         try:
-            # Check if initialization is complete
-            if not self._rag_initializing:
-                # Stop the timer
-                if hasattr(self, '_init_check_timer') and self._init_check_timer:
-                    self._init_check_timer.stop()
-                    self._init_check_timer = None
-                
-                # Check if initialization was successful
-                if self.rag_engine and self._pending_query:
-                    # Process the pending query
-                    query_data = self._pending_query
-                    self._pending_query = None
-                    
-                    # Continue with query processing
-                    asyncio.create_task(self.generate_guide_async(
-                        query_data['query'],
-                        query_data['game_context'],
-                        query_data['original_query'],
-                        query_data['skip_query_processing'],
-                        query_data['unified_query_result'],
-                        query_data['stop_flag']
-                    ))
-                elif not self.rag_engine and self._pending_query:
-                    # Initialization failed, show appropriate message
+            gate = self._rag_ready
+            engine_ready = self.rag_engine is not None and self.rag_engine.search_ready
+            if self._rag_initializing and not engine_ready and not gate.is_resolved():
+                # A newer initialization round (e.g. another game) is still loading, follow its gate
+                gate.add_callback(self._check_rag_init_and_process_query, waiter="pending_query")
+                return
+            
+            # The engine may have been switched to another game while the query waited
+            engine_game = self._rag_init_game if self._rag_initializing else self._current_rag_game
+            with self._pending_query_lock:
+                query_data = self._pending_query
+                if not query_data:
+                    return
+                game_switched = self.rag_engine is not None and engine_game != query_data['game_name']
+                reload_game = game_switched and not query_data.get('reloaded')
+                if reload_game:
+                    # Stays queued while its game is loaded again (once)
+                    query_data['reloaded'] = True
+                else:
                     self._pending_query = None
-                    self.streaming_chunk_ready.emit(self._get_localized_message("game_not_supported"))
+            
+            if reload_game:
+                logger.info(f"🔄 RAG engine is for '{engine_game}', reloading '{query_data['game_name']}' for the queued query")
+                llm_config = self._llm_config
+                self._init_rag_for_game(query_data['game_name'], llm_config,
+                                        llm_config.get_api_key() if llm_config else None)
+                self._rag_ready.add_callback(self._check_rag_init_and_process_query, waiter="pending_query")
+                return
+            if game_switched:
+                self.streaming_chunk_ready.emit(self._get_localized_message("game_not_supported"))
+                # Dropped: its speculative retrieval is no longer awaited
+                task = query_data['speculative_task']
+                if task and not task.done():
+                    task.cancel()
+                return
+            
+            if self.rag_engine:
+                # Continue with query processing on the async loop
+                self.async_worker.submit(self.generate_guide_async(
+                    query_data['query'],
+                    query_data['game_context'],
+                    query_data['original_query'],
+                    query_data['skip_query_processing'],
+                    query_data['unified_query_result'],
+                    query_data['stop_flag'],
+                    speculative_task=query_data['speculative_task'],
+                    request_started_at=query_data['request_started_at']
+                ))
+            else:
+                # Initialization failed, show appropriate message
+                self.streaming_chunk_ready.emit(self._get_localized_message("game_not_supported"))
                     
         except Exception as e:
             logger.error(f"Error checking RAG initialization: {e}")
-            if hasattr(self, '_init_check_timer') and self._init_check_timer:
-                self._init_check_timer.stop()
-                self._init_check_timer = None
             
-    async def process_query_async(self, query: str, game_context: str = None, search_mode: str = "auto") -> QueryIntent:
+    async def process_query_async(self, query: str, game_context: str = None, search_mode: str = "auto", stop_flag=None) -> QueryIntent:
         """Process query using unified query processor for intent detection"""
         logger.info(f"Start unified query processing: '{query}' (game context: {game_context}, search mode: {search_mode}, limited mode: {self.limited_mode})")
         
@@ -824,7 +1043,7 @@ class RAGIntegration(QObject):
         # In cloud proxy模式下使用简化意图识别，允许继续调用后端模型
         if self.limited_mode:
             logger.info("🌐 Limited mode active，trying cloud preprocessing pipeline")
-            backend_intent = await self._process_query_via_backend(query, game_context)
+            backend_intent = await self._process_query_via_backend(query, game_context, stop_flag)
             if backend_intent:
                 return backend_intent
             logger.warning("Cloud preprocessing unavailable, falling back to lightweight detection")
@@ -833,7 +1052,7 @@ class RAGIntegration(QObject):
         # Ensure AI components are loaded (lazy loading)
         if not self._ensure_ai_components_loaded():
             logger.error("❌ AI component loading failed, attempting cloud preprocessing fallback")
-            backend_intent = await self._process_query_via_backend(query, game_context)
+            backend_intent = await self._process_query_via_backend(query, game_context, stop_flag)
             if backend_intent:
                 return backend_intent
             return QueryIntent(
@@ -853,6 +1072,30 @@ class RAGIntegration(QObject):
             # Fallback to simple detection
             logger.warning("Unified query processor is not available, use simple intent detection")
             return self._simple_intent_detection(query)
+        
+        # 离线答案包：与预生成的常见问题完全匹配时直接走攻略流程，不调用LLM
+        pack_result = self._match_answer_pack_locally(query, game_context)
+        if pack_result:
+            logger.info(f"📚 Answer pack fast path: '{query}', LLM call skipped")
+            return QueryIntent(
+                intent_type=pack_result.intent,
+                confidence=pack_result.confidence,
+                rewritten_query=pack_result.rewritten_query,
+                translated_query=pack_result.translated_query,
+                unified_query_result=pack_result
+            )
+        
+        # 本地快速意图分类：有把握时直接返回结果，不调用LLM
+        local_decision, local_result = self._classify_intent_locally(query, game_context)
+        if local_result:
+            logger.info(f"⚡ Local intent fast path: '{query}' -> intent: {local_result.intent} (confidence: {local_result.confidence:.3f}), LLM call skipped")
+            return QueryIntent(
+                intent_type=local_result.intent,
+                confidence=local_result.confidence,
+                rewritten_query=local_result.rewritten_query,
+                translated_query=local_result.translated_query,
+                unified_query_result=local_result
+            )
             
         try:
             # Use stored LLM configuration, if not create temporary configuration
@@ -879,13 +1122,26 @@ class RAGIntegration(QObject):
                     return self._simple_intent_detection(query)
             
             # Use unified query processor for processing (merged translation, rewrite, intent detection)
-            result = await asyncio.to_thread(
-                process_query_unified,
-                query,
-                llm_config=llm_config
-            )
+            if process_query_unified_async:
+                # Async client: no thread parked on the request or the retry backoff, and stop cancels it
+                result = await process_query_unified_async(
+                    query,
+                    llm_config=llm_config,
+                    timeout=llm_config.timeout,
+                    stop_flag=stop_flag
+                )
+            else:
+                result = await asyncio.to_thread(
+                    process_query_unified,
+                    query,
+                    llm_config=llm_config
+                )
             
             logger.info(f"Unified processing successful: '{query}' -> intent: {result.intent} (confidence: {result.confidence:.3f})")
+            classifier = self.local_intent_classifier
+            if local_decision and classifier and "Basic processing" not in result.reasoning:
+                # 记录本地分类与LLM的一致性，用于校准阈值
+                classifier.record_llm_outcome(local_decision, result.intent)
             logger.info(f"  Translated result: '{result.translated_query}'")
             logger.info(f"  Rewritten result: '{result.rewritten_query}'")
             logger.info(f"  BM25 optimized: '{result.bm25_optimized_query}'")
@@ -902,6 +1158,110 @@ class RAGIntegration(QObject):
             logger.error(f"Unified query processing failed: {e}")
             return self._simple_intent_detection(query)
             
+    def _get_local_intent_classifier(self):
+        """Get (lazily create) the local intent classifier, None if disabled or unavailable"""
+        if self.local_intent_classifier is None:
+            try:
+                processing_config = self._local_intent_settings()
+                if not processing_config.enable_local_intent:
+                    return None
+                from src.game_wiki_tooltip.ai.local_intent_classifier import LocalIntentClassifier
+                self.local_intent_classifier = LocalIntentClassifier(
+                    confidence_threshold=processing_config.local_intent_threshold,
+                    allow_guide_fast_path=processing_config.local_intent_guide_fast_path,
+                    reranker=getattr(self.rag_engine, "reranker", None)
+                )
+            except Exception as e:
+                logger.warning(f"Local intent classifier unavailable: {e}")
+                return None
+        return self.local_intent_classifier
+    
+    def _classify_intent_locally(self, query: str, game_context: Optional[str]):
+        """Run the local intent classifier, returns (decision, UnifiedQueryResult or None)"""
+        classifier = self._get_local_intent_classifier()
+        if not classifier:
+            return None, None
+        try:
+            from src.game_wiki_tooltip.ai.rag_query import map_window_title_to_game_name
+            game_name = map_window_title_to_game_name(game_context) if game_context else None
+            decision, result = classifier.classify(query, game_name)
+            if logger.isEnabledFor(logging.DEBUG):
+                stats = classifier.get_stats()
+                logger.debug(f"Local intent: {decision.intent} (confidence: {decision.confidence:.2f}, {decision.reason}), "
+                             f"skipped LLM calls: {stats['skipped_llm_calls']}/{stats['classified']}, "
+                             f"agreement with LLM on deferred queries: {stats['shadow_agreed']}/{stats['shadow_checked']}")
+            return decision, result
+        except Exception as e:
+            logger.warning(f"Local intent classification failed: {e}")
+            return None, None
+    
+    def _match_answer_pack_locally(self, query: str, game_context: Optional[str]):
+        """离线答案包规范化精确匹配：命中时返回攻略意图的UnifiedQueryResult，否则返回None"""
+        engine = self.rag_engine
+        if not engine or not getattr(engine, "answer_pack", None) or not engine.summarizer or not game_context:
+            return None
+        try:
+            from src.game_wiki_tooltip.ai.rag_query import map_window_title_to_game_name
+            if map_window_title_to_game_name(game_context) != self._current_rag_game:
+                return None
+            language = engine.summarizer.resolve_response_language(query)
+            if not engine.answer_pack.match_key(query, language):
+                return None
+        except Exception as e:
+            logger.debug(f"Answer pack lookup failed: {e}")
+            return None
+        
+        # query_stream 会用原始查询再次命中同一答案并直接回放
+        return UnifiedQueryResult(
+            original_query=query,
+            detected_language=language,
+            translated_query=query,
+            rewritten_query=query,
+            bm25_optimized_query=query,
+            intent="guide",
+            confidence=1.0,
+            search_type="hybrid",
+            reasoning="Answer pack match",
+            translation_applied=False,
+            rewrite_applied=False,
+            processing_time=0.0
+        )
+    
+    def _load_local_intent_terms(self, game_name: str):
+        """用当前游戏的BM25词表和分块关键词构建本地意图分类词典"""
+        classifier = self._get_local_intent_classifier()
+        if not classifier or not self.rag_engine:
+            return
+        try:
+            from src.game_wiki_tooltip.ai.local_intent_classifier import GameTermDictionary
+            hybrid_retriever = getattr(self.rag_engine, "hybrid_retriever", None)
+            dictionary = GameTermDictionary.from_index(
+                bm25_indexer=getattr(hybrid_retriever, "bm25_indexer", None),
+                chunks=self.rag_engine.metadata
+            )
+            classifier.set_game_terms(game_name, dictionary)
+        except Exception as e:
+            logger.warning(f"Failed to build local intent term dictionary for '{game_name}': {e}")
+    
+    def warm_up_gemini_connection(self):
+        """设置加载后在后台预热Gemini客户端连接（同步连接池与查询事件循环上的异步连接池），首个查询无需再做TLS握手"""
+        if self.limited_mode:
+            return
+        try:
+            api_settings = self.settings_manager.get().get('api', {})
+            gemini_api_key = api_settings.get('gemini_api_key', '') or os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY')
+            if not gemini_api_key:
+                return
+            from src.game_wiki_tooltip.ai.gemini_client_registry import (
+                warm_up_gemini_client, warm_up_gemini_aio_client
+            )
+            # 同步连接池供嵌入调用使用
+            warm_up_gemini_client(gemini_api_key)
+            # 摘要、兜底攻略与统一查询处理走异步API，其连接池绑定在查询事件循环上
+            self.async_worker.submit(warm_up_gemini_aio_client(gemini_api_key), name="gemini-warmup")
+        except Exception as e:
+            logger.debug(f"Gemini connection warm-up skipped: {e}")
+    
     def _is_game_supported_for_wiki(self, window_title: str) -> bool:
         """Check if the game window supports wiki query (based on games.json configuration)"""
         try:
@@ -945,8 +1305,8 @@ class RAGIntegration(QObject):
                 translated_query=query
             )
     
-    async def _process_query_via_backend(self, query: str, game_context: Optional[str]) -> Optional[QueryIntent]:
-        """Use backend proxy model to perform translation/intent/rewriting"""
+    async def _process_query_via_backend(self, query: str, game_context: Optional[str], stop_flag=None) -> Optional[QueryIntent]:
+        """Use backend proxy model to perform translation/intent/rewriting (stop_flag aborts the request)"""
 
         if not self.backend_client:
             logger.debug("Backend client unavailable, cannot run cloud preprocessing")
@@ -975,16 +1335,21 @@ class RAGIntegration(QObject):
         )
 
         loop = asyncio.get_running_loop()
+        cancel_token = stop_flag if isinstance(stop_flag, CancellationToken) else None
         try:
-            response = await loop.run_in_executor(
-                None,
-                lambda: self.backend_client.chat_completion(
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt},
-                    ],
-                    temperature=0.1,
+            response = await await_cancellable(
+                loop.run_in_executor(
+                    None,
+                    lambda: self.backend_client.chat_completion(
+                        messages=[
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": user_prompt},
+                        ],
+                        temperature=0.1,
+                        cancel_token=cancel_token,
+                    ),
                 ),
+                stop_flag,
             )
         except Exception as exc:  # noqa: BLE001
             logger.warning(f"Cloud preprocessing request failed: {exc}")
@@ -1248,7 +1613,70 @@ class RAGIntegration(QObject):
         else:
             logger.warning("⚠️ Received wiki page callback, but no pending wiki information")
             
-    async def generate_guide_async(self, query: str, game_context: str = None, original_query: str = None, skip_query_processing: bool = False, unified_query_result = None, stop_flag = None):
+    def start_speculative_retrieval(self, query: str, game_context: str = None, search_mode: str = "auto"):
+        """
+        Start retrieval on the raw query in a worker thread while the LLM rewrite is in flight
+        
+        Only runs when the RAG engine for this window's game is already initialized.
+        
+        Returns:
+            asyncio.Task resolving to the speculation (or None), or None if not started
+        """
+        if self.limited_mode or search_mode == "wiki" or not self.rag_engine or not game_context:
+            return None
+        if not getattr(self.rag_engine, "enable_speculative_retrieval", False):
+            return None
+        
+        try:
+            from src.game_wiki_tooltip.ai.rag_query import map_window_title_to_game_name
+            if map_window_title_to_game_name(game_context) != self._current_rag_game:
+                return None
+        except Exception as e:
+            logger.debug(f"Speculative retrieval skipped, game mapping failed: {e}")
+            return None
+        
+        logger.info(f"🔮 Start speculative retrieval on raw query: '{query}'")
+        return asyncio.create_task(asyncio.to_thread(self.rag_engine.speculative_retrieve, query))
+    
+    async def _await_speculation(self, speculative_task, stop_flag=None):
+        """Wait for the speculative retrieval task, returns its result or None"""
+        if speculative_task is None:
+            return None
+        try:
+            # A stop cancels the speculative task and returns at once
+            return await await_cancellable(speculative_task, stop_flag)
+        except asyncio.CancelledError:
+            return None
+        except Exception as e:
+            logger.warning(f"Speculative retrieval failed, retrieving serially: {e}")
+            return None
+    
+    def _record_ttft(self, request_started_at: Optional[float], speculative: bool = False, mode: Optional[str] = None) -> None:
+        """记录从提交查询到第一个流式片段的时间"""
+        if request_started_at is None:
+            return
+        ttft = time.perf_counter() - request_started_at
+        mode = mode or ("speculative" if speculative else "serial")
+        self.ttft_stats[mode].append(ttft)
+        report = self.get_ttft_report()
+        print(f"⏱️ [TTFT-DEBUG] Time to first token: {ttft:.3f}s ({mode})")
+        for name, stats in report.items():
+            if stats["count"]:
+                print(f"   - {name}: avg {stats['avg']:.3f}s, p50 {stats['p50']:.3f}s over {stats['count']} queries")
+    
+    def get_ttft_report(self) -> Dict[str, Dict[str, float]]:
+        """Time-to-first-token summary with and without speculative retrieval"""
+        report = {}
+        for mode, samples in self.ttft_stats.items():
+            ordered = sorted(samples)
+            report[mode] = {
+                "count": len(ordered),
+                "avg": sum(ordered) / len(ordered) if ordered else 0.0,
+                "p50": ordered[len(ordered) // 2] if ordered else 0.0
+            }
+        return report
+    
+    async def generate_guide_async(self, query: str, game_context: str = None, original_query: str = None, skip_query_processing: bool = False, unified_query_result = None, stop_flag = None, speculative_task = None, request_started_at: Optional[float] = None):
         """Generate guide response with streaming
         
         Args:
@@ -1257,6 +1685,8 @@ class RAGIntegration(QObject):
             original_query: 原始查询（用于答案生成）
             skip_query_processing: 是否跳过RAG内部的查询处理
             unified_query_result: 预处理的统一查询结果（来自process_query_unified）
+            speculative_task: 原始查询的推测检索任务（来自start_speculative_retrieval）
+            request_started_at: 查询提交时间（perf_counter），用于统计首字延迟
         """
         # Limited mode 下使用后端模型代理
         if self.limited_mode:
@@ -1264,6 +1694,7 @@ class RAGIntegration(QObject):
                 query=query,
                 game_context=game_context,
                 unified_query_result=unified_query_result,
+                stop_flag=stop_flag,
             )
             await self._generate_via_backend(
                 query,
@@ -1271,10 +1702,15 @@ class RAGIntegration(QObject):
                 game_context,
                 stop_flag,
                 context_snippets=context_snippets,
+                request_started_at=request_started_at,
             )
             return
             
-        if not self.rag_engine:
+        # A background warm-up may have created the engine without finishing loading it;
+        # once chunks and BM25 are loaded the query is served while the vector index still loads
+        if self.rag_engine and self._rag_initializing and self.rag_engine.search_ready:
+            self._rag_init_warm_up = False
+        if not self.rag_engine or (self._rag_initializing and not self.rag_engine.search_ready):
             # Try to initialize RAG engine for specified game
             if game_context:
                 from src.game_wiki_tooltip.ai.rag_query import map_window_title_to_game_name
@@ -1304,25 +1740,19 @@ class RAGIntegration(QObject):
                         # Check if RAG is already initializing
                         if self._rag_initializing and self._rag_init_game == vector_game_name:
                             logger.info(f"RAG already initializing for {vector_game_name}, showing status and queueing query")
+                            # The query needs this engine, a focus warm-up must no longer be cancelled
+                            self._rag_init_warm_up = False
                             # Show initialization status
                             self.streaming_chunk_ready.emit("🚀 AI guide system is initializing, please wait a moment...")
                             
                             # Queue the query to be processed after initialization
-                            self._pending_query = {
-                                'query': query,
-                                'game_context': game_context,
-                                'original_query': original_query,
-                                'skip_query_processing': skip_query_processing,
-                                'unified_query_result': unified_query_result,
-                                'stop_flag': stop_flag
-                            }
+                            self._queue_pending_query(
+                                vector_game_name, query, game_context, original_query, skip_query_processing,
+                                unified_query_result, stop_flag, speculative_task, request_started_at
+                            )
                             
-                            # Start checking initialization status
-                            if not hasattr(self, '_init_check_timer') or not self._init_check_timer:
-                                from PyQt6.QtCore import QTimer
-                                self._init_check_timer = QTimer()
-                                self._init_check_timer.timeout.connect(self._check_rag_init_and_process_query)
-                                self._init_check_timer.start(100)  # Check every 100ms
+                            # Dispatched by the readiness gate the moment the engine can serve it
+                            self._rag_ready.add_callback(self._check_rag_init_and_process_query, waiter="pending_query")
                             return
                         
                         # Check if vector store exists before attempting initialization
@@ -1363,7 +1793,8 @@ class RAGIntegration(QObject):
                                         query=query,
                                         game_context=game_context,
                                         language=current_lang,
-                                        original_query=original_query
+                                        original_query=original_query,
+                                        stop_flag=stop_flag
                                     ):
                                         # Check stop flag if provided
                                         if stop_flag and stop_flag():
@@ -1395,21 +1826,13 @@ class RAGIntegration(QObject):
                         self.streaming_chunk_ready.emit("🚀 AI guide system is initializing for the first time, please wait...")
                         
                         # Queue the query
-                        self._pending_query = {
-                            'query': query,
-                            'game_context': game_context,
-                            'original_query': original_query,
-                            'skip_query_processing': skip_query_processing,
-                            'unified_query_result': unified_query_result,
-                            'stop_flag': stop_flag
-                        }
+                        self._queue_pending_query(
+                            vector_game_name, query, game_context, original_query, skip_query_processing,
+                            unified_query_result, stop_flag, speculative_task, request_started_at
+                        )
                         
-                        # Start checking initialization status
-                        if not hasattr(self, '_init_check_timer') or not self._init_check_timer:
-                            from PyQt6.QtCore import QTimer
-                            self._init_check_timer = QTimer()
-                            self._init_check_timer.timeout.connect(self._check_rag_init_and_process_query)
-                            self._init_check_timer.start(100)  # Check every 100ms
+                        # Dispatched by the readiness gate the moment the engine can serve it
+                        self._rag_ready.add_callback(self._check_rag_init_and_process_query, waiter="pending_query")
                         
                         return
                     else:
@@ -1483,7 +1906,8 @@ class RAGIntegration(QObject):
                                     query=query,
                                     game_context=game_context,
                                     language=current_lang,
-                                    original_query=original_query
+                                    original_query=original_query,
+                                    stop_flag=stop_flag
                                 ):
                                     # Check stop flag if provided
                                     if stop_flag and stop_flag():
@@ -1537,12 +1961,15 @@ class RAGIntegration(QObject):
             stream_generator = None
             try:
                 has_output = False
+                speculative_retrieval = await self._await_speculation(speculative_task, stop_flag)
                 # Get streaming generator
                 stream_generator = self.rag_engine.query_stream(
                     question=query, 
                     top_k=3, 
                     original_query=original_query,
-                    unified_query_result=unified_query_result
+                    unified_query_result=unified_query_result,
+                    speculative_retrieval=speculative_retrieval,
+                    stop_flag=stop_flag
                 )
                 
                 # Use real streaming API
@@ -1559,6 +1986,8 @@ class RAGIntegration(QObject):
                     
                     chunk_str = str(chunk) if chunk is not None else ""
                     if chunk_str.strip():  # Only send non-empty content
+                        if not has_output:
+                            self._record_ttft(request_started_at, speculative=speculative_retrieval is not None)
                         has_output = True
                         self.streaming_chunk_ready.emit(chunk_str)
                         await asyncio.sleep(0.01)  # Very short delay to keep UI responsive
@@ -1742,20 +2171,7 @@ class RAGIntegration(QObject):
 
 
     def _is_stop_requested(self, stop_flag) -> bool:
-        if not stop_flag:
-            return False
-        try:
-            if callable(stop_flag):
-                return bool(stop_flag())
-        except Exception:
-            return False
-
-        if hasattr(stop_flag, "is_set"):
-            try:
-                return bool(stop_flag.is_set())
-            except Exception:
-                return False
-        return False
+        return is_cancel_requested(stop_flag)
 
     async def _generate_via_backend(
         self,
@@ -1765,8 +2181,9 @@ class RAGIntegration(QObject):
         stop_flag,
         *,
         context_snippets: Optional[List[Dict[str, Any]]] = None,
+        request_started_at: Optional[float] = None,
     ) -> None:
-        """Use backend chat proxy to generate responses in limited mode"""
+        """Use backend chat proxy to generate responses in limited mode (streamed when the backend supports it)"""
         # 云端代理流程：请求前后都要判断停止标记，并记录埋点
         if self._is_stop_requested(stop_flag):
             logger.info("Cloud chat aborted before request (stop flag set)")
@@ -1809,14 +2226,39 @@ class RAGIntegration(QObject):
         loop = asyncio.get_running_loop()
         import time
         start_ts = time.perf_counter()
+        # 取消令牌触发时直接关闭进行中的 HTTP 连接，本协程立即返回
+        cancel_token = stop_flag if isinstance(stop_flag, CancellationToken) else None
+
+        # 流式：增量到达即转发；流未能建立时退回一次性请求
+        if getattr(self.backend_client, "chat_stream_enabled", False):
+            handled = await self._stream_via_backend(
+                query,
+                game_context,
+                messages,
+                stop_flag,
+                preferred_model=preferred_model,
+                provider=provider,
+                start_ts=start_ts,
+                context_attached=bool(context_snippets),
+                request_started_at=request_started_at,
+            )
+            if handled:
+                return
+            logger.info("Cloud chat stream unavailable, falling back to a blocking request")
+            start_ts = time.perf_counter()
+
         try:
-            response = await loop.run_in_executor(
-                None,
-                lambda: self.backend_client.chat_completion(
-                    messages=messages,
-                    model=preferred_model,
-                    provider=provider,
+            response = await await_cancellable(
+                loop.run_in_executor(
+                    None,
+                    lambda: self.backend_client.chat_completion(
+                        messages=messages,
+                        model=preferred_model,
+                        provider=provider,
+                        cancel_token=cancel_token,
+                    ),
                 ),
+                stop_flag,
             )
         except Exception as exc:
             duration_ms = (time.perf_counter() - start_ts) * 1000
@@ -1892,6 +2334,112 @@ class RAGIntegration(QObject):
 
         self.streaming_chunk_ready.emit(content if content.endswith("\n") else f"{content}\n")
 
+    async def _stream_via_backend(
+        self,
+        query: str,
+        game_context: Optional[str],
+        messages: List[Dict[str, Any]],
+        stop_flag,
+        *,
+        preferred_model: Optional[str],
+        provider: Optional[str],
+        start_ts: float,
+        context_attached: bool,
+        request_started_at: Optional[float] = None,
+    ) -> bool:
+        """流式调用后端聊天代理并逐段转发到 streaming_chunk_ready
+
+        返回 False 表示流未能建立（调用方改用一次性请求），其余情况（包括中途失败）均已处理。
+        """
+        loop = asyncio.get_running_loop()
+        cancel_token = stop_flag if isinstance(stop_flag, CancellationToken) else None
+        provider_hint = provider or "unknown"
+
+        stream = await await_cancellable(
+            loop.run_in_executor(
+                None,
+                lambda: self.backend_client.chat_completion_stream(
+                    messages=messages,
+                    model=preferred_model,
+                    provider=provider,
+                    cancel_token=cancel_token,
+                ),
+            ),
+            stop_flag,
+        )
+        if stream is None:
+            return False
+
+        # 每个增量在线程池中读取（阻塞在 socket 上），停止时取消令牌关闭连接
+        deltas = iter(stream)
+        first_delta_ms = None
+        try:
+            while True:
+                delta = await await_cancellable(loop.run_in_executor(None, next, deltas, None), stop_flag)
+                if delta is None:
+                    break
+                if first_delta_ms is None:
+                    first_delta_ms = (time.perf_counter() - start_ts) * 1000
+                    logger.info(f"⚡ Cloud chat first delta after {first_delta_ms:.0f} ms (format={stream.format})")
+                    self._record_ttft(request_started_at, mode="backend_stream")
+                self.streaming_chunk_ready.emit(delta)
+        except asyncio.CancelledError:
+            stream.close()
+            logger.info("Cloud chat stream stopped")
+            raise
+        except Exception as exc:  # noqa: BLE001
+            stream.close()
+            duration_ms = (time.perf_counter() - start_ts) * 1000
+            logger.warning(f"Cloud chat stream failed: {exc}")
+            self._track_model_event(
+                stream.provider or provider_hint,
+                False,
+                stream.model or preferred_model,
+                fallback_used=first_delta_ms is None,
+                reason="stream_error" if first_delta_ms is None else "stream_interrupted",
+                duration_ms=duration_ms,
+                context_attached=context_attached,
+            )
+            if first_delta_ms is None:
+                await self._fallback_to_wiki(query, game_context)
+            else:
+                self.streaming_chunk_ready.emit("\n")
+            return True
+
+        duration_ms = (time.perf_counter() - start_ts) * 1000
+        content = stream.content
+        if not content.strip():
+            logger.warning("Cloud chat stream returned no content, fallback to wiki")
+            self._track_model_event(
+                stream.provider or provider_hint,
+                False,
+                stream.model or preferred_model,
+                fallback_used=True,
+                reason="empty_content",
+                duration_ms=duration_ms,
+                context_attached=context_attached,
+            )
+            await self._fallback_to_wiki(query, game_context)
+            return True
+
+        logger.info(
+            "Cloud chat stream success provider=%s model=%s fallback=%s",
+            stream.provider,
+            stream.model,
+            stream.fallback_used,
+        )
+        self._track_model_event(
+            stream.provider or provider_hint,
+            True,
+            stream.model or preferred_model,
+            fallback_used=stream.fallback_used,
+            duration_ms=duration_ms,
+            context_attached=context_attached,
+        )
+        if not content.endswith("\n"):
+            self.streaming_chunk_ready.emit("\n")
+        return True
+
     async def _collect_context_snippets(
         self,
         *,
@@ -1899,8 +2447,9 @@ class RAGIntegration(QObject):
         game_context: Optional[str],
         unified_query_result: Optional[Any],
         top_k: int = 3,
+        stop_flag=None,
     ) -> List[Dict[str, Any]]:
-        """检索本地向量库，返回用于云端代理的上下文片段"""
+        """检索本地向量库，返回用于云端代理的上下文片段（stop_flag 触发时立即放弃检索）"""
 
         if not query or not _lazy_load_ai_modules():
             return []
@@ -1927,7 +2476,12 @@ class RAGIntegration(QObject):
             logger.debug("No vector game mapping available, skip context")
             return []
 
-        rag_instance = self._lightweight_rag_cache.get(vector_game_name)
+        # 优先复用池中的引擎（完整攻略流程加载的同一游戏引擎也可直接用于检索）
+        rag_instance = self.engine_pool.acquire(vector_game_name)
+        if rag_instance is not None and not rag_instance.is_initialized:
+            self.engine_pool.release(vector_game_name, rag_instance)
+            self.engine_pool.discard(vector_game_name)
+            rag_instance = None
 
         if not rag_instance:
             try:
@@ -1952,51 +2506,59 @@ class RAGIntegration(QObject):
             except VectorStoreUnavailableError as exc:
                 logger.warning(f"Vector store unavailable for game {vector_game_name}: {exc}")
                 return []
-            self._lightweight_rag_cache[vector_game_name] = rag_instance
-        elif not rag_instance.is_initialized:
-            try:
-                await rag_instance.initialize(vector_game_name)
-            except VectorStoreUnavailableError as exc:
-                logger.warning(f"Vector store init failed for game {vector_game_name}: {exc}")
-                return []
+            self.engine_pool.put(vector_game_name, rag_instance, acquire=True)
 
         search_response: Dict[str, Any] = {"results": []}
 
         try:
             if unified_query_result:
-                search_response = await asyncio.to_thread(
-                    rag_instance._search_hybrid_with_processed_query,  # noqa: SLF001
-                    unified_query_result,
-                    top_k,
+                search_response = await await_cancellable(
+                    asyncio.to_thread(
+                        rag_instance._search_hybrid_with_processed_query,  # noqa: SLF001
+                        unified_query_result,
+                        top_k,
+                    ),
+                    stop_flag,
                 )
             elif getattr(rag_instance, "hybrid_retriever", None):
                 if getattr(rag_instance, "google_api_key", None):
-                    search_response = await asyncio.to_thread(
-                        rag_instance.hybrid_retriever.search,
-                        query,
-                        top_k,
+                    search_response = await await_cancellable(
+                        asyncio.to_thread(
+                            rag_instance.hybrid_retriever.search,
+                            query,
+                            top_k,
+                        ),
+                        stop_flag,
                     )
                 else:
                     bm25_indexer = getattr(rag_instance.hybrid_retriever, "bm25_indexer", None)
                     if not bm25_indexer:
                         logger.debug("BM25 indexer unavailable, skip context")
                         return []
-                    bm25_results = await asyncio.to_thread(
-                        bm25_indexer.search,
-                        query,
-                        max(top_k, 5),
+                    bm25_results = await await_cancellable(
+                        asyncio.to_thread(
+                            bm25_indexer.search,
+                            query,
+                            max(top_k, 5),
+                        ),
+                        stop_flag,
                     )
                     search_response = {"results": bm25_results}
             else:
-                base_results = await asyncio.to_thread(
-                    rag_instance._search_faiss if rag_instance.config and rag_instance.config.get("vector_store_type") == "faiss" else rag_instance._search_qdrant,  # noqa: SLF001
-                    query,
-                    top_k,
+                base_results = await await_cancellable(
+                    asyncio.to_thread(
+                        rag_instance._search_faiss if rag_instance.config and rag_instance.config.get("vector_store_type") == "faiss" else rag_instance._search_qdrant,  # noqa: SLF001
+                        query,
+                        top_k,
+                    ),
+                    stop_flag,
                 )
                 search_response = {"results": base_results}
         except Exception as exc:  # noqa: BLE001
             logger.warning(f"Collecting context snippets failed: {exc}")
             return []
+        finally:
+            self.engine_pool.release(vector_game_name, rag_instance)
 
         results = search_response.get("results", [])
         if not results:
@@ -2046,22 +2608,39 @@ class RAGIntegration(QObject):
         if not snippets:
             return ""
 
+        # 与 Gemini 摘要共用打包器：截断摘要、超出预算时先丢弃得分最低的片段
+        # 按实际发送的文本估算 token，编号取最大序号，估算不会偏小
+        packed = self.context_packer.pack(
+            snippets,
+            render=lambda snippet: self._render_context_snippet(snippet, len(snippets))
+        )
+
         header = "以下是根据当前游戏检索到的参考资料，请结合这些内容回答用户问题："
         if game_context:
             header = f"以下是关于 {game_context} 的参考资料，请结合这些内容回答用户问题："
 
-        lines: List[str] = [header]
-        for idx, snippet in enumerate(snippets, 1):
-            title = snippet.get("title") or f"片段 {idx}"
-            lines.append(f"{idx}. {title}")
-            lines.append(snippet.get("summary", "").strip())
-            if snippet.get("source"):
-                lines.append(f"来源：{snippet['source']}")
-            if snippet.get("url"):
-                lines.append(f"链接：{snippet['url']}")
-            lines.append("")
+        blocks = [self._render_context_snippet(snippet, idx) for idx, snippet in enumerate(packed.items, 1)]
+        message = "\n".join([header] + ["\n\n".join(blocks)]).strip()
+        logger.info(
+            "📦 Limited mode context packed snippets=%s/%s tokens=%s budget=%s dropped=%s",
+            len(packed.items),
+            len(snippets),
+            estimate_tokens(message),
+            packed.budget,
+            packed.dropped,
+        )
+        return message
 
-        return "\n".join(lines).strip()
+    @staticmethod
+    def _render_context_snippet(snippet: Dict[str, Any], idx: int) -> str:
+        """把单个参考片段渲染为提示词中的文本段落"""
+        title = snippet.get("title") or f"片段 {idx}"
+        lines = [f"{idx}. {title}", (snippet.get("summary") or "").strip()]
+        if snippet.get("source"):
+            lines.append(f"来源：{snippet['source']}")
+        if snippet.get("url"):
+            lines.append(f"链接：{snippet['url']}")
+        return "\n".join(lines)
 
     async def _fallback_to_wiki(
         self,
@@ -2504,6 +3083,7 @@ class IntegratedAssistantController(AssistantController):
             logger.info("✅ AI module background loading completed")
             # Record loading success status
             self._ai_modules_ready = True
+            self.rag_integration.warm_up_gemini_connection()
             
             # Now initialize RAG if we have cached game window
             if hasattr(self.rag_integration, '_last_vector_game_name') and self.rag_integration._last_vector_game_name:
@@ -2574,8 +3154,9 @@ class IntegratedAssistantController(AssistantController):
                     "game_id": vector_game_name,
                 },
             )
-            # Check if game needs to be switched
-            if not hasattr(self, '_current_vector_game') or self._current_vector_game != vector_game_name:
+            # Check if game needs to be switched (or the engine was switched away by a focus warm-up)
+            if (getattr(self, '_current_vector_game', None) != vector_game_name
+                    or self.rag_integration._current_rag_game != vector_game_name):
                 logger.info(f"🔄 Switch RAG engine: {getattr(self, '_current_vector_game', 'None')} -> {vector_game_name}")
                 self._current_vector_game = vector_game_name
                 # Asynchronously initialize RAG engine, do not block UI
@@ -2624,6 +3205,40 @@ class IntegratedAssistantController(AssistantController):
         )
         
         # 移除窗口状态变化的信号连接 - 改为热键触发时按需检测
+
+        # 游戏窗口获得焦点时预热索引，焦点离开时取消未被查询使用的预热
+        self._warm_up_game = None
+        self._warm_up_timer = QTimer()
+        self._warm_up_timer.setSingleShot(True)
+        self._warm_up_timer.timeout.connect(self._start_focus_warm_up)
+        self.smart_interaction.foreground_game_changed.connect(
+            self._on_foreground_game_changed
+        )
+
+    def _on_foreground_game_changed(self, window_title: str):
+        """Schedule a warm-up of the focused game's index, or cancel it when focus moves away"""
+        from src.game_wiki_tooltip.ai.rag_query import map_window_title_to_game_name
+
+        vector_game_name = map_window_title_to_game_name(window_title) if window_title else None
+        if vector_game_name == self._warm_up_game:
+            return
+
+        self._warm_up_timer.stop()
+        if self._warm_up_game:
+            self.rag_integration.cancel_rag_warm_up(self._warm_up_game)
+        self._warm_up_game = vector_game_name
+
+        if not vector_game_name or self.rag_integration.limited_mode:
+            return
+        if self.rag_integration._current_rag_game == vector_game_name and self.rag_integration.rag_engine:
+            return
+        logger.info(f"🔥 Game window focused, warming up '{vector_game_name}' in {WARM_UP_FOCUS_DELAY_MS}ms")
+        self._warm_up_timer.start(WARM_UP_FOCUS_DELAY_MS)
+
+    def _start_focus_warm_up(self):
+        """Start the low-priority background load of the focused game's index"""
+        if self._warm_up_game:
+            self._reinitialize_rag_for_game(self._warm_up_game, warm_up=True)
     
     def handle_settings_requested(self):
         """Handle settings window request from chat window"""
@@ -3412,14 +4027,22 @@ class IntegratedAssistantController(AssistantController):
             logger.error(f"Wiki result handling error: {e}")
             self._on_error(str(e))
             
-    def _reinitialize_rag_for_game(self, vector_game_name: str, retry_count: int = 0):
-        """Reinitialize RAG engine for specific vector library (asynchronous, not blocking UI)"""
+    def _reinitialize_rag_for_game(self, vector_game_name: str, retry_count: int = 0, warm_up: bool = False):
+        """
+        Reinitialize RAG engine for specific vector library (asynchronous, not blocking UI)
+
+        warm_up: background load triggered by game window focus, cancelled when focus moves away
+        """
         try:
-            logger.info(f"🚀 Start reinitializing RAG engine for vector library '{vector_game_name}' (asynchronous mode)")
+            logger.info(f"🚀 Start reinitializing RAG engine for vector library '{vector_game_name}' (asynchronous mode, warm-up: {warm_up})")
             
             # Check if RAG is already initializing or initialized for this game
-            if self.rag_integration._rag_initializing:
-                logger.info(f"⚠️ RAG already initializing for game '{self.rag_integration._rag_init_game}', skipping")
+            # (loading of another game is cancelled by _init_rag_for_game)
+            if self.rag_integration._rag_initializing and self.rag_integration._rag_init_game == vector_game_name:
+                if not warm_up:
+                    # Promote a running warm-up so that leaving the window no longer cancels it
+                    self.rag_integration._rag_init_warm_up = False
+                logger.info(f"⚠️ RAG already initializing for game '{vector_game_name}', skipping")
                 return
                 
             if self.rag_integration._current_rag_game == vector_game_name and self.rag_integration.rag_engine:
@@ -3451,7 +4074,7 @@ class IntegratedAssistantController(AssistantController):
                         logger.info(f"AI components not ready, retrying RAG initialization (attempt {retry_count + 1}/{MAX_RETRIES})")
                     # Schedule another attempt with exponential backoff
                     delay = min(1000 * (2 ** retry_count), 10000)  # 1s, 2s, 4s, 8s, max 10s
-                    QTimer.singleShot(delay, lambda: self._reinitialize_rag_for_game(vector_game_name, retry_count + 1))
+                    QTimer.singleShot(delay, lambda: self._reinitialize_rag_for_game(vector_game_name, retry_count + 1, warm_up))
                     return
             
             # Get API settings
@@ -3477,7 +4100,9 @@ class IntegratedAssistantController(AssistantController):
                 self._llm_config = llm_config
                 
                 # Asynchronously initialize RAG engine (do not wait for completion)
-                self.rag_integration._init_rag_for_game(vector_game_name, llm_config, gemini_api_key, wait_for_init=False)
+                self.rag_integration._init_rag_for_game(
+                    vector_game_name, llm_config, gemini_api_key, wait_for_init=False, warm_up=warm_up
+                )
                 logger.info(f"🔄 RAG engine initialization started (asynchronous): {vector_game_name}")
             else:
                 logger.warning(f"⚠️ API key is missing, cannot initialize RAG engine (Gemini: {bool(gemini_api_key)})")
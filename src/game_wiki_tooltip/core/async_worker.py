@@ -0,0 +1,185 @@
+"""AsyncLoopThread: 常驻的后台 asyncio 事件循环线程
+
+职责：
+- 由 RAGIntegration 持有一个长期运行的事件循环线程，查询与引擎初始化都作为任务提交到这里，
+  不再每个查询 / 每次初始化新建并关闭一个事件循环
+- 循环上的资源（默认线程池、asyncio.to_thread 的工作线程、绑定到循环的异步客户端与缓存的协程状态）
+  在查询之间复用
+- submit 返回 LoopTask 句柄，可在任意线程取消或等待任务
+- 统计提交、完成、取消与失败的任务数
+
+注意：
+- 协程内的阻塞调用会卡住循环上的所有任务，阻塞操作应通过 asyncio.to_thread / run_in_executor 执行
+- 结果通过 Qt 信号发回主线程（跨线程发射的信号会排队到接收者所在线程）
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from typing import Any, Coroutine, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LoopTask:
+    """提交到循环线程的任务句柄（线程安全的取消与等待）"""
+
+    def __init__(self, owner: "AsyncLoopThread", name: str) -> None:
+        self.name = name
+        self._owner = owner
+        self._task: Optional[asyncio.Task] = None
+        self._cancel_requested = False
+        self._done = threading.Event()
+        self._result: Any = None
+        self._exception: Optional[BaseException] = None
+        self._cancelled = False
+
+    def _attach(self, task: asyncio.Task) -> None:
+        # 在循环线程中调用
+        self._task = task
+        task.add_done_callback(self._on_done)
+        if self._cancel_requested:
+            task.cancel()
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        if task.cancelled():
+            self._cancelled = True
+            self._owner._record("cancelled")
+        elif task.exception() is not None:
+            self._exception = task.exception()
+            self._owner._record("failed")
+            logger.error(f"Async task '{self.name}' failed: {self._exception}")
+        else:
+            self._result = task.result()
+            self._owner._record("completed")
+        self._done.set()
+
+    def cancel(self) -> None:
+        """请求取消任务（任务尚未开始时直接取消，运行中时在下一个 await 处抛出 CancelledError）"""
+        if self._done.is_set():
+            return
+        self._cancel_requested = True
+        self._owner.call_soon(self._cancel_in_loop)
+
+    def _cancel_in_loop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待任务结束（包括被取消），返回是否已结束"""
+        return self._done.wait(timeout)
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        """等待并返回任务结果，任务失败时抛出其异常"""
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Async task '{self.name}' did not finish within {timeout}s")
+        if self._cancelled:
+            raise asyncio.CancelledError()
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+
+class AsyncLoopThread:
+    """在守护线程中运行的常驻事件循环"""
+
+    def __init__(self, name: str = "async-worker") -> None:
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "cancelled": 0,
+            "failed": 0,
+        }
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        """启动循环线程（已启动时直接返回循环）"""
+        with self._lock:
+            if self._loop is not None and self._thread is not None and self._thread.is_alive():
+                return self._loop
+            ready = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(ready,), name=self.name, daemon=True)
+            self._thread.start()
+            ready.wait()
+            logger.info(f"Async loop thread started: {self.name}")
+            return self._loop
+
+    def _run(self, ready: threading.Event) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            try:
+                pending = asyncio.all_tasks(loop)
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+                loop.run_until_complete(loop.shutdown_asyncgens())
+                loop.run_until_complete(loop.shutdown_default_executor())
+            finally:
+                loop.close()
+                logger.info(f"Async loop thread stopped: {self.name}")
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        return self._loop
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def in_loop_thread(self) -> bool:
+        """当前是否在循环线程中（此时应直接 await，而不是 submit 后等待）"""
+        return self._thread is not None and threading.get_ident() == self._thread.ident
+
+    def submit(self, coro: Coroutine[Any, Any, Any], name: Optional[str] = None) -> LoopTask:
+        """把协程作为任务提交到循环线程，可在任意线程调用"""
+        loop = self.start()
+        handle = LoopTask(self, name or getattr(coro, "__qualname__", "task"))
+
+        def create_task() -> None:
+            handle._attach(loop.create_task(coro))
+
+        with self._lock:
+            self.stats["submitted"] += 1
+        loop.call_soon_threadsafe(create_task)
+        return handle
+
+    def call_soon(self, callback, *args) -> None:
+        """在循环线程中执行回调"""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(callback, *args)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """取消剩余任务并停止循环线程"""
+        loop, thread = self._loop, self._thread
+        if loop is None or thread is None or not thread.is_alive():
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+
+    def _record(self, outcome: str) -> None:
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        stats["running"] = self.is_running()
+        stats["pending"] = stats["submitted"] - stats["completed"] - stats["cancelled"] - stats["failed"]
+        return stats
@@ -2,36 +2,222 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 import socket
 import hashlib
+import json
 import platform
+import threading
 import uuid
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 from urllib.parse import urljoin, urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 
+from .cancellation import CancellationToken
 from .config import SettingsManager
+from .single_flight import get_single_flight
 
 logger = logging.getLogger(__name__)
 
+# 当前线程正在发送的请求所属的取消令牌（requests 在调用线程中同步取连接并收发）
+_request_cancel = threading.local()
+
+
+def _abort_connection(conn) -> None:
+    """关闭连接的 socket，阻塞在 connect / recv 上的请求线程立即以连接错误返回"""
+    sock = getattr(conn, "sock", None)
+    if sock is None:
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    try:
+        conn.close()
+    except Exception:  # noqa: BLE001
+        pass
+
+
+class _CancellableConnectionMixin:
+    """取出的连接登记到当前请求的取消令牌上，令牌触发时关闭该连接"""
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        token = getattr(_request_cancel, "token", None)
+        if token is not None:
+            conn._gw_cancel_handle = token.add_callback(lambda: _abort_connection(conn), label="backend_http")
+            conn._gw_cancel_token = token
+        return conn
+
+    def _put_conn(self, conn):
+        token = getattr(conn, "_gw_cancel_token", None)
+        if token is not None:
+            token.remove_callback(conn._gw_cancel_handle)
+            conn._gw_cancel_token = None
+            if token.cancelled:
+                # 已被中止的连接不能放回池中复用
+                conn.close()
+        super()._put_conn(conn)
+
+
+class _CancellableHTTPConnectionPool(_CancellableConnectionMixin, HTTPConnectionPool):
+    pass
+
+
+class _CancellableHTTPSConnectionPool(_CancellableConnectionMixin, HTTPSConnectionPool):
+    pass
+
+
+class _CancellableAdapter(HTTPAdapter):
+    """连接池换成可中止的版本，其余行为与默认 HTTPAdapter 相同"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CancellableHTTPConnectionPool,
+            "https": _CancellableHTTPSConnectionPool,
+        }
+
+
+def _stream_delta(event: Dict[str, Any]) -> str:
+    """从流式事件中取出文本增量（兼容 delta / content / OpenAI choices 格式）"""
+    delta = event.get("delta")
+    if isinstance(delta, dict):
+        delta = delta.get("content")
+    if delta is None:
+        choices = event.get("choices")
+        if isinstance(choices, list) and choices:
+            choice_delta = choices[0].get("delta") or {}
+            delta = choice_delta.get("content")
+    if delta is None:
+        delta = event.get("content")
+    return delta if isinstance(delta, str) else ""
+
+
+class ChatStream:
+    """后端聊天代理的流式响应
+
+    迭代得到文本增量；迭代结束后 content / provider / model / fallback_used 为完整结果。
+    支持 SSE（text/event-stream）与逐行 JSON（application/x-ndjson）；后端不支持流式、
+    直接返回完整 JSON 时整段内容作为一个增量产出。
+    """
+
+    def __init__(self, response: requests.Response, cancel_token: Optional[CancellationToken] = None) -> None:
+        self._response = response
+        self._cancel_token = cancel_token
+        self._parts: List[str] = []
+        self.provider: Optional[str] = None
+        self.model: Optional[str] = None
+        self.fallback_used = False
+        content_type = response.headers.get("Content-Type", "").lower()
+        if "text/event-stream" in content_type:
+            self.format = "sse"
+        elif "ndjson" in content_type or "jsonl" in content_type:
+            self.format = "jsonl"
+        else:
+            self.format = "json"
+        # text/* 未声明 charset 时 requests 默认按 ISO-8859-1 解码
+        response.encoding = response.encoding if "charset" in content_type else "utf-8"
+
+    @property
+    def content(self) -> str:
+        return "".join(self._parts)
+
+    @property
+    def streamed(self) -> bool:
+        """后端是否真正以流式返回"""
+        return self.format != "json"
+
+    def __iter__(self) -> Iterator[str]:
+        try:
+            for event in self._events():
+                if event.get("error"):
+                    error = event["error"]
+                    raise RuntimeError(error.get("message") if isinstance(error, dict) else str(error))
+                self.provider = event.get("provider") or self.provider
+                self.model = event.get("model") or self.model
+                self.fallback_used = bool(event.get("fallback_used", self.fallback_used))
+                delta = _stream_delta(event)
+                if delta:
+                    self._parts.append(delta)
+                    yield delta
+        except Exception as exc:
+            if self._cancel_token is not None and self._cancel_token.cancelled:
+                raise asyncio.CancelledError("Backend chat stream cancelled") from exc
+            raise
+        finally:
+            self.close()
+
+    def _lines(self) -> Iterator[str]:
+        # chunk_size=None：分块传输时每收到一块就处理，不等凑满缓冲区
+        return self._response.iter_lines(chunk_size=None, decode_unicode=True)
+
+    def _events(self) -> Iterator[Dict[str, Any]]:
+        if self.format == "json":
+            yield self._response.json()
+            return
+        if self.format == "jsonl":
+            for line in self._lines():
+                if line and line.strip():
+                    yield json.loads(line)
+            return
+
+        event_name, data_lines = "message", []
+        for line in self._lines():
+            if line:
+                if line.startswith(":"):
+                    continue  # 注释 / 心跳
+                field_name, _, value = line.partition(":")
+                value = value[1:] if value.startswith(" ") else value
+                if field_name == "event":
+                    event_name = value
+                elif field_name == "data":
+                    data_lines.append(value)
+                continue
+            # 空行：分派一个事件
+            if data_lines:
+                data = "\n".join(data_lines)
+                if data.strip() == "[DONE]":
+                    return
+                payload = json.loads(data) if data.lstrip().startswith("{") else {"delta": data}
+                if event_name == "error" and not payload.get("error"):
+                    payload = {"error": payload.get("message") or data}
+                yield payload
+            event_name, data_lines = "message", []
+
+    def close(self) -> None:
+        self._response.close()
+
 
 class BackendClient:
     def __init__(self, settings_manager: SettingsManager) -> None:
         self._settings_manager = settings_manager
         self._session = requests.Session()
+        # 聊天请求可被取消令牌中止（用户停止查询时立即释放连接与线程）
+        cancellable_adapter = _CancellableAdapter()
+        self._session.mount("http://", cancellable_adapter)
+        self._session.mount("https://", cancellable_adapter)
         # 生成稳定的设备指纹，供后端速率/配额控制与埋点使用
         raw_device = f"{platform.node()}|{platform.system()}|{platform.release()}|{uuid.getnode()}"
         self._device_id = hashlib.sha256(raw_device.encode()).hexdigest()[:16]
         self._client_version = "1.0.0"
         self._local_ip = self._resolve_local_ip()
+        # 相同的聊天请求同时进行时（双击热键、语音自动发送、上下文请求）只调用一次后端
+        self._chat_single_flight = get_single_flight("backend_chat")
 
     @property
     def _backend_config(self):
         return self._settings_manager.settings.backend
 
+    @property
+    def chat_stream_enabled(self) -> bool:
+        return bool(getattr(self._backend_config, "chat_stream", True))
+
     def _build_url(self, path: str) -> Optional[str]:
         base_url = self._backend_config.resolved_base_url().rstrip("/")
         if not base_url:
@@ -119,8 +305,13 @@ class BackendClient:
         provider: Optional[str] = None,
         temperature: Optional[float] = None,
         include_raw: bool = False,
+        cancel_token: Optional[CancellationToken] = None,
     ) -> Optional[Dict[str, Any]]:
-        """调用后端聊天代理"""
+        """调用后端聊天代理
+
+        cancel_token 触发时关闭进行中的 HTTP 连接并抛出 asyncio.CancelledError；
+        合并到同一请求的其它调用方不受影响，会重新发起请求。
+        """
 
         endpoint = getattr(self._backend_config, "chat_endpoint", "/api/v1/chat")
         url = self._build_url(endpoint)
@@ -136,6 +327,21 @@ class BackendClient:
         if temperature is not None:
             payload["temperature"] = temperature
 
+        # 去重 key：目标地址 + 完整请求体
+        key = hashlib.sha1(
+            json.dumps([url, payload], sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+        ).hexdigest()
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        return self._chat_single_flight.do(key, lambda: self._post_chat(url, payload, cancel_token))
+
+    def _post_chat(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Optional[Dict[str, Any]]:
+        _request_cancel.token = cancel_token
         try:
             response = self._session.post(
                 url,
@@ -152,8 +358,74 @@ class BackendClient:
             )
             return data
         except Exception as exc:
+            if cancel_token is not None and cancel_token.cancelled:
+                logger.info("云端模型请求已中止（查询被取消）")
+                # 按取消处理：single-flight 中等待同一请求的调用方会重新发起请求
+                raise asyncio.CancelledError("Backend chat cancelled") from exc
             logger.warning("云端模型调用失败：%s", exc)
             return None
+        finally:
+            _request_cancel.token = None
+
+    def chat_completion_stream(
+        self,
+        messages: List[Dict[str, Any]],
+        *,
+        model: Optional[str] = None,
+        provider: Optional[str] = None,
+        temperature: Optional[float] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Optional[ChatStream]:
+        """以流式方式调用后端聊天代理，响应头到达后立即返回 ChatStream，失败时返回 None
+
+        流不能在调用方之间共享，因此不经过 single-flight 合并。cancel_token 触发时关闭连接，
+        建立连接或读取增量的线程抛出 asyncio.CancelledError。
+        """
+
+        endpoint = getattr(self._backend_config, "chat_endpoint", "/api/v1/chat")
+        url = self._build_url(endpoint)
+        if not url:
+            logger.error("后端 base_url 未配置，无法调用聊天接口")
+            return None
+
+        payload: Dict[str, Any] = {"messages": messages, "stream": True}
+        if model:
+            payload["model"] = model
+        if provider:
+            payload["provider"] = provider
+        if temperature is not None:
+            payload["temperature"] = temperature
+
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        headers = self._default_headers()
+        headers["Accept"] = "text/event-stream, application/x-ndjson, application/json"
+        _request_cancel.token = cancel_token
+        response = None
+        try:
+            response = self._session.post(
+                url,
+                json=payload,
+                headers=headers,
+                # 读超时作用于相邻两次收到数据之间，而不是整个生成过程
+                timeout=(self._backend_config.timeout, max(self._backend_config.timeout, 60.0)),
+                stream=True,
+            )
+            response.raise_for_status()
+        except Exception as exc:
+            if response is not None:
+                response.close()
+            if cancel_token is not None and cancel_token.cancelled:
+                logger.info("云端模型流式请求已中止（查询被取消）")
+                raise asyncio.CancelledError("Backend chat cancelled") from exc
+            logger.warning("云端模型流式调用失败：%s", exc)
+            return None
+        finally:
+            _request_cancel.token = None
+
+        stream = ChatStream(response, cancel_token)
+        logger.info("云端模型流式响应开始 format=%s", stream.format)
+        return stream
 
     def post_events(self, events: List[Dict]) -> bool:
         if not events:
@@ -180,5 +452,92 @@ class BackendClient:
             logger.warning("事件上报失败：%s", exc)
             return False
 
+    def get_stats(self) -> Dict[str, Any]:
+        """请求去重统计"""
+        return {"chat_single_flight": self._chat_single_flight.get_stats()}
+
     def close(self) -> None:
         self._session.close()
+
+
+if __name__ == "__main__":
+    # 本地桩服务器：对比一次性请求与流式请求的首字延迟，并检查停止能否立即中止流
+    # python -m src.game_wiki_tooltip.core.backend_client
+    import http.server
+    import socketserver
+    import time
+    from types import SimpleNamespace
+
+    from .config import BackendConfig
+
+    DELTAS = ["Build ", "the ", "hive ", "tower ", "first."]
+    DELTA_INTERVAL = 0.2
+
+    class StubHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if not body.get("stream"):
+                time.sleep(DELTA_INTERVAL * len(DELTAS))
+                data = json.dumps({"content": "".join(DELTAS), "provider": "stub", "model": "stub-1"}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            events = [{"provider": "stub", "model": "stub-1", "delta": delta} for delta in DELTAS]
+            try:
+                for event in events:
+                    time.sleep(DELTA_INTERVAL)
+                    data = f"data: {json.dumps(event)}\n\n".encode()
+                    self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+                    self.wfile.flush()
+                done = b"data: [DONE]\n\n"
+                self.wfile.write(f"{len(done):X}\r\n".encode() + done + b"\r\n0\r\n\r\n")
+            except OSError:
+                pass  # 客户端中止
+
+        def log_message(self, *args):
+            pass
+
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    backend = BackendConfig(base_url=f"http://127.0.0.1:{server.server_address[1]}", api_key="stub-key")
+    client = BackendClient(SimpleNamespace(settings=SimpleNamespace(backend=backend)))
+    messages = [{"role": "user", "content": "What should I build first?"}]
+
+    started = time.perf_counter()
+    result = client.chat_completion(messages)
+    print(f"blocking: first text after {(time.perf_counter() - started) * 1000:.0f} ms ({result['content']!r})")
+
+    started = time.perf_counter()
+    stream = client.chat_completion_stream(messages)
+    first = None
+    for delta in stream:
+        if first is None:
+            first = time.perf_counter() - started
+    print(f"streaming: first delta after {first * 1000:.0f} ms, done after "
+          f"{(time.perf_counter() - started) * 1000:.0f} ms ({stream.content!r}, format={stream.format})")
+
+    token = CancellationToken("stub")
+    stream = client.chat_completion_stream(messages, cancel_token=token)
+    deltas = iter(stream)
+    next(deltas)
+    threading.Timer(0.05, token.cancel, args=("stop",)).start()
+    started = time.perf_counter()
+    try:
+        for _ in deltas:
+            pass
+        print("cancel: stream was not aborted")
+    except asyncio.CancelledError:
+        print(f"cancel: stream aborted {(time.perf_counter() - started) * 1000:.0f} ms after the stop was scheduled "
+              f"(next delta was due in {DELTA_INTERVAL * 1000:.0f} ms)")
+    server.shutdown()
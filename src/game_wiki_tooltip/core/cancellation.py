@@ -0,0 +1,190 @@
+"""CancellationToken: 贯穿一次查询的取消令牌
+
+职责：
+- 由 QueryWorker 为每个查询创建，沿查询处理、检索与生成一路传递（作为 stop_flag）
+- cancel 时立即：唤醒所有 await_cancellable 中的等待（不再按间隔轮询），
+  并调用注册的中止回调（例如关闭进行中的 HTTP 连接）
+- 兼容已有的 stop_flag 写法：既可调用（token() 返回是否已取消），也提供 is_set()
+
+注意：
+- 中止回调在调用 cancel 的线程中执行（通常是 UI 线程），只应做关闭连接之类的轻量操作
+- 被取消时 await_cancellable 抛出 asyncio.CancelledError，与任务被取消的处理方式一致
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 普通 stop_flag（lambda / Event）没有取消通知，只能按此间隔检查（秒）
+STOP_POLL_INTERVAL = 0.1
+
+
+class CancellationToken:
+    """一次性的取消信号"""
+
+    def __init__(self, name: str = "") -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+        self._reason = ""
+        self._cancelled_at: Optional[float] = None
+        self._callbacks: Dict[int, Tuple[Callable[[], None], str]] = {}
+        self._callback_ids = itertools.count()
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def __call__(self) -> bool:
+        return self._event.is_set()
+
+    def is_set(self) -> bool:
+        return self._event.is_set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    @property
+    def reason(self) -> str:
+        return self._reason
+
+    def cancel(self, reason: str = "") -> bool:
+        """触发取消并中止所有注册的操作，已取消时不再重复，返回本次是否生效"""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self._reason = reason
+            self._cancelled_at = time.perf_counter()
+            callbacks, self._callbacks = list(self._callbacks.values()), {}
+            async_waiters, self._async_waiters = self._async_waiters, []
+            self._event.set()
+
+        logger.info(f"Cancellation '{self.name}' fired" + (f" ({reason})" if reason else ""))
+        for loop, future in async_waiters:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(self._set_future, future)
+        for callback, label in callbacks:
+            self._invoke(callback, label)
+        return True
+
+    def add_callback(self, callback: Callable[[], None], label: str = "") -> Optional[int]:
+        """取消时调用 callback()，已取消时立即调用并返回 None，否则返回用于 remove_callback 的句柄"""
+        with self._lock:
+            if not self._event.is_set():
+                handle = next(self._callback_ids)
+                self._callbacks[handle] = (callback, label)
+                return handle
+        self._invoke(callback, label)
+        return None
+
+    def remove_callback(self, handle: Optional[int]) -> None:
+        """操作已正常结束，不再需要中止"""
+        if handle is None:
+            return
+        with self._lock:
+            self._callbacks.pop(handle, None)
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise asyncio.CancelledError(f"Cancelled: {self._reason or self.name}")
+
+    def _register_async_waiter(self) -> Optional[asyncio.Future]:
+        """在当前事件循环上创建取消时完成的 future（已取消时返回 None）"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._event.is_set():
+                return None
+            future = loop.create_future()
+            self._async_waiters.append((loop, future))
+            return future
+
+    def _unregister_async_waiter(self, future: asyncio.Future) -> None:
+        with self._lock:
+            self._async_waiters = [(l, f) for l, f in self._async_waiters if f is not future]
+
+    async def wait(self) -> None:
+        """等待取消（不占用事件循环）"""
+        future = self._register_async_waiter()
+        if future is None:
+            return
+        try:
+            await future
+        finally:
+            self._unregister_async_waiter(future)
+
+    @staticmethod
+    def _set_future(future: asyncio.Future) -> None:
+        if not future.done():
+            future.set_result(None)
+
+    def _invoke(self, callback: Callable[[], None], label: str) -> None:
+        try:
+            callback()
+        except Exception as exc:  # noqa: BLE001
+            logger.debug(f"Cancellation '{self.name}' callback '{label}' failed: {exc}")
+
+
+def is_cancel_requested(stop_flag: Any) -> bool:
+    """检查 stop_flag：CancellationToken、可调用对象或带 is_set() 的对象"""
+    if not stop_flag:
+        return False
+    try:
+        if callable(stop_flag):
+            return bool(stop_flag())
+        if hasattr(stop_flag, "is_set"):
+            return bool(stop_flag.is_set())
+    except Exception:
+        return False
+    return False
+
+
+async def await_cancellable(awaitable: Awaitable[Any], stop_flag: Any = None, timeout: Optional[float] = None) -> Any:
+    """
+    等待 awaitable，stop_flag 触发时立即取消它
+
+    stop_flag 为 CancellationToken 时由取消通知唤醒，其它形式的 stop_flag 按 STOP_POLL_INTERVAL 检查。
+    线程池中的同步调用（run_in_executor / to_thread）无法被中断，取消后调用方立即返回，
+    线程中的调用应自行注册中止回调（见 BackendClient.chat_completion）。
+
+    Raises:
+        asyncio.CancelledError: stop_flag 触发
+        asyncio.TimeoutError: 超时
+    """
+    if is_cancel_requested(stop_flag):
+        if hasattr(awaitable, "close"):
+            # 关闭不会再被 await 的协程
+            awaitable.close()
+        raise asyncio.CancelledError("Query stopped")
+    if not stop_flag and timeout is None:
+        return await awaitable
+
+    task = asyncio.ensure_future(awaitable)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout if timeout is not None else None
+    cancel_future = stop_flag._register_async_waiter() if isinstance(stop_flag, CancellationToken) else None
+    try:
+        while True:
+            if is_cancel_requested(stop_flag):
+                raise asyncio.CancelledError("Query stopped")
+            wait_for = None if cancel_future is not None or not stop_flag else STOP_POLL_INTERVAL
+            if deadline is not None:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                wait_for = remaining if wait_for is None else min(wait_for, remaining)
+            waiting = {task, cancel_future} if cancel_future is not None else {task}
+            await asyncio.wait(waiting, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+            if task.done():
+                return task.result()
+    finally:
+        if cancel_future is not None:
+            stop_flag._unregister_async_waiter(cancel_future)
+            if not cancel_future.done():
+                cancel_future.cancel()
+        if not task.done():
+            task.cancel()
@@ -13,6 +13,7 @@ from dataclasses import dataclass, field, asdict
 from typing import Dict, List, Any, Optional
 
 from src.game_wiki_tooltip.core.utils import package_file
+from src.game_wiki_tooltip.core.title_resolver import TitleResolver
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -99,6 +100,7 @@ class BackendConfig:
     config_endpoint: str = "/api/v1/config"
     events_endpoint: str = "/api/v1/events"
     chat_endpoint: str = "/api/v1/chat"
+    chat_stream: bool = True  # 请求流式（SSE / 逐行 JSON）聊天响应，逐段显示
     timeout: float = 10.0
 
     def resolved_base_url(self) -> str:
@@ -129,6 +131,8 @@ class AppSettings:
     api: ApiConfig = field(default_factory=ApiConfig)
     backend: BackendConfig = field(default_factory=BackendConfig)
     remote_config: Dict[str, Any] = field(default_factory=dict)
+    # RAG 设置（RAGConfig.to_dict 格式），保持为普通 dict，如 engine_pool_memory_mb
+    rag: Dict[str, Any] = field(default_factory=dict)
     analytics: AnalyticsConfig = field(default_factory=AnalyticsConfig)
     # 持久化配额/实验分组状态（QuotaManager 使用）
     usage_quota: Dict[str, Any] = field(default_factory=dict)
@@ -192,6 +196,8 @@ class SettingsManager:
             self._settings.backend = BackendConfig(**new_settings['backend'])
         if 'remote_config' in new_settings:
             self._settings.remote_config = new_settings['remote_config']
+        if 'rag' in new_settings:
+            self._settings.rag = new_settings['rag']
         # Update usage_quota (for QuotaManager persistence)
         if 'usage_quota' in new_settings:
             # 保持为普通 dict，避免 dataclass 化
@@ -284,6 +290,7 @@ class SettingsManager:
                 dont_remind_api_missing=merged_data.get('dont_remind_api_missing', False),
                 backend=BackendConfig(**merged_data.get('backend', {})),
                 analytics=AnalyticsConfig(**merged_data.get('analytics', {})),
+                rag=merged_data.get('rag', {}),
                 usage_quota=merged_data.get('usage_quota', {}),
                 shortcuts=merged_data.get('shortcuts', []),
                 audio_device_index=merged_data.get('audio_device_index', None),
@@ -314,6 +321,7 @@ class SettingsManager:
                 dont_remind_api_missing=default_data.get('dont_remind_api_missing', False),
                 backend=BackendConfig(**default_data.get('backend', {})),
                 analytics=AnalyticsConfig(**default_data.get('analytics', {})),
+                rag=default_data.get('rag', {}),
                 usage_quota=default_data.get('usage_quota', {}),
                 shortcuts=default_data.get('shortcuts', []),
                 audio_device_index=default_data.get('audio_device_index', None),
@@ -337,6 +345,10 @@ class GameConfigManager:
     def __init__(self, path: pathlib.Path):
         self.path = path
         self._games = {}
+        # Window title -> game name, compiled from the game names and memoized per title
+        self._title_resolver = TitleResolver(
+            "games", lambda: [(name.lower(), name) for name in self._games]
+        )
         self._load()
     
     def _get_language_specific_path(self, language: str = None) -> pathlib.Path:
@@ -375,6 +387,7 @@ class GameConfigManager:
             if config_path.exists():
                 with open(config_path, 'r', encoding='utf-8') as f:
                     self._games = json.load(f)
+                self._title_resolver.invalidate()
                 logger.info(f"Loaded games config from {config_path}")
         except Exception as e:
             logger.error(f"Failed to load games config: {e}")
@@ -433,17 +446,20 @@ class GameConfigManager:
     def update_game_config(self, game_name: str, config: dict):
         """Update configuration for a specific game"""
         self._games[game_name] = config
+        self._title_resolver.invalidate()
         self._save()
     
     def reload_for_language(self, language: str):
         """Reload games configuration for a specific language"""
         self._games = {}
+        self._title_resolver.invalidate()
         config_path = self._get_language_specific_path(language)
         
         try:
             if config_path.exists():
                 with open(config_path, 'r', encoding='utf-8') as f:
                     self._games = json.load(f)
+                self._title_resolver.invalidate()
                 logger.info(f"Reloaded games config for language '{language}' from {config_path}")
                 
                 # Save the config to the language-specific file
@@ -456,12 +472,12 @@ class GameConfigManager:
     
     def for_title(self, window_title: str) -> Optional[GameConfig]:
         """Get game configuration based on window title (backward compatibility)"""
-        lower = window_title.lower()
-        for name, cfg in self._games.items():
-            if name.lower() in lower:
-                # Convert dict to GameConfig for backward compatibility
-                return GameConfig(
-                    BaseUrl=cfg.get('BaseUrl', ''),
-                    NeedsSearch=cfg.get('NeedsSearch', True)
-                )
-        return None
+        name = self._title_resolver.resolve(window_title)
+        cfg = self._games.get(name) if name is not None else None
+        if cfg is None:
+            return None
+        # Convert dict to GameConfig for backward compatibility
+        return GameConfig(
+            BaseUrl=cfg.get('BaseUrl', ''),
+            NeedsSearch=cfg.get('NeedsSearch', True)
+        )
@@ -0,0 +1,163 @@
+"""EnginePool: 按游戏共享的检索引擎池
+
+职责：
+- 以向量库游戏名为 key 保存已初始化的 EnhancedRagQuery，完整攻略流程与 limited mode 的
+  轻量检索共用同一实例，同一游戏不会被加载两次
+- 引用计数：使用中的引擎（当前游戏、正在检索的查询）不会被淘汰
+- 超出内存预算时按最近最少使用（LRU）淘汰未被引用的引擎
+- 诊断信息：每个引擎的常驻内存估算、引用数与最近使用时间
+
+注意：
+- 引擎大小由 size_of 估算（默认调用引擎的 estimate_memory_bytes），不是精确的进程内存
+- 被淘汰的引擎只是从池中移除，仍持有它的调用方可以继续使用，释放后由 GC 回收
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _default_size_of(engine: Any) -> int:
+    estimate = getattr(engine, "estimate_memory_bytes", None)
+    if not callable(estimate):
+        return 0
+    try:
+        return int(estimate())
+    except Exception as exc:  # noqa: BLE001
+        logger.debug(f"Estimating engine memory failed: {exc}")
+        return 0
+
+
+@dataclass
+class _PoolEntry:
+    engine: Any
+    size: int
+    refs: int = 0
+    created_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+
+
+class EnginePool:
+    """带内存预算与引用计数的 LRU 引擎池"""
+
+    def __init__(
+        self,
+        memory_budget_bytes: int,
+        size_of: Optional[Callable[[Any], int]] = None,
+    ) -> None:
+        self.memory_budget_bytes = memory_budget_bytes
+        self._size_of = size_of or _default_size_of
+        self._entries: "OrderedDict[Hashable, _PoolEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "loads": 0,
+            "evictions": 0,
+            "replacements": 0,
+        }
+
+    def acquire(self, key: Hashable) -> Optional[Any]:
+        """取出引擎并增加引用计数，未缓存时返回 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            entry.refs += 1
+            entry.last_used = time.time()
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry.engine
+
+    def release(self, key: Hashable, engine: Any = None) -> None:
+        """释放一次引用；engine 不为 None 时只在池中仍是同一实例时才生效"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (engine is not None and entry.engine is not engine):
+                return
+            entry.refs = max(0, entry.refs - 1)
+            entry.last_used = time.time()
+            self._evict_locked()
+
+    def put(self, key: Hashable, engine: Any, acquire: bool = False) -> Any:
+        """放入已初始化的引擎（替换同 key 的旧实例），acquire=True 时同时持有一次引用"""
+        size = self._size_of(engine)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None and old.engine is not engine:
+                self.stats["replacements"] += 1
+            self._entries[key] = _PoolEntry(engine=engine, size=size, refs=1 if acquire else 0)
+            self.stats["loads"] += 1
+            self._evict_locked(keep=key)
+        logger.info(f"Engine pooled: {key} ({size / (1024 * 1024):.1f} MB, {len(self._entries)} in pool)")
+        return engine
+
+    def discard(self, key: Hashable) -> None:
+        """从池中移除引擎（例如初始化失败或需要重建时）"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def engines(self) -> List[Tuple[Hashable, Any]]:
+        """当前池中的 (key, engine) 快照"""
+        with self._lock:
+            return [(key, entry.engine) for key, entry in self._entries.items()]
+
+    def set_memory_budget(self, memory_budget_bytes: int) -> None:
+        with self._lock:
+            self.memory_budget_bytes = memory_budget_bytes
+            self._evict_locked()
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(entry.size for entry in self._entries.values())
+
+    def _evict_locked(self, keep: Optional[Hashable] = None) -> None:
+        total = sum(entry.size for entry in self._entries.values())
+        if total <= self.memory_budget_bytes:
+            return
+        # OrderedDict 按最近使用排序，从最旧的开始淘汰未被引用的引擎
+        for key in list(self._entries.keys()):
+            if total <= self.memory_budget_bytes:
+                break
+            entry = self._entries[key]
+            if entry.refs > 0 or key == keep:
+                continue
+            del self._entries[key]
+            total -= entry.size
+            self.stats["evictions"] += 1
+            logger.info(f"Engine evicted: {key} ({entry.size / (1024 * 1024):.1f} MB)")
+        if total > self.memory_budget_bytes:
+            logger.warning(
+                f"Engine pool over budget ({total / (1024 * 1024):.1f} MB > "
+                f"{self.memory_budget_bytes / (1024 * 1024):.1f} MB), all remaining engines are in use"
+            )
+
+    def diagnostics(self) -> Dict[str, Any]:
+        """每个引擎的常驻内存估算与最近使用时间"""
+        now = time.time()
+        with self._lock:
+            engines = [
+                {
+                    "key": key,
+                    "resident_mb": round(entry.size / (1024 * 1024), 2),
+                    "refs": entry.refs,
+                    "last_used_seconds_ago": round(now - entry.last_used, 1),
+                    "age_seconds": round(now - entry.created_at, 1),
+                }
+                for key, entry in reversed(self._entries.items())
+            ]
+            total = sum(entry.size for entry in self._entries.values())
+            return {
+                "engines": engines,
+                "total_mb": round(total / (1024 * 1024), 2),
+                "budget_mb": round(self.memory_budget_bytes / (1024 * 1024), 2),
+                **self.stats,
+            }
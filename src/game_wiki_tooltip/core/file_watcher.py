@@ -0,0 +1,110 @@
+"""FileWatcher: 配置文件变更通知
+
+职责：
+- 后台守护线程按固定间隔检查已登记文件的 (mtime, size)，变化（包括创建、删除）时调用回调
+- 依赖配置文件派生出的缓存（标题解析器等）由通知失效，调用路径上不再每次 stat
+
+注意：
+- 回调在监视线程中执行，只应做清空缓存之类的轻量操作
+- 通知有最多 interval 秒的延迟；进程内自己写文件时应同时直接失效缓存
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 检查间隔（秒）
+DEFAULT_WATCH_INTERVAL = 2.0
+
+FileSignature = Optional[Tuple[int, int]]
+
+
+def _signature(path: Path) -> FileSignature:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class FileWatcher:
+    """按间隔检查文件变化并通知订阅者"""
+
+    def __init__(self, interval: float = DEFAULT_WATCH_INTERVAL, name: str = "file-watcher") -> None:
+        self.interval = interval
+        self.name = name
+        self._lock = threading.Lock()
+        self._watches: Dict[Path, Tuple[FileSignature, List[Callable[[Path], None]]]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def watch(self, path: Path, callback: Callable[[Path], None]) -> None:
+        """文件变化时调用 callback(path)，以登记时的文件状态为基准"""
+        path = Path(path).resolve()
+        with self._lock:
+            signature, callbacks = self._watches.get(path, (_signature(path), []))
+            if callback not in callbacks:
+                callbacks.append(callback)
+            self._watches[path] = (signature, callbacks)
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def unwatch(self, path: Path, callback: Optional[Callable[[Path], None]] = None) -> None:
+        path = Path(path).resolve()
+        with self._lock:
+            if path not in self._watches:
+                return
+            signature, callbacks = self._watches[path]
+            callbacks = [cb for cb in callbacks if callback is not None and cb != callback]
+            if callbacks:
+                self._watches[path] = (signature, callbacks)
+            else:
+                del self._watches[path]
+
+    def check(self) -> List[Path]:
+        """立即检查一次，返回发生变化的文件"""
+        with self._lock:
+            watches = list(self._watches.items())
+        changed = []
+        for path, (signature, callbacks) in watches:
+            current = _signature(path)
+            if current == signature:
+                continue
+            with self._lock:
+                if path in self._watches:
+                    self._watches[path] = (current, self._watches[path][1])
+            changed.append(path)
+            logger.info(f"Watched file changed: {path}")
+            for callback in callbacks:
+                try:
+                    callback(path)
+                except Exception as exc:  # noqa: BLE001
+                    logger.error(f"File change callback for {path} failed: {exc}")
+        return changed
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+_watcher: Optional[FileWatcher] = None
+_watcher_lock = threading.Lock()
+
+
+def get_file_watcher() -> FileWatcher:
+    """进程内共享的文件监视器"""
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = FileWatcher()
+        return _watcher
@@ -0,0 +1,160 @@
+"""ReadinessGate: 事件驱动的就绪通知
+
+职责：
+- 组件（AI 模块、RAG 引擎）就绪或失败时立即唤醒所有等待方，取代 sleep 轮询与定时器检查
+- 支持线程等待（wait）、asyncio 等待（wait_async，不占用事件循环）与回调（add_callback，
+  已就绪时立即调用，否则在 resolve 的线程中调用）
+- 每次唤醒记录到全局 trace：等待方、等待耗时、从就绪到被唤醒的延迟与结果
+
+注意：
+- resolve 只生效一次，需要重新等待时用 reset 开始新一轮（或为每一轮创建新的 gate）
+- 回调在调用 resolve 的线程中执行，耗时操作应转交给事件循环或线程池
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_wakeup_trace: Deque[Dict[str, Any]] = deque(maxlen=200)
+_trace_lock = threading.Lock()
+
+
+def get_wakeup_trace() -> List[Dict[str, Any]]:
+    """最近的唤醒记录（最新的在最后）"""
+    with _trace_lock:
+        return list(_wakeup_trace)
+
+
+class ReadinessGate:
+    """一次性的就绪 / 失败通知"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+        self._state: Optional[bool] = None  # None 未决定，True 就绪，False 失败
+        self._detail = ""
+        self._resolved_at: Optional[float] = None
+        self._callbacks: List[Tuple[Callable[[bool], None], str, float]] = []
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    @property
+    def state(self) -> Optional[bool]:
+        return self._state
+
+    def is_resolved(self) -> bool:
+        return self._event.is_set()
+
+    def resolve(self, ready: bool = True, detail: str = "") -> bool:
+        """标记就绪（ready=True）或失败并唤醒所有等待方，已决定时不再改变，返回本次是否生效"""
+        with self._lock:
+            if self._state is not None:
+                return False
+            self._state = ready
+            self._detail = detail
+            self._resolved_at = time.perf_counter()
+            callbacks, self._callbacks = self._callbacks, []
+            async_waiters, self._async_waiters = self._async_waiters, []
+            self._event.set()
+
+        logger.info(f"Readiness '{self.name}': {'ready' if ready else 'failed'}"
+                    + (f" ({detail})" if detail else ""))
+        for loop, future in async_waiters:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(self._set_future, future, ready)
+        for callback, waiter, started in callbacks:
+            self._record(waiter, started, "callback")
+            self._invoke(callback, waiter, ready)
+        return True
+
+    def reset(self) -> None:
+        """开始新一轮等待（尚未唤醒的等待方继续等待下一次 resolve）"""
+        with self._lock:
+            self._state = None
+            self._detail = ""
+            self._resolved_at = None
+            self._event.clear()
+
+    def wait(self, timeout: Optional[float] = None, waiter: str = "") -> Optional[bool]:
+        """阻塞等待，返回就绪状态，超时返回 None"""
+        started = time.perf_counter()
+        if not self._event.wait(timeout):
+            self._record(waiter, started, "timeout")
+            return None
+        self._record(waiter, started, "thread")
+        return self._state
+
+    async def wait_async(self, timeout: Optional[float] = None, waiter: str = "") -> Optional[bool]:
+        """在事件循环中等待（不占用循环），返回就绪状态，超时返回 None"""
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._state is not None:
+                state = self._state
+                future = None
+            else:
+                future = loop.create_future()
+                self._async_waiters.append((loop, future))
+        if future is None:
+            self._record(waiter, started, "async")
+            return state
+
+        try:
+            state = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self._record(waiter, started, "timeout")
+            return None
+        finally:
+            with self._lock:
+                self._async_waiters = [(l, f) for l, f in self._async_waiters if f is not future]
+        self._record(waiter, started, "async")
+        return state
+
+    def add_callback(self, callback: Callable[[bool], None], waiter: str = "") -> None:
+        """就绪或失败时调用 callback(ready)，已决定时立即调用"""
+        started = time.perf_counter()
+        with self._lock:
+            if self._state is None:
+                self._callbacks.append((callback, waiter, started))
+                return
+            state = self._state
+        self._record(waiter, started, "callback")
+        self._invoke(callback, waiter, state)
+
+    @staticmethod
+    def _set_future(future: asyncio.Future, ready: bool) -> None:
+        if not future.done():
+            future.set_result(ready)
+
+    def _invoke(self, callback: Callable[[bool], None], waiter: str, ready: bool) -> None:
+        try:
+            callback(ready)
+        except Exception as exc:  # noqa: BLE001
+            logger.error(f"Readiness '{self.name}' callback '{waiter}' failed: {exc}")
+
+    def _record(self, waiter: str, started: float, kind: str) -> None:
+        now = time.perf_counter()
+        resolved_at = self._resolved_at
+        entry = {
+            "gate": self.name,
+            "waiter": waiter or "anonymous",
+            "kind": kind,
+            "state": self._state if kind != "timeout" else None,
+            "detail": self._detail,
+            "waited_ms": round((now - started) * 1000, 2),
+            # 从 resolve 到等待方被唤醒的延迟（等待开始时已就绪则为 0）
+            "wake_latency_ms": round(max(0.0, now - max(resolved_at, started)) * 1000, 2)
+            if resolved_at is not None else None,
+            "timestamp": time.time(),
+        }
+        with _trace_lock:
+            _wakeup_trace.append(entry)
+        logger.debug(f"Readiness wakeup: {entry['gate']} -> {entry['waiter']} ({kind}): state={entry['state']}, "
+                     f"waited {entry['waited_ms']} ms, wake latency {entry['wake_latency_ms']} ms")
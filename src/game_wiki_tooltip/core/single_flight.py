@@ -0,0 +1,138 @@
+"""SingleFlight: 合并同时进行的相同请求
+
+职责：
+- 相同 key 的请求同时到达时只执行一次，其余调用方共享同一个 future 的结果
+- 同时支持线程调用方（do）与 asyncio 调用方（do_async），两者可以互相合并
+- 统计每类请求的执行次数与被合并（避免重复）的次数
+
+注意：
+- 结果对象在所有调用方之间共享，调用方应只读使用
+- 发起者被取消（例如用户停止查询）时，等待中的调用方会重新发起请求，而不是跟着被取消
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _LeaderCancelled(Exception):
+    """发起者被取消，等待者需要自行重试"""
+
+
+class SingleFlight:
+    """按 key 去重的进行中请求表"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._inflight: Dict[Hashable, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            "calls": 0,
+            "executed": 0,
+            "coalesced": 0,
+            "failed": 0,
+            "leader_cancelled": 0,
+        }
+
+    def _join(self, key: Hashable) -> Tuple[concurrent.futures.Future, bool]:
+        """返回 (future, 是否为发起者)"""
+        with self._lock:
+            self.stats["calls"] += 1
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return future, False
+            future = concurrent.futures.Future()
+            self._inflight[key] = future
+            self.stats["executed"] += 1
+            return future, True
+
+    def _finish(self, key: Hashable, future: concurrent.futures.Future) -> None:
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """线程调用方：执行 fn，或等待进行中的相同请求"""
+        while True:
+            future, leader = self._join(key)
+            if not leader:
+                try:
+                    return future.result()
+                except _LeaderCancelled:
+                    continue
+
+            try:
+                result = fn()
+            except BaseException as exc:
+                self._fail(key, future, exc)
+                raise
+            future.set_result(result)
+            self._finish(key, future)
+            return result
+
+    async def do_async(self, key: Hashable, coro_fn: Callable[[], Awaitable[Any]]) -> Any:
+        """asyncio 调用方：await coro_fn()，或等待进行中的相同请求"""
+        while True:
+            future, leader = self._join(key)
+            if not leader:
+                try:
+                    # shield：等待者被取消时不能连带取消共享的 future
+                    return await asyncio.shield(asyncio.wrap_future(future))
+                except _LeaderCancelled:
+                    continue
+
+            try:
+                result = await coro_fn()
+            except BaseException as exc:
+                self._fail(key, future, exc)
+                raise
+            future.set_result(result)
+            self._finish(key, future)
+            return result
+
+    def _fail(self, key: Hashable, future: concurrent.futures.Future, exc: BaseException) -> None:
+        cancelled = isinstance(exc, (asyncio.CancelledError, concurrent.futures.CancelledError, KeyboardInterrupt))
+        with self._lock:
+            if cancelled:
+                self.stats["leader_cancelled"] += 1
+            else:
+                self.stats["failed"] += 1
+        future.set_exception(_LeaderCancelled() if cancelled or not isinstance(exc, Exception) else exc)
+        self._finish(key, future)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = self.stats["calls"]
+            return {
+                **self.stats,
+                "in_flight": len(self._inflight),
+                "coalesced_rate": self.stats["coalesced"] / calls if calls else 0.0,
+            }
+
+
+_groups: Dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+
+def get_single_flight(name: str) -> SingleFlight:
+    """获取进程内共享的 SingleFlight 分组（每类请求一个）"""
+    with _groups_lock:
+        group = _groups.get(name)
+        if group is None:
+            group = SingleFlight(name)
+            _groups[name] = group
+        return group
+
+
+def get_single_flight_stats() -> Dict[str, Dict[str, Any]]:
+    """所有分组的重复请求统计"""
+    with _groups_lock:
+        groups = list(_groups.values())
+    return {group.name: group.get_stats() for group in groups}
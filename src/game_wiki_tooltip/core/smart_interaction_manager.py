@@ -93,6 +93,7 @@ class SmartInteractionManager(QObject):
     # Signal definitions
     interaction_mode_changed = pyqtSignal(object)  # InteractionMode
     mouse_state_changed = pyqtSignal(object)       # MouseState
+    foreground_game_changed = pyqtSignal(str)      # Focused game window title, "" when focus moved to a non-game window
     # 移除 window_state_changed 信号，改为按需检测
     
     def __init__(self, parent=None, controller=None, game_config_manager=None):
@@ -108,6 +109,7 @@ class SmartInteractionManager(QObject):
         self.current_mode = InteractionMode.NORMAL
         self.last_mouse_state: Optional[MouseState] = None
         # 移除 last_window_state，改为按需检测
+        self._focused_game_title = ""  # Last game window title reported by foreground_game_changed
         self.last_hotkey_time = 0
         self.hotkey_double_press_threshold = 0.5  # Double-click hotkey time threshold (seconds)
         
@@ -189,18 +191,8 @@ class SmartInteractionManager(QObject):
         if not window_title:
             return False
             
-        title_lower = window_title.lower()
-        
-        # 排除应用程序自身的窗口
-        app_window_keywords = [
-            'guidor assistant',
-            'guidor',
-            'game wiki assistant',
-            'game wiki'
-        ]
-        
         # 如果是应用程序自身的窗口，不视为游戏窗口（不记录日志）
-        if any(app_keyword in title_lower for app_keyword in app_window_keywords):
+        if self._is_app_window(window_title):
             return False
         
         # Check if window title matches any game in configuration
@@ -211,12 +203,35 @@ class SmartInteractionManager(QObject):
         
         return False
     
+    @staticmethod
+    def _is_app_window(window_title: str) -> bool:
+        """Check if it's one of the application's own windows"""
+        title_lower = window_title.lower()
+        app_window_keywords = [
+            'guidor assistant',
+            'guidor',
+            'game wiki assistant',
+            'game wiki'
+        ]
+        return any(app_keyword in title_lower for app_keyword in app_window_keywords)
+
+    def _check_foreground_game(self, window_state: Optional[WindowState]):
+        """Emit foreground_game_changed when a game window gains focus or focus leaves it"""
+        # 切换到应用自身窗口（例如打开聊天窗口）不算离开游戏
+        if not window_state or not window_state.window_title or self._is_app_window(window_state.window_title):
+            return
+        title = window_state.window_title if window_state.is_game_window else ""
+        if title != self._focused_game_title:
+            self._focused_game_title = title
+            self.foreground_game_changed.emit(title)
+
     def _monitor_system_state(self):
         """Monitor system state changes - 监控鼠标状态和游戏窗口焦点"""
         try:
             # Get current states
             mouse_state = self.get_mouse_state()
             window_state = self.get_window_state()
+            self._check_foreground_game(window_state)
             
             # Check if game window just got focus (and chat window is visible)
             if window_state and window_state.is_game_window:
@@ -0,0 +1,190 @@
+"""TitleResolver: 窗口标题 → 游戏 的编译解析器
+
+职责：
+- 把所有标题片段（不区分大小写的子串）编译成一个 Aho-Corasick 自动机，一次扫描标题即可找出全部匹配，
+  不再逐个片段做子串查找
+- 多个片段同时匹配时按登记顺序取第一个，与原先按顺序线性扫描的结果一致
+- 按完整窗口标题记忆解析结果（包括未匹配），重复的焦点 / 热键事件只需一次字典查找
+- 片段由 loader 提供，invalidate 后下一次解析时重新加载并编译（由文件变更通知或配置修改触发）
+
+注意：
+- 记忆表有上限，超过时整体清空（窗口标题种类通常很少）
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 记忆的窗口标题数上限
+MAX_MEMOIZED_TITLES = 1024
+
+_MISSING = object()
+
+
+class TitleAutomaton:
+    """标题片段的 Aho-Corasick 自动机，返回优先级最高（登记最早）的匹配值"""
+
+    def __init__(self, patterns: Iterable[Tuple[str, Any]]) -> None:
+        # 每个状态：转移表、失败指针、在此结束的最优片段序号（含经失败链可达的片段）
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._best: List[Optional[int]] = [None]
+        self._values: List[Any] = []
+
+        for priority, (pattern, value) in enumerate(patterns):
+            self._values.append(value)
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern.lower():
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(None)
+                state = next_state
+            if self._best[state] is None:
+                self._best[state] = priority
+        self._build_failure_links()
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                inherited = self._best[self._fail[next_state]]
+                if inherited is not None and (self._best[next_state] is None or inherited < self._best[next_state]):
+                    self._best[next_state] = inherited
+
+    @property
+    def states(self) -> int:
+        return len(self._goto)
+
+    def match(self, title: str) -> Optional[Any]:
+        """扫描一次标题，返回最早登记的匹配片段的值，无匹配时返回 None"""
+        goto, fail, best_at = self._goto, self._fail, self._best
+        best: Optional[int] = None
+        state = 0
+        for char in title.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            found = best_at[state]
+            if found is not None and (best is None or found < best):
+                best = found
+                if best == 0:
+                    break
+        return self._values[best] if best is not None else None
+
+
+class TitleResolver:
+    """带记忆的窗口标题解析器"""
+
+    def __init__(self, name: str, loader: Callable[[], Sequence[Tuple[str, Any]]]) -> None:
+        """
+        Args:
+            name: 解析器名称（日志与统计用）
+            loader: 返回按优先级排列的 (标题片段, 值) 列表
+        """
+        self.name = name
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._automaton: Optional[TitleAutomaton] = None
+        self._memo: Dict[str, Any] = {}
+        self.stats = {"memo_hits": 0, "scans": 0, "compiles": 0, "invalidations": 0}
+
+    def resolve(self, window_title: str) -> Optional[Any]:
+        """解析窗口标题，未匹配返回 None"""
+        if not window_title:
+            return None
+        value = self._memo.get(window_title, _MISSING)
+        if value is not _MISSING:
+            self.stats["memo_hits"] += 1
+            return value
+
+        with self._lock:
+            automaton = self._automaton
+            if automaton is None:
+                automaton = self._automaton = self._compile()
+            memo = self._memo
+        value = automaton.match(window_title)
+        self.stats["scans"] += 1
+        with self._lock:
+            # 编译期间被失效时不写入旧结果
+            if self._memo is memo:
+                if len(memo) >= MAX_MEMOIZED_TITLES:
+                    memo.clear()
+                memo[window_title] = value
+        return value
+
+    def is_memoized(self, window_title: str) -> bool:
+        """标题的结果是否已记忆（下一次 resolve 只需一次字典查找）"""
+        return window_title in self._memo
+
+    def _compile(self) -> TitleAutomaton:
+        try:
+            patterns = list(self._loader())
+        except Exception as exc:  # noqa: BLE001
+            logger.error(f"Title resolver '{self.name}' failed to load patterns: {exc}")
+            patterns = []
+        automaton = TitleAutomaton(patterns)
+        self.stats["compiles"] += 1
+        logger.info(f"Title resolver '{self.name}' compiled {len(patterns)} patterns ({automaton.states} states)")
+        return automaton
+
+    def invalidate(self, *_args) -> None:
+        """片段来源已变化：丢弃自动机与记忆结果（可直接用作文件变更回调）"""
+        with self._lock:
+            self._automaton = None
+            self._memo = {}
+            self.stats["invalidations"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "memoized_titles": len(self._memo), "compiled": self._automaton is not None}
+
+
+if __name__ == "__main__":
+    # 线性扫描 vs 自动机 vs 记忆：python -m src.game_wiki_tooltip.core.title_resolver
+    import random
+    import string
+    import time
+
+    rng = random.Random(0)
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 12))) for _ in range(400)]
+    mapping = {f"{words[i]} {words[i + 1]}": f"game_{i}" for i in range(0, 400, 2)}
+    titles = [f"{rng.choice(words).title()} {key.title()} - Steam" for key in rng.sample(list(mapping), 20)]
+    titles += [f"{rng.choice(words)} - Visual Studio Code" for _ in range(5)]
+
+    def linear(title: str) -> Optional[str]:
+        lower = title.lower()
+        for key, value in mapping.items():
+            if key in lower:
+                return value
+        return None
+
+    resolver = TitleResolver("bench", lambda: list(mapping.items()))
+    assert all(resolver.resolve(title) == linear(title) for title in titles)
+    automaton = TitleAutomaton(mapping.items())
+    rounds = 2000
+
+    for label, fn in (("linear scan", linear), ("automaton", automaton.match), ("memoized", resolver.resolve)):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for title in titles:
+                fn(title)
+        elapsed = (time.perf_counter() - started) / (rounds * len(titles))
+        print(f"{label:12s}: {elapsed * 1e6:.2f} us per title ({len(mapping)} patterns)")
+    print(resolver.get_stats())
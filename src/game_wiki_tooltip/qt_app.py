@@ -726,6 +726,8 @@ class GameWikiApp(QObject):
             if hasattr(self.assistant_ctrl, 'rag_integration') and self.assistant_ctrl.rag_integration:
                 logger.info("🌐 Updating RAG system language settings...")
                 self.assistant_ctrl.rag_integration.reload_for_language_change()
+                self.assistant_ctrl.rag_integration.reload_engine_pool_settings()
+                self.assistant_ctrl.rag_integration.reload_local_intent_settings()
             
             # 检查当前API key配置，决定是否需要切换模式
             dont_remind = settings.get('dont_remind_api_missing', False)
@@ -965,20 +967,21 @@ class GameWikiApp(QObject):
             if hasattr(self.assistant_ctrl, '_current_worker') and self.assistant_ctrl._current_worker:
                 worker = self.assistant_ctrl._current_worker
                 try:
-                    logger.info("Stopping current worker thread...")
+                    logger.info("Stopping current query worker...")
                     if worker.isRunning():
                         worker.stop()
-                        if not worker.wait(3000):
-                            logger.warning("Worker thread did not exit within timeout, forcing terminate()")
-                            worker.terminate()
-                            worker.wait(1000)
-                    logger.info("Worker thread stopped")
+                        # The query runs as a task on the async loop (timeout in seconds)
+                        if not worker.wait(3.0):
+                            logger.warning("Query worker did not finish within timeout, stopping the async loop")
+                    logger.info("Query worker stopped")
                 except Exception as e:
-                    logger.warning(f"Error stopping worker thread: {e}")
+                    logger.warning(f"Error stopping query worker: {e}")
             
-            # Disconnect RAG integration signals
+            # Stop the RAG async loop and disconnect RAG integration signals
             try:
                 if hasattr(self.assistant_ctrl, 'rag_integration') and self.assistant_ctrl.rag_integration:
+                    logger.info("Stopping RAG async loop...")
+                    self.assistant_ctrl.rag_integration.async_worker.stop()
                     logger.info("Disconnecting RAG integration signals...")
                     self.assistant_ctrl.rag_integration.disconnect()
                     logger.info("RAG integration signals disconnected")
@@ -40,17 +40,19 @@ class InitializationThread(QThread):
             self.progress_update.emit(55, "Loading AI modules...")
             try:
                 # Import and initialize AI modules during splash screen
-                from .ai.unified_query_processor import process_query_unified
+                from .ai.unified_query_processor import process_query_unified, process_query_unified_async
                 from .ai.rag_config import get_default_config
                 from .ai.rag_query import EnhancedRagQuery
                 
                 # Mark AI modules as loaded in assistant_integration
                 from . import assistant_integration as ai_integration
                 ai_integration.process_query_unified = process_query_unified
+                ai_integration.process_query_unified_async = process_query_unified_async
                 ai_integration.get_default_config = get_default_config
                 ai_integration.EnhancedRagQuery = EnhancedRagQuery
                 ai_integration._ai_modules_loaded = True
                 ai_integration._ai_modules_loading = False
+                ai_integration._ai_modules_ready.resolve(True, "splash screen")
                 
                 logger.info("✅ AI modules loaded during splash screen")
             except Exception as e:
@@ -442,17 +442,11 @@ class StreamingMessageWidget(MessageWidget):
 
     def _is_non_streaming_content(self, content: str) -> bool:
         """
-        检测是否是非流式内容（如来自FallbackGuideHandler的内容）
-        非流式内容的特征：
-        1. 以NOTICE开头的fallback内容
-        2. 包含完整结构的长内容（>1000字符且包含多个段落）
+        检测是否是非流式内容（如一次性返回的完整内容）
+        非流式内容的特征：包含完整结构的长内容（>1000字符且包含多个段落）
         """
         if not content:
             return False
-        
-        # 检测NOTICE标记（FallbackGuideHandler的标志）
-        if content.strip().startswith("NOTICE:"):
-            return True
             
         # 检测长内容且结构完整（可能是非流式API返回的完整内容）
         if len(content) > 1000 and content.count('\n\n') >= 3:
@@ -643,7 +637,7 @@ class StreamingMessageWidget(MessageWidget):
 
         self.full_text += chunk
         
-        # 检测是否是非流式内容（如来自FallbackGuideHandler的内容）
+        # 检测是否是非流式内容（如一次性返回的完整内容）
         if self._is_non_streaming_content(self.full_text):
             print(f"📋 [NON-STREAMING] Detected non-streaming content, skipping typewriter effect")
             self._display_complete_content(self.full_text)